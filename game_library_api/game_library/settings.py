@@ -89,6 +89,40 @@ DATABASES = {
 AUTH_USER_MODEL = 'library_app.User'
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'reports': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'reports',
+        'TIMEOUT': 300,
+        'OPTIONS': {
+            'MAX_ENTRIES': 500,
+        },
+    },
+}
+
+# Скільки секунд зберігається відповідь для повторних запитів з тим самим Idempotency-Key
+IDEMPOTENCY_KEY_TTL = 24 * 60 * 60
+
+# Через скільки секунд незавершений (pending) ключ вважається покинутим і може бути зайнятий знову
+IDEMPOTENCY_PENDING_TIMEOUT = 60
+
+# Як library_ui звертається до API: 'http' (окреме розгортання) або 'inprocess' (той самий процес, без сокета)
+LIBRARY_API_TRANSPORT = 'http'
+
+# Скільки секунд library_ui повторно використовує відповідь API без запиту (0 — лише ревалідація за ETag)
+LIBRARY_API_CACHE_TTLS = {
+    'get_user_data': 15,
+    'get_game_details': 60,
+    'get_all_games': 30,
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -3,7 +3,7 @@ from django.contrib.auth.decorators import login_required
 from django.urls import path, include
 from django.views.generic import RedirectView, TemplateView
 from rest_framework.routers import DefaultRouter
-from library_app import views
+from library_app import views, views_async
 from django.contrib.auth import views as auth_views
 
 
@@ -65,6 +65,20 @@ urlpatterns = [
     path('api/reports/user-activity-bokeh/', UserActivityBokehAPIView.as_view(), name='user_activity_bokeh_api'),
     path('api/analysis/user-genre-breakdown/', UserGenreBreakdownAPIView.as_view(), name='user_genre_breakdown_api'),
 
+    path('api/async/reports/genre-playtime/', views_async.genre_playtime_report, name='async_genre_playtime'),
+    path('api/async/reports/dev-revenue/', views_async.developer_revenue_report, name='async_dev_revenue'),
+    path('api/async/reports/monthly-revenue/', views_async.monthly_revenue_report, name='async_monthly_revenue'),
+    path('api/async/reports/top-rated-games/', views_async.top_rated_games_report, name='async_top_rated_games'),
+    path('api/async/reports/whales-analysis/', views_async.whales_analysis_report, name='async_whales_analysis'),
+    path('api/async/reports/user-activity/', views_async.user_activity_report, name='async_user_activity'),
+    path('api/async/analysis/user-genre-breakdown/', views_async.user_genre_breakdown, name='async_user_genre_breakdown'),
+    path('api/async/reports/monthly-revenue-bokeh/', views_async.monthly_revenue_bokeh, name='async_monthly_revenue_bokeh'),
+    path('api/async/reports/genre-playtime-bokeh/', views_async.genre_playtime_bokeh, name='async_genre_playtime_bokeh'),
+    path('api/async/reports/developer-revenue-bokeh/', views_async.developer_revenue_bokeh, name='async_developer_revenue_bokeh'),
+    path('api/async/reports/top-rated-games-bokeh/', views_async.top_rated_games_bokeh, name='async_top_rated_games_bokeh'),
+    path('api/async/reports/whales-analysis-bokeh/', views_async.whales_analysis_bokeh, name='async_whales_analysis_bokeh'),
+    path('api/async/reports/user-activity-bokeh/', views_async.user_activity_bokeh, name='async_user_activity_bokeh'),
+
     path('parallel-test/', views_api.parallel_db_test_view, name='parallel_test'),
 
     path('client/', include('library_ui.urls')),
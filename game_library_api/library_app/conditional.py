@@ -0,0 +1,71 @@
+import hashlib
+from functools import wraps
+
+from django.utils.http import http_date, parse_http_date_safe
+from rest_framework import status
+from rest_framework.response import Response
+
+from library_app.table_versions import table_versions
+
+
+def _validators(view, request, tables, pk=None):
+    versions = table_versions.get(tables)
+    user_id = request.user.pk if request.user.is_authenticated else ''
+    fingerprint = '|'.join([
+        view.basename or type(view).__name__,
+        str(pk or ''),
+        request.get_full_path(),
+        str(user_id),
+        ','.join(f'{table}:{versions[table][0]}' for table in tables),
+    ])
+    etag = '"%s"' % hashlib.md5(fingerprint.encode('utf-8')).hexdigest()
+
+    timestamps = [updated_at for _, updated_at in versions.values() if updated_at is not None]
+    last_modified = int(max(timestamps).timestamp()) if timestamps else None
+    return etag, last_modified
+
+
+def _etag_matches(header, etag):
+    if header.strip() == '*':
+        return True
+    # Для GET порівняння слабке: префікс W/ не враховується
+    candidates = [tag.strip() for tag in header.split(',')]
+    return any(tag.removeprefix('W/') == etag for tag in candidates)
+
+
+def _is_not_modified(request, etag, last_modified):
+    if_none_match = request.headers.get('If-None-Match')
+    if if_none_match is not None:
+        # If-Modified-Since ігнорується, якщо клієнт надіслав If-None-Match (RFC 9110, 13.1.3)
+        return _etag_matches(if_none_match, etag)
+
+    if_modified_since = parse_http_date_safe(request.headers.get('If-Modified-Since', ''))
+    return last_modified is not None and if_modified_since is not None and last_modified <= if_modified_since
+
+
+def conditional_get(view_method):
+    # ETag будується з лічильників table_version, тож 304 відповідає одним маленьким запитом
+    # без вибірки і серіалізації сторінки каталогу
+    @wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        tables = self.get_etag_tables(request)
+        if request.method not in ('GET', 'HEAD') or not tables:
+            return view_method(self, request, *args, **kwargs)
+
+        # Версії читаються до даних: запис, що встиг між ними, дасть новіші дані зі старим ETag,
+        # і наступний запит просто перезавантажить їх, а не навпаки
+        etag, last_modified = _validators(self, request, tables, kwargs.get('pk'))
+        headers = {'ETag': etag}
+        if last_modified is not None:
+            headers['Last-Modified'] = http_date(last_modified)
+
+        if _is_not_modified(request, etag, last_modified):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        response = view_method(self, request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            for name, value in headers.items():
+                response[name] = value
+        return response
+
+    return wrapper
@@ -0,0 +1,80 @@
+import functools
+import hashlib
+import json
+
+from django.conf import settings
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+
+from library_app.repositories.idempotency_repository import IdempotencyRepository
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+REPLAY_HEADER = 'Idempotent-Replayed'
+
+idempotency_repo = IdempotencyRepository()
+
+
+def _as_json(data):
+    # Та сама форма, яку віддасть JSONRenderer (Decimal -> число), щоб повтор не відрізнявся від оригіналу
+    return json.loads(json.dumps(data, cls=JSONEncoder))
+
+
+def _request_hash(request):
+    payload = json.dumps({'path': request.path, 'data': request.data}, cls=JSONEncoder, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _owner(request):
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return str(user.pk)
+    return ''
+
+
+def idempotent(scope):
+    def decorator(view_method):
+        @functools.wraps(view_method)
+        def wrapper(self, request, *args, **kwargs):
+            key = request.headers.get(IDEMPOTENCY_HEADER)
+            if not key:
+                return view_method(self, request, *args, **kwargs)
+
+            if len(key) > 64:
+                return Response({'error': 'Ключ ідемпотентності задовгий (максимум 64 символи).'},
+                                status=status.HTTP_400_BAD_REQUEST)
+
+            request_hash = _request_hash(request)
+            record, created = idempotency_repo.claim(
+                scope, _owner(request), key, request_hash,
+                settings.IDEMPOTENCY_KEY_TTL, settings.IDEMPOTENCY_PENDING_TIMEOUT,
+            )
+
+            if not created:
+                if record.request_hash != request_hash:
+                    return Response({'error': 'Ключ ідемпотентності вже використано з іншим запитом.'},
+                                    status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+                if record.status_code is None:
+                    return Response({'error': 'Запит із цим ключем ідемпотентності ще виконується.'},
+                                    status=status.HTTP_409_CONFLICT)
+
+                response = Response(record.response_body, status=record.status_code)
+                response[REPLAY_HEADER] = 'true'
+                return response
+
+            try:
+                response = view_method(self, request, *args, **kwargs)
+            except Exception:
+                idempotency_repo.release(record)
+                raise
+
+            if response.status_code >= 500:
+                # Збій сервера нічого не записав — дозволяємо клієнту повторити запит
+                idempotency_repo.release(record)
+            else:
+                idempotency_repo.complete(record, response.status_code, _as_json(response.data))
+            return response
+
+        return wrapper
+
+    return decorator
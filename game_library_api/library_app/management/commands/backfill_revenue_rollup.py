@@ -0,0 +1,23 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from library_app.repositories.revenue_repository import RevenueRepository
+
+
+class Command(BaseCommand):
+    help = 'Перераховує денний агрегат доходу revenue_daily із завершених замовлень.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since', help='Перерахувати лише дні, починаючи з дати YYYY-MM-DD.')
+
+    def handle(self, *args, **options):
+        since = None
+        if options['since']:
+            try:
+                since = datetime.strptime(options['since'], '%Y-%m-%d').date()
+            except ValueError:
+                raise CommandError('Дата --since має бути у форматі YYYY-MM-DD.')
+
+        days = RevenueRepository().rebuild(since=since)
+        self.stdout.write(self.style.SUCCESS(f'Перераховано днів: {days}'))
@@ -0,0 +1,155 @@
+import threading
+import time
+import uuid
+from collections import Counter
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count, Sum
+from django.utils import timezone
+
+from library_app.models import Game, LibraryGame, Order
+from library_app.purchase_service import purchase_service, PurchaseError
+from library_app.report_cache import report_cache
+from library_app.repositories.revenue_repository import RevenueRepository
+from library_app.repositories.user_repository import UserRepository
+
+UserModel = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Навантажувальний тест покупок: паралельні покупці, перевірка балансів і бібліотек, покупки за секунду.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--buyers', default='1,2,4,8,16,32,64',
+                            help='Кількості паралельних покупців через кому.')
+        parser.add_argument('--games-per-buyer', type=int, default=5,
+                            help='Скільки різних ігор купує кожен покупець у тесті пропускної здатності.')
+
+    def handle(self, *args, **options):
+        try:
+            buyer_counts = [int(value) for value in options['buyers'].split(',')]
+        except ValueError:
+            raise CommandError('--buyers має бути списком цілих чисел через кому.')
+
+        games_per_buyer = options['games_per_buyer']
+        needed = max(buyer_counts + [games_per_buyer])
+        games = list(Game.objects.filter(price__gt=0).only('game_id', 'price').order_by('game_id')[:needed])
+        if len(games) < games_per_buyer:
+            raise CommandError(f'Потрібно щонайменше {games_per_buyer} платних ігор у базі.')
+
+        self.prefix = f'bench_{uuid.uuid4().hex[:8]}'
+        self.failures = []
+        try:
+            for buyers in buyer_counts:
+                self.throughput(buyers, games[:games_per_buyer])
+                self.same_game(buyers, games[0])
+                self.overdraft(buyers, games[:buyers])
+        finally:
+            self.cleanup()
+
+        if self.failures:
+            raise CommandError('Порушено інваріанти:\n' + '\n'.join(self.failures))
+        self.stdout.write(self.style.SUCCESS('Усі інваріанти покупок виконано.'))
+
+    def make_user(self, name, balance):
+        return UserRepository().create(username=f'{self.prefix}_{name}', balance=balance)
+
+    def run_parallel(self, jobs):
+        outcomes = Counter()
+        lock = threading.Lock()
+        barrier = threading.Barrier(len(jobs))
+
+        def worker(user_id, game_ids):
+            barrier.wait()
+            try:
+                for game_id in game_ids:
+                    try:
+                        purchase_service.buy_game(user_id, game_id)
+                        outcome = 'ok'
+                    except PurchaseError as e:
+                        outcome = e.message
+                    except Exception as e:
+                        outcome = type(e).__name__
+                    with lock:
+                        outcomes[outcome] += 1
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker, args=job) for job in jobs]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return outcomes, time.perf_counter() - started
+
+    def check_user(self, scenario, user, initial_balance):
+        user.refresh_from_db(fields=['balance'])
+        orders = Order.objects.filter(user=user).aggregate(spent=Sum('total_amount'), count=Count('order_id'))
+        spent = orders['spent'] or Decimal('0')
+        duplicates = (
+            LibraryGame.objects
+            .filter(library__user=user)
+            .values('game_id')
+            .annotate(copies=Count('id'))
+            .filter(copies__gt=1)
+            .count()
+        )
+        owned = LibraryGame.objects.filter(library__user=user).count()
+
+        if user.balance < 0:
+            self.failures.append(f'{scenario}: від’ємний баланс {user.balance}')
+        if user.balance != initial_balance - spent:
+            self.failures.append(f'{scenario}: баланс {user.balance} не дорівнює {initial_balance} - {spent}')
+        if duplicates:
+            self.failures.append(f'{scenario}: {duplicates} ігор куплено повторно')
+        if owned != orders['count']:
+            self.failures.append(f'{scenario}: {orders["count"]} замовлень, але {owned} ігор у бібліотеці')
+        if UserRepository().find_balance_drift([user.pk]).exists():
+            self.failures.append(f'{scenario}: баланс не збігається з журналом balance_ledger')
+        return orders['count']
+
+    def report(self, scenario, buyers, outcomes, elapsed):
+        rate = outcomes['ok'] / elapsed if elapsed else 0
+        details = ', '.join(f'{name}: {count}' for name, count in outcomes.most_common())
+        self.stdout.write(f'{scenario:<12} покупців={buyers:<3} {rate:8.1f} покупок/с  ({details})')
+
+    def throughput(self, buyers, games):
+        balance = sum(game.price for game in games)
+        users = [self.make_user(f'tp{buyers}_{index}', balance) for index in range(buyers)]
+        game_ids = [game.pk for game in games]
+
+        outcomes, elapsed = self.run_parallel([(user.pk, game_ids) for user in users])
+        self.report('throughput', buyers, outcomes, elapsed)
+
+        if outcomes['ok'] != buyers * len(games):
+            self.failures.append(f'throughput/{buyers}: успішних {outcomes["ok"]} з {buyers * len(games)}')
+        for user in users:
+            self.check_user(f'throughput/{buyers}', user, balance)
+
+    def same_game(self, buyers, game):
+        balance = game.price * buyers
+        user = self.make_user(f'sg{buyers}', balance)
+
+        outcomes, elapsed = self.run_parallel([(user.pk, [game.pk])] * buyers)
+        self.report('same-game', buyers, outcomes, elapsed)
+
+        if self.check_user(f'same-game/{buyers}', user, balance) != 1:
+            self.failures.append(f'same-game/{buyers}: гру куплено {outcomes["ok"]} разів замість одного')
+
+    def overdraft(self, buyers, games):
+        # Грошей вистачає лише на половину ігор: жодна паралельна покупка не може піти в мінус
+        balance = sum(game.price for game in games[:max(1, len(games) // 2)])
+        user = self.make_user(f'od{buyers}', balance)
+
+        outcomes, elapsed = self.run_parallel([(user.pk, [game.pk]) for game in games])
+        self.report('overdraft', buyers, outcomes, elapsed)
+        self.check_user(f'overdraft/{buyers}', user, balance)
+
+    def cleanup(self):
+        UserModel.objects.filter(username__startswith=f'{self.prefix}_').delete()
+        RevenueRepository().rebuild(since=timezone.localdate())
+        report_cache.invalidate('purchases')
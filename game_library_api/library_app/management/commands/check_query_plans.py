@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from library_app.query_plans import check_report_plans
+
+
+class Command(BaseCommand):
+    help = 'Знімає EXPLAIN для кожного звіту репозиторіїв і падає, якщо план деградував до повного сканування.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verbose-plans', action='store_true', help='Друкувати повні плани запитів.')
+
+    def handle(self, *args, **options):
+        regressions = []
+
+        for result in check_report_plans():
+            if options['verbose_plans']:
+                self.stdout.write(f"--- {result['report']} ---\n{result['plan']}\n")
+
+            if result['full_scans']:
+                regressions.append(result)
+                self.stdout.write(self.style.ERROR(
+                    f"{result['report']}: повне сканування {', '.join(result['full_scans'])}"
+                ))
+            else:
+                self.stdout.write(self.style.SUCCESS(f"{result['report']}: OK"))
+
+        if regressions:
+            raise CommandError(f'Регресія плану запиту у {len(regressions)} звіт(ах).')
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from library_app.repositories.idempotency_repository import IdempotencyRepository
+
+
+class Command(BaseCommand):
+    help = 'Видаляє прострочені ключі ідемпотентності разом зі збереженими відповідями.'
+
+    def handle(self, *args, **options):
+        deleted = IdempotencyRepository().purge_expired()
+        self.stdout.write(self.style.SUCCESS(f'Видалено прострочених ключів: {deleted}'))
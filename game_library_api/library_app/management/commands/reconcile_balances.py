@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from library_app.repositories.user_repository import UserRepository
+
+
+class Command(BaseCommand):
+    help = 'Звіряє баланси користувачів із сумою записів balance_ledger одним агрегатним запитом.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fix', action='store_true',
+                            help='Дописати коригувальні записи в журнал для користувачів із розбіжностями.')
+
+    def handle(self, *args, **options):
+        drifted = UserRepository().reconcile_balances(fix=options['fix'])
+
+        for row in drifted:
+            self.stdout.write(
+                f"{row['id']} ({row['username']}): баланс {row['balance']}, за журналом {row['ledger_total']}"
+            )
+
+        if not drifted:
+            self.stdout.write(self.style.SUCCESS('Усі баланси збігаються з журналом.'))
+        elif options['fix']:
+            self.stdout.write(self.style.SUCCESS(f'Додано коригувальних записів: {len(drifted)}'))
+        else:
+            raise CommandError(f'Розбіжності балансу у {len(drifted)} користувач(ів).')
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from library_app.repositories.game_repository import GameRepository
+
+
+class Command(BaseCommand):
+    help = 'Звіряє збережені агрегати рейтингу ігор із таблицею review і виправляє розбіжності.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Лише показати розбіжності, нічого не змінюючи.')
+
+    def handle(self, *args, **options):
+        drifted = GameRepository().reconcile_rating_aggregates(dry_run=options['dry_run'])
+
+        for game in drifted:
+            self.stdout.write(f'{game.game_id}: {game.rating_count} відгуків, сума {game.rating_sum}')
+
+        verb = 'Знайдено' if options['dry_run'] else 'Виправлено'
+        self.stdout.write(self.style.SUCCESS(f'{verb} ігор з розбіжностями: {len(drifted)}'))
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.7 on 2026-10-18 10:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('library_app', '0004_alter_review_created_at'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='game',
+            index=models.Index(fields=['price'], name='game_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['status', 'created_at', 'total_amount'], name='order_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['user', 'status', 'created_at', 'total_amount'], name='order_user_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='librarygame',
+            index=models.Index(fields=['library', 'playtime_hours'], name='library_game_playtime_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='librarygame',
+            index=models.Index(fields=['game', 'playtime_hours'], name='library_game_game_play_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ordergame',
+            index=models.Index(fields=['game', 'order', 'price_at_purchase'], name='order_game_revenue_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['game', 'rating'], name='review_game_rating_idx'),
+        ),
+    ]
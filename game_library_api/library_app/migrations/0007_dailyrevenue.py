@@ -0,0 +1,44 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:00
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+
+
+def backfill_daily_revenue(apps, schema_editor):
+    Order = apps.get_model('library_app', 'Order')
+    DailyRevenue = apps.get_model('library_app', 'DailyRevenue')
+
+    rows = (
+        Order.objects
+        .filter(status='complete')
+        .annotate(day=TruncDate('created_at'))
+        .values('day')
+        .annotate(revenue=Sum('total_amount'), orders=Count('order_id'))
+    )
+    DailyRevenue.objects.bulk_create(
+        [DailyRevenue(day=row['day'], total_revenue=row['revenue'], orders_count=row['orders']) for row in rows],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('library_app', '0006_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyRevenue',
+            fields=[
+                ('day', models.DateField(primary_key=True, serialize=False)),
+                ('total_revenue', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('orders_count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'revenue_daily',
+            },
+        ),
+        migrations.RunPython(backfill_daily_revenue, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,90 @@
+# Generated by Django 5.2.7 on 2026-10-18 13:00
+
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+
+def populate_rating_aggregates(apps, schema_editor):
+    Game = apps.get_model('library_app', 'Game')
+    Review = apps.get_model('library_app', 'Review')
+
+    stats = (
+        Review.objects
+        .values('game_id')
+        .annotate(
+            total=Sum('rating'),
+            count=Count('review_id'),
+            **{f'r{rating}': Count('review_id', filter=Q(rating=rating)) for rating in range(1, 6)}
+        )
+    )
+
+    games = []
+    for row in stats:
+        game = Game(game_id=row['game_id'])
+        game.rating_sum = row['total']
+        game.rating_count = row['count']
+        game.rating_avg = row['total'] / row['count']
+        for rating in range(1, 6):
+            setattr(game, f'rating_{rating}_count', row[f'r{rating}'])
+        games.append(game)
+
+    Game.objects.bulk_update(
+        games,
+        ['rating_sum', 'rating_count', 'rating_avg'] + [f'rating_{rating}_count' for rating in range(1, 6)],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('library_app', '0007_dailyrevenue'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='game',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='game',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='game',
+            name='rating_avg',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='game',
+            name='rating_1_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='game',
+            name='rating_2_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='game',
+            name='rating_3_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='game',
+            name='rating_4_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='game',
+            name='rating_5_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='game',
+            index=models.Index(fields=['rating_avg', 'rating_count'], name='game_rating_idx'),
+        ),
+        migrations.RunPython(populate_rating_aggregates, migrations.RunPython.noop),
+    ]
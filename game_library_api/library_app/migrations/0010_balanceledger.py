@@ -0,0 +1,46 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:00
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+def open_ledgers(apps, schema_editor):
+    User = apps.get_model('library_app', 'User')
+    BalanceLedger = apps.get_model('library_app', 'BalanceLedger')
+
+    BalanceLedger.objects.bulk_create(
+        [
+            BalanceLedger(user_id=user_id, amount=balance, balance_after=balance, kind='opening')
+            for user_id, balance in User.objects.exclude(balance=0).values_list('id', 'balance').iterator()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('library_app', '0009_idempotencykey'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BalanceLedger',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('balance_after', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('kind', models.CharField(choices=[('opening', 'Opening'), ('top_up', 'Top up'), ('purchase', 'Purchase'), ('adjustment', 'Adjustment')], max_length=20)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('order', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='library_app.order')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='balance_entries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'balance_ledger',
+                'indexes': [models.Index(fields=['user', 'created_at', 'id'], name='ledger_user_created_idx')],
+            },
+        ),
+        migrations.RunPython(open_ledgers, migrations.RunPython.noop),
+    ]
@@ -60,11 +60,25 @@ class Game(models.Model):
     publisher = models.ForeignKey(Publisher, on_delete=models.SET_NULL, null=True)
     genre = models.ManyToManyField(Genre, through='GameGenre')
 
+    # Агрегати відгуків, що підтримуються ReviewRepository при кожному записі відгуку
+    rating_sum = models.PositiveIntegerField(default=0)
+    rating_count = models.PositiveIntegerField(default=0)
+    rating_avg = models.FloatField(null=True, blank=True)
+    rating_1_count = models.PositiveIntegerField(default=0)
+    rating_2_count = models.PositiveIntegerField(default=0)
+    rating_3_count = models.PositiveIntegerField(default=0)
+    rating_4_count = models.PositiveIntegerField(default=0)
+    rating_5_count = models.PositiveIntegerField(default=0)
+
     def __str__(self):
         return self.title
 
     class Meta:
         db_table = 'game'
+        indexes = [
+            models.Index(fields=['price'], name='game_price_idx'),
+            models.Index(fields=['rating_avg', 'rating_count'], name='game_rating_idx'),
+        ]
 
 class Library(models.Model):
     library_id = models.AutoField(primary_key=True)
@@ -94,6 +108,83 @@ class Order(models.Model):
 
     class Meta:
         db_table = 'order'
+        indexes = [
+            models.Index(fields=['status', 'created_at', 'total_amount'], name='order_status_created_idx'),
+            models.Index(fields=['user', 'status', 'created_at', 'total_amount'], name='order_user_status_idx'),
+            models.Index(fields=['created_at', 'order_id'], name='order_created_keyset_idx'),
+        ]
+
+
+class DailyRevenue(models.Model):
+    day = models.DateField(primary_key=True)
+    total_revenue = models.DecimalField(decimal_places=2, max_digits=12, default=0)
+    orders_count = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.day}: {self.total_revenue}"
+
+    class Meta:
+        db_table = 'revenue_daily'
+
+
+class BalanceLedger(models.Model):
+    KIND_CHOICES = [('opening', 'Opening'),
+                    ('top_up', 'Top up'),
+                    ('purchase', 'Purchase'),
+                    ('adjustment', 'Adjustment')]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='balance_entries')
+    # Зі знаком: поповнення додатні, списання від'ємні; сума по користувачу дорівнює User.balance
+    amount = models.DecimalField(decimal_places=2, max_digits=12)
+    balance_after = models.DecimalField(decimal_places=2, max_digits=12)
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    order = models.ForeignKey(Order, on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.user_id}: {self.amount} ({self.kind})"
+
+    class Meta:
+        db_table = 'balance_ledger'
+        indexes = [
+            models.Index(fields=['user', 'created_at', 'id'], name='ledger_user_created_idx'),
+        ]
+
+
+class TableVersion(models.Model):
+    # Лічильник змін таблиці: репозиторії збільшують його при записі, з нього будуються ETag каталогу
+    table = models.CharField(max_length=64, primary_key=True)
+    version = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.table}@{self.version}"
+
+    class Meta:
+        db_table = 'table_version'
+
+
+class IdempotencyKey(models.Model):
+    scope = models.CharField(max_length=32)
+    # Ключі клієнтів не глобальні: той самий Idempotency-Key різних користувачів — різні записи
+    owner = models.CharField(max_length=64, blank=True, default='')
+    key = models.CharField(max_length=64)
+    request_hash = models.CharField(max_length=64)
+    # null, поки перший запит із цим ключем ще виконується
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    response_body = models.JSONField(null=True, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    expires_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.scope}:{self.owner}:{self.key}"
+
+    class Meta:
+        db_table = 'idempotency_key'
+        unique_together = ('scope', 'owner', 'key')
+        indexes = [
+            models.Index(fields=['expires_at'], name='idempotency_expires_idx'),
+        ]
 
 
 class GameGenre(models.Model):
@@ -121,6 +212,10 @@ class LibraryGame(models.Model):
     class Meta:
         db_table = 'library_game'
         unique_together = ('library', 'game')
+        indexes = [
+            models.Index(fields=['library', 'playtime_hours'], name='library_game_playtime_idx'),
+            models.Index(fields=['game', 'playtime_hours'], name='library_game_game_play_idx'),
+        ]
 
 class OrderGame(models.Model):
     order = models.ForeignKey(Order, on_delete=models.CASCADE)
@@ -133,6 +228,9 @@ class OrderGame(models.Model):
     class Meta:
         db_table = 'order_game'
         unique_together = ('order', 'game')
+        indexes = [
+            models.Index(fields=['game', 'order', 'price_at_purchase'], name='order_game_revenue_idx'),
+        ]
 
 
 class Review(models.Model):
@@ -156,6 +254,10 @@ class Review(models.Model):
     class Meta:
         db_table = 'review'
         unique_together = ('user', 'game')
+        indexes = [
+            models.Index(fields=['game', 'rating'], name='review_game_rating_idx'),
+            models.Index(fields=['created_at', 'review_id'], name='review_created_keyset_idx'),
+        ]
 
 
 
@@ -1,4 +1,4 @@
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.pagination import PageNumberPagination, CursorPagination
 from rest_framework.response import Response
 
 class StandardPagination(PageNumberPagination):
@@ -12,4 +12,33 @@ class StandardPagination(PageNumberPagination):
             'next': self.get_next_link(),
             'previous': self.get_previous_link(),
             'results': data
-        })
\ No newline at end of file
+        })
+
+
+class KeysetPagination(CursorPagination):
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+    ordering = '-pk'
+    ordering_query_param = 'ordering'
+    keyset_fields = ('pk', 'created_at')
+
+    def supports_ordering(self, ordering, model, view=None):
+        # В'юшка може дозволити власні поля (каталог — price, title...); лише NOT NULL колонки,
+        # бо курсор порівнює позицію через > / <, а NULL випав би з наступних сторінок
+        field_name = ordering.lstrip('-')
+        if field_name == 'pk':
+            return True
+        keyset_fields = getattr(view, 'keyset_ordering_fields', None) or self.keyset_fields
+        model_fields = {field.name for field in model._meta.concrete_fields if not field.null}
+        return field_name in keyset_fields and field_name in model_fields
+
+    def get_ordering(self, request, queryset, view):
+        ordering = request.query_params.get(self.ordering_query_param)
+        if ordering and self.supports_ordering(ordering, queryset.model, view):
+            if ordering.lstrip('-') == 'pk':
+                return (ordering,)
+            # pk як другий ключ робить порядок однозначним при однакових значеннях поля
+            return (ordering, '-pk' if ordering.startswith('-') else 'pk')
+
+        return (self.ordering,)
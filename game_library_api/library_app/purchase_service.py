@@ -0,0 +1,165 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils import timezone
+from rest_framework import status
+
+from library_app.models import Game, Library, LibraryGame, Order, OrderGame
+from library_app.report_cache import report_cache
+from library_app.table_versions import table_versions
+from library_app.repositories.repository_manager import RepositoryManager
+
+UserModel = get_user_model()
+
+MAX_CART_SIZE = 100
+
+
+class PurchaseError(Exception):
+    def __init__(self, message, status_code=status.HTTP_400_BAD_REQUEST, results=None):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+        self.results = results
+
+
+class PurchaseService:
+    def __init__(self, repositories, cache):
+        self.repos = repositories
+        self.cache = cache
+
+    def _load_games(self, game_ids):
+        return Game.objects.only('game_id', 'title', 'price').in_bulk(game_ids)
+
+    def _lock_buyer(self, user_id):
+        # Один SELECT ... FOR UPDATE на рядок користувача серіалізує покупки одного покупця,
+        # тож перевірка володіння і списання балансу не можуть перегнатися
+        try:
+            return UserModel.objects.select_for_update(of=('self',)).select_related('library').get(pk=user_id)
+        except UserModel.DoesNotExist:
+            return None
+
+    def _owned_game_ids(self, user, game_ids):
+        library = getattr(user, 'library', None)
+        if library is None:
+            return set()
+        return set(
+            LibraryGame.objects
+            .filter(library_id=library.pk, game_id__in=game_ids)
+            .values_list('game_id', flat=True)
+        )
+
+    def _debit(self, user, amount, order_obj):
+        # Рядок користувача вже заблоковано, тож баланс після списання відомий без зайвого SELECT
+        new_balance = self.repos.users.change_balance(
+            user.pk, -amount, 'purchase', order=order_obj, locked_balance=user.balance
+        )
+        if new_balance is None:
+            raise PurchaseError('Недостатньо коштів на балансі.')
+        user.balance = new_balance
+
+    def _record_order(self, user, games, total):
+        order_obj = Order.objects.create(user=user, total_amount=total, status='complete')
+        OrderGame.objects.bulk_create([
+            OrderGame(order=order_obj, game=game, price_at_purchase=game.price) for game in games
+        ])
+        self.repos.revenue.record_order(order_obj)
+
+        changed_tables = [LibraryGame._meta.db_table]
+        library = getattr(user, 'library', None)
+        if library is None:
+            library = Library.objects.create(user=user)
+            changed_tables.append(Library._meta.db_table)
+
+        purchase_date = timezone.now()
+        LibraryGame.objects.bulk_create([
+            LibraryGame(library=library, game=game, purchase_date=purchase_date) for game in games
+        ])
+        table_versions.bump(*changed_tables)
+        return order_obj
+
+    def buy_game(self, user_id, game_id):
+        try:
+            game = self._load_games([game_id]).get(int(game_id))
+        except (TypeError, ValueError):
+            raise PurchaseError('Некоректний формат ID.')
+
+        with transaction.atomic():
+            try:
+                user = self._lock_buyer(user_id)
+            except (TypeError, ValueError):
+                raise PurchaseError('Некоректний формат ID.')
+
+            if not user or not game:
+                raise PurchaseError('Користувача або гру не знайдено.', status.HTTP_404_NOT_FOUND)
+
+            if self._owned_game_ids(user, [game.pk]):
+                raise PurchaseError(f'Гра "{game.title}" вже є у вашій бібліотеці.')
+
+            if user.balance < game.price:
+                raise PurchaseError('Недостатньо коштів на балансі.')
+
+            order_obj = self._record_order(user, [game], game.price)
+            self._debit(user, game.price, order_obj)
+
+        self.cache.invalidate('purchases')
+        return user, game, order_obj
+
+    def checkout(self, user_id, game_ids):
+        try:
+            requested = [int(game_id) for game_id in game_ids]
+        except (TypeError, ValueError):
+            raise PurchaseError('Некоректний формат ID.')
+
+        if not requested:
+            raise PurchaseError('Кошик порожній.')
+        if len(requested) > MAX_CART_SIZE:
+            raise PurchaseError(f'Не більше {MAX_CART_SIZE} ігор в одному замовленні.')
+
+        games = self._load_games(requested)
+
+        with transaction.atomic():
+            try:
+                user = self._lock_buyer(user_id)
+            except (TypeError, ValueError):
+                raise PurchaseError('Некоректний формат ID.')
+
+            if not user:
+                raise PurchaseError('Користувача не знайдено.', status.HTTP_404_NOT_FOUND)
+
+            owned = self._owned_game_ids(user, list(games))
+
+            results = []
+            to_buy = []
+            seen = set()
+            for game_id in requested:
+                game = games.get(game_id)
+                if game_id in seen:
+                    outcome = 'duplicate'
+                elif game is None:
+                    outcome = 'not_found'
+                elif game_id in owned:
+                    outcome = 'already_owned'
+                else:
+                    outcome = 'purchased'
+                    to_buy.append(game)
+                seen.add(game_id)
+
+                result = {'game_id': game_id, 'status': outcome}
+                if game is not None:
+                    result.update(title=game.title, price=game.price)
+                results.append(result)
+
+            if not to_buy:
+                raise PurchaseError('Жодну гру з кошика не можна купити.', results=results)
+
+            total = sum(game.price for game in to_buy)
+            if user.balance < total:
+                raise PurchaseError('Недостатньо коштів на балансі.', results=results)
+
+            order_obj = self._record_order(user, to_buy, total)
+            self._debit(user, total, order_obj)
+
+        self.cache.invalidate('purchases')
+        return user, order_obj, results
+
+
+purchase_service = PurchaseService(RepositoryManager(), report_cache)
@@ -0,0 +1,101 @@
+import json
+import re
+from datetime import timedelta
+
+from django.db import connection
+from django.utils import timezone
+
+from library_app.repositories.repository_manager import RepositoryManager
+
+# Таблиці фактів, на яких звіти не мають права робити повне сканування.
+# Довідники (genre, developer, publisher) малі і сканувати їх цілком дешево.
+GUARDED_TABLES = ('order', 'order_game', 'review', 'library_game')
+
+repo_manager = RepositoryManager()
+
+
+def report_querysets():
+    today = timezone.now().date()
+    year_ago = today - timedelta(days=365)
+
+    return {
+        'revenue.get_monthly_totals': repo_manager.revenue.get_monthly_totals(year_ago, today),
+        'orders.get_open_bucket_queryset': repo_manager.orders.get_open_bucket_queryset(),
+        'users.get_spending_rank': repo_manager.users.get_spending_rank(year=today.year),
+        'users.get_whales_genre_breakdown': repo_manager.users.get_whales_genre_breakdown([1, 2, 3]),
+        'users.get_user_activity_report': repo_manager.users.get_user_activity_report(),
+        'developers.get_revenue_report': repo_manager.developers.get_revenue_report(year=today.year),
+        'games.get_top_rated_games_report': repo_manager.games.get_top_rated_games_report(min_reviews=10),
+        'genres.get_top_genres_by_playtime': repo_manager.genres.get_top_genres_by_playtime(),
+    }
+
+
+def catalog_querysets():
+    # Гарячі запити каталогу і бібліотеки, які виконуються на кожен перегляд сторінки
+    return {
+        'games.search_catalog': repo_manager.games.search_catalog(genre=1, min_price=10, ordering='price'),
+        'library_games.get_all_by_library_id': repo_manager.library_games.get_all_by_library_id(1),
+        'library_games.owned_game_ids': repo_manager.library_games.model.objects.filter(
+            library__user_id=1
+        ).values_list('game_id', flat=True),
+    }
+
+
+def explain(queryset):
+    if connection.vendor == 'mysql':
+        return queryset.explain(format='JSON')
+    return queryset.explain()
+
+
+def _mysql_full_scans(plan):
+    scanned = []
+
+    def walk(node):
+        if isinstance(node, dict):
+            if node.get('access_type') == 'ALL' and 'table_name' in node:
+                scanned.append(node['table_name'])
+            for value in node.values():
+                walk(value)
+        elif isinstance(node, list):
+            for value in node:
+                walk(value)
+
+    walk(json.loads(plan))
+    return scanned
+
+
+def _sqlite_full_scans(plan):
+    scanned = []
+    for line in plan.splitlines():
+        match = re.search(r'\bSCAN (?:TABLE )?"?(\w+)"?(.*)$', line)
+        if match and 'INDEX' not in match.group(2):
+            scanned.append(match.group(1))
+    return scanned
+
+
+def _postgresql_full_scans(plan):
+    return re.findall(r'Seq Scan on "?(\w+)"?', plan)
+
+
+def find_full_scans(plan, vendor=None):
+    vendor = vendor or connection.vendor
+    if vendor == 'mysql':
+        scanned = _mysql_full_scans(plan)
+    elif vendor == 'postgresql':
+        scanned = _postgresql_full_scans(plan)
+    else:
+        scanned = _sqlite_full_scans(plan)
+
+    return sorted({table for table in scanned if table in GUARDED_TABLES})
+
+
+def check_report_plans():
+    results = []
+    for name, queryset in {**catalog_querysets(), **report_querysets()}.items():
+        plan = explain(queryset)
+        results.append({
+            'report': name,
+            'plan': plan,
+            'full_scans': find_full_scans(plan),
+        })
+    return results
@@ -0,0 +1,101 @@
+import hashlib
+import threading
+from collections import Counter
+
+from django.core.cache import caches
+
+from library_app.table_versions import table_versions
+
+# Від яких груп записів залежить кожен звіт; запис у групу інвалідовує лише ці звіти
+REPORT_DEPENDENCIES = {
+    'genre-playtime': ('purchases', 'playtime', 'catalog'),
+    'dev-revenue': ('purchases', 'catalog'),
+    'monthly-revenue': ('purchases',),
+    'top-rated-games': ('reviews', 'catalog'),
+    'whales-analysis': ('purchases', 'catalog'),
+    'user-activity': ('purchases', 'playtime'),
+}
+
+
+class ReportCache:
+    def __init__(self, alias='reports'):
+        self.alias = alias
+        self._lock = threading.Lock()
+        self._stats = Counter()
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def _count(self, report_name, outcome):
+        with self._lock:
+            self._stats[(report_name, outcome)] += 1
+
+    # Версії тегів лежать у table_version, а не в кеші: їх бачать усі воркери і їх не витісняє MAX_ENTRIES.
+    # У LocMem лишаються тільки самі звіти, ключовані цими версіями
+    def _tag_tables(self, report_name):
+        return [f'report-tag:{tag}' for tag in REPORT_DEPENDENCIES.get(report_name, ())]
+
+    def _build_key(self, report_name, params, versions):
+        normalized = sorted((key, repr(value)) for key, value in params.items())
+        params_hash = hashlib.md5(repr(normalized).encode('utf-8')).hexdigest()
+        tag_versions = '.'.join(str(version) for version, _ in versions.values())
+        return f'report:{report_name}:{tag_versions}:{params_hash}'
+
+    def make_key(self, report_name, params):
+        tables = self._tag_tables(report_name)
+        return self._build_key(report_name, params, table_versions.get(tables))
+
+    async def amake_key(self, report_name, params):
+        tables = self._tag_tables(report_name)
+        return self._build_key(report_name, params, await table_versions.aget(tables))
+
+    def get_or_compute(self, report_name, params, compute):
+        key = self.make_key(report_name, params)
+        payload = self.cache.get(key)
+        if payload is not None:
+            self._count(report_name, 'hits')
+            return payload
+
+        self._count(report_name, 'misses')
+        payload = compute()
+        self.cache.set(key, payload)
+        return payload
+
+    async def aget_or_compute(self, report_name, params, compute):
+        key = await self.amake_key(report_name, params)
+        payload = await self.cache.aget(key)
+        if payload is not None:
+            self._count(report_name, 'hits')
+            return payload
+
+        self._count(report_name, 'misses')
+        payload = await compute()
+        await self.cache.aset(key, payload)
+        return payload
+
+    def invalidate(self, *tags):
+        # Старі ключі звітів стають недосяжними і витісняються за TTL/MAX_ENTRIES
+        table_versions.bump(*(f'report-tag:{tag}' for tag in tags))
+        for tag in tags:
+            self._count(tag, 'invalidations')
+
+    def stats(self):
+        with self._lock:
+            snapshot = dict(self._stats)
+
+        report = {}
+        for (name, outcome), value in snapshot.items():
+            report.setdefault(name, {})[outcome] = value
+
+        totals = {
+            'hits': sum(value for (_, outcome), value in snapshot.items() if outcome == 'hits'),
+            'misses': sum(value for (_, outcome), value in snapshot.items() if outcome == 'misses'),
+        }
+        lookups = totals['hits'] + totals['misses']
+        totals['hit_ratio'] = round(totals['hits'] / lookups, 4) if lookups else None
+
+        return {'totals': totals, 'by_name': report}
+
+
+report_cache = ReportCache()
@@ -0,0 +1,350 @@
+import asyncio
+import math
+import os
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+import pandas as pd
+
+from library_app.report_cache import report_cache
+from library_app.repositories.repository_manager import RepositoryManager
+
+
+def report_frame(rows, columns, money=(), integers=(), floats=()):
+    # values_list -> кортежі прямо в колонки DataFrame, без DRF-серіалізатора і словника на рядок
+    if hasattr(rows, 'values_list'):
+        rows = rows.values_list(*columns)
+
+    df = pd.DataFrame.from_records(list(rows), columns=columns)
+
+    for column in money:
+        df[column] = pd.to_numeric(df[column], errors='coerce').astype('float64').round(2)
+    for column in floats:
+        df[column] = pd.to_numeric(df[column], errors='coerce').astype('float64')
+    for column in integers:
+        df[column] = pd.to_numeric(df[column], errors='coerce').fillna(0).astype('int64')
+
+    return df
+
+
+def frame_records(df):
+    # NaN (гра без відгуків, порожній AVG) не є валідним JSON — у відповіді це null, як і до pandas
+    return df.astype(object).where(df.notna(), None).to_dict('records')
+
+
+def finite_stats(stats):
+    return {name: None if isinstance(value, float) and math.isnan(value) else value for name, value in stats.items()}
+
+
+def _money_str(value):
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return None
+    return str(Decimal(str(value)).quantize(Decimal('0.01')))
+
+
+def money_strings(rows, *columns):
+    # Кадри рахують гроші у float, а API віддавав їх рядками DecimalField ("104.00") —
+    # формат відновлюється лише у відповіді, графіки й кеш працюють із числами
+    return [{**row, **{column: _money_str(row[column]) for column in columns if column in row}} for row in rows]
+
+
+# pandas/Bokeh — чиста робота CPU; async-ендпоінти виносять її сюди, щоб не блокувати event loop
+report_executor = ThreadPoolExecutor(max_workers=min(4, os.cpu_count() or 1), thread_name_prefix='reports')
+
+
+async def offload(func, *args):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(report_executor, func, *args)
+
+
+async def alist(queryset):
+    return [row async for row in queryset]
+
+
+class ReportService:
+    def __init__(self, repositories, cache):
+        self.repos = repositories
+        self.cache = cache
+
+    def _cached(self, report_name, params, compute):
+        return self.cache.get_or_compute(report_name, params, compute)
+
+    def _run(self, report_name, params, rows, build):
+        return self._cached(report_name, params, lambda: build(list(rows)))
+
+    async def _arun(self, report_name, params, rows, build):
+        async def compute():
+            return await offload(build, await alist(rows))
+
+        return await self.cache.aget_or_compute(report_name, params, compute)
+
+    def _genre_playtime_rows(self, min_games):
+        return self.repos.genres.get_top_genres_by_playtime(min_games_count=min_games).values_list(
+            'name', 'avg_playtime_per_copy', 'unique_game_count'
+        )
+
+    def _genre_playtime_build(self, rows):
+        df = report_frame(
+            rows,
+            ['name', 'avg_playtime_per_copy', 'unique_game_count'],
+            floats=['avg_playtime_per_copy'],
+            integers=['unique_game_count'],
+        )
+        analytics_stats = {}
+
+        if not df.empty:
+            analytics_stats = {
+                "mean_avg_playtime": round(df['avg_playtime_per_copy'].mean(), 2),
+                "max_avg_playtime": round(df['avg_playtime_per_copy'].max(), 2),
+                "min_avg_playtime": round(df['avg_playtime_per_copy'].min(), 2),
+                "median_avg_playtime": round(df['avg_playtime_per_copy'].median(), 2),
+                "total_genres_in_report": df.shape[0],
+                "total_unique_games": df['unique_game_count'].sum(),
+            }
+
+        return {'rows': frame_records(df), 'analytics_stats': finite_stats(analytics_stats)}
+
+    def genre_playtime(self, min_games=5):
+        return self._run('genre-playtime', {'min_games': min_games},
+                         self._genre_playtime_rows(min_games), self._genre_playtime_build)
+
+    async def agenre_playtime(self, min_games=5):
+        return await self._arun('genre-playtime', {'min_games': min_games},
+                                self._genre_playtime_rows(min_games), self._genre_playtime_build)
+
+    def _developer_revenue_rows(self, year):
+        return self.repos.developers.get_revenue_report(year=year).values_list(
+            'developer_id', 'name', 'total_revenue', 'avg_price', 'total_copies_sold'
+        )
+
+    def _developer_revenue_build(self, rows):
+        df = report_frame(
+            rows,
+            ['developer_id', 'name', 'total_revenue', 'avg_price', 'total_copies_sold'],
+            money=['total_revenue', 'avg_price'],
+            integers=['developer_id', 'total_copies_sold'],
+        )
+        analytics_stats = {}
+
+        if not df.empty:
+            analytics_stats = {
+                "mean_revenue": round(df['total_revenue'].mean(), 2),
+                "median_revenue": round(df['total_revenue'].median(), 2),
+                "max_revenue": round(df['total_revenue'].max(), 2),
+                "min_revenue": round(df['total_revenue'].min(), 2),
+                "avg_price_mean": round(df['avg_price'].mean(), 2),
+                "total_developers_count": df.shape[0],
+            }
+
+        return {'rows': frame_records(df), 'analytics_stats': finite_stats(analytics_stats)}
+
+    def developer_revenue(self, year=None):
+        return self._run('dev-revenue', {'year': year},
+                         self._developer_revenue_rows(year), self._developer_revenue_build)
+
+    async def adeveloper_revenue(self, year=None):
+        return await self._arun('dev-revenue', {'year': year},
+                                self._developer_revenue_rows(year), self._developer_revenue_build)
+
+    def _monthly_revenue_build(self, rows):
+        df = report_frame(
+            [(row['order_year'], row['order_month'], row['total_revenue']) for row in rows],
+            ['order_year', 'order_month', 'total_revenue'],
+            money=['total_revenue'],
+            integers=['order_year', 'order_month'],
+        )
+        analytics_stats = {}
+
+        if not df.empty:
+            analytics_stats = {
+                "total_period_revenue": round(df['total_revenue'].sum(), 2),
+                "mean_monthly_revenue": round(df['total_revenue'].mean(), 2),
+                "max_monthly_revenue": round(df['total_revenue'].max(), 2),
+                "months_in_report": df.shape[0],
+            }
+
+        return {'rows': frame_records(df), 'analytics_stats': finite_stats(analytics_stats)}
+
+    def monthly_revenue(self, start_date=None, end_date=None):
+        def compute():
+            rows = self.repos.orders.get_monthly_revenue_report(start_date_str=start_date, end_date_str=end_date)
+            return self._monthly_revenue_build(rows)
+
+        return self._cached('monthly-revenue', {'start_date': start_date, 'end_date': end_date}, compute)
+
+    async def amonthly_revenue(self, start_date=None, end_date=None):
+        async def compute():
+            rows = await self.repos.orders.aget_monthly_revenue_report(start_date_str=start_date, end_date_str=end_date)
+            return await offload(self._monthly_revenue_build, rows)
+
+        params = {'start_date': start_date, 'end_date': end_date}
+        return await self.cache.aget_or_compute('monthly-revenue', params, compute)
+
+    def _top_rated_games_rows(self, min_reviews, genre_name, min_price, max_price):
+        return self.repos.games.get_top_rated_games_report(
+            min_reviews=min_reviews,
+            genre_name=genre_name,
+            min_price=min_price,
+            max_price=max_price
+        ).values_list('game_id', 'title', 'price', 'avg_rating', 'reviews_count')
+
+    def _top_rated_games_build(self, rows):
+        df = report_frame(
+            rows,
+            ['game_id', 'title', 'price', 'avg_rating', 'reviews_count'],
+            money=['price'],
+            floats=['avg_rating'],
+            integers=['game_id', 'reviews_count'],
+        )
+        analytics_stats = {}
+
+        if not df.empty:
+            analytics_stats = {
+                "total_games_in_report": df.shape[0],
+                "mean_avg_rating": round(df['avg_rating'].mean(), 2),
+                "max_avg_rating": round(df['avg_rating'].max(), 2),
+                "min_avg_rating": round(df['avg_rating'].min(), 2),
+                "median_avg_rating": round(df['avg_rating'].median(), 2),
+                "total_reviews": int(df['reviews_count'].sum()),
+                "mean_price": round(df['price'].mean(), 2)
+            }
+
+        return {'rows': frame_records(df), 'analytics_stats': finite_stats(analytics_stats)}
+
+    def top_rated_games(self, min_reviews=10, genre_name=None, min_price=None, max_price=None):
+        params = {'min_reviews': min_reviews, 'genre': genre_name, 'min_price': min_price, 'max_price': max_price}
+        rows = self._top_rated_games_rows(min_reviews, genre_name, min_price, max_price)
+        return self._run('top-rated-games', params, rows, self._top_rated_games_build)
+
+    async def atop_rated_games(self, min_reviews=10, genre_name=None, min_price=None, max_price=None):
+        params = {'min_reviews': min_reviews, 'genre': genre_name, 'min_price': min_price, 'max_price': max_price}
+        rows = self._top_rated_games_rows(min_reviews, genre_name, min_price, max_price)
+        return await self._arun('top-rated-games', params, rows, self._top_rated_games_build)
+
+    def _whales_genre_breakdown_rows(self, user_ids):
+        return self.repos.users.get_whales_genre_breakdown(list(user_ids)).values_list('spent_on_genre', 'genre_name')
+
+    def _whales_genre_breakdown_build(self, rows):
+        df = report_frame(rows, ['spent_on_genre', 'genre_name'], money=['spent_on_genre'])
+        return frame_records(df)
+
+    def whales_genre_breakdown(self, user_ids):
+        user_ids = tuple(user_ids)
+        if not user_ids:
+            return []
+        return self._run('whales-analysis', {'breakdown_user_ids': user_ids},
+                         self._whales_genre_breakdown_rows(user_ids), self._whales_genre_breakdown_build)
+
+    async def awhales_genre_breakdown(self, user_ids):
+        user_ids = tuple(user_ids)
+        if not user_ids:
+            return []
+        return await self._arun('whales-analysis', {'breakdown_user_ids': user_ids},
+                                self._whales_genre_breakdown_rows(user_ids), self._whales_genre_breakdown_build)
+
+    def _spending_rank_rows(self, year, top_n):
+        return self.repos.users.get_spending_rank(year=year).values_list(
+            'id', 'username', 'total_spent', 'orders_count'
+        )[:top_n]
+
+    def _spending_rank_frame(self, rows):
+        return report_frame(
+            rows,
+            ['id', 'username', 'total_spent', 'orders_count'],
+            money=['total_spent'],
+            integers=['id', 'orders_count'],
+        )
+
+    def _whales_payload(self, df_rank, genre_list):
+        analytics_stats = {}
+        if not df_rank.empty:
+            analytics_stats = {
+                "total_spending_top_n": round(df_rank['total_spent'].sum(), 2),
+                "avg_spending_per_user": round(df_rank['total_spent'].mean(), 2),
+                "total_orders_top_n": df_rank['orders_count'].sum(),
+            }
+
+        return {
+            'spending_rank': frame_records(df_rank),
+            'genre_breakdown': genre_list,
+            'analytics_stats': finite_stats(analytics_stats)
+        }
+
+    def whales_analysis(self, year=None, top_n=10, user_ids=None):
+        def compute():
+            df_rank = self._spending_rank_frame(list(self._spending_rank_rows(year, top_n)))
+            selected_user_ids = user_ids if user_ids else df_rank['id'].tolist()
+            return self._whales_payload(df_rank, self.whales_genre_breakdown(selected_user_ids))
+
+        params = {'year': year, 'top_n': top_n, 'user_ids': tuple(user_ids or ())}
+        return self._cached('whales-analysis', params, compute)
+
+    async def awhales_analysis(self, year=None, top_n=10, user_ids=None):
+        async def compute():
+            rows = await alist(self._spending_rank_rows(year, top_n))
+            df_rank = await offload(self._spending_rank_frame, rows)
+            selected_user_ids = user_ids if user_ids else df_rank['id'].tolist()
+            genre_list = await self.awhales_genre_breakdown(selected_user_ids)
+            return await offload(self._whales_payload, df_rank, genre_list)
+
+        params = {'year': year, 'top_n': top_n, 'user_ids': tuple(user_ids or ())}
+        return await self.cache.aget_or_compute('whales-analysis', params, compute)
+
+    def _user_activity_rows(self):
+        return self.repos.users.get_user_activity_report().values_list(
+            'id', 'username', 'games_owned', 'total_playtime', 'avg_playtime_per_game'
+        )
+
+    def user_activity_export_rows(self, min_playtime=None):
+        # Сирі рядки для потокового експорту: фільтр у SQL (HAVING), без pandas і кешу
+        rows = self.repos.users.get_user_activity_report()
+        if min_playtime:
+            rows = rows.filter(total_playtime__gte=min_playtime)
+        return rows
+
+    def _user_activity_build(self, rows, min_playtime, top_n):
+        df = report_frame(
+            rows,
+            ['id', 'username', 'games_owned', 'total_playtime', 'avg_playtime_per_game'],
+            floats=['avg_playtime_per_game'],
+            integers=['id', 'games_owned', 'total_playtime'],
+        )
+        analytics_stats = {}
+        correlation = None
+
+        if min_playtime is not None:
+            df = df[df['total_playtime'] >= min_playtime]
+
+        if not df.empty:
+            correlation = round(df['total_playtime'].corr(df['games_owned']), 4)
+
+            analytics_stats = {
+                "total_active_users": df.shape[0],
+                "mean_playtime": round(df['total_playtime'].mean(), 2),
+                "median_games_owned": round(df['games_owned'].median(), 0),
+                "p75_playtime": round(df['total_playtime'].quantile(0.75), 2),
+                "playtime_games_correlation": correlation
+            }
+
+            if top_n is not None:
+                df = df.nlargest(top_n, 'total_playtime')
+
+        return {'rows': frame_records(df), 'analytics_stats': finite_stats(analytics_stats),
+                'correlation': finite_stats({'value': correlation})['value']}
+
+    def user_activity(self, min_playtime=None, top_n=None):
+        def build(rows):
+            return self._user_activity_build(rows, min_playtime, top_n)
+
+        return self._run('user-activity', {'min_playtime': min_playtime, 'top_n': top_n},
+                         self._user_activity_rows(), build)
+
+    async def auser_activity(self, min_playtime=None, top_n=None):
+        def build(rows):
+            return self._user_activity_build(rows, min_playtime, top_n)
+
+        return await self._arun('user-activity', {'min_playtime': min_playtime, 'top_n': top_n},
+                                self._user_activity_rows(), build)
+
+
+report_service = ReportService(RepositoryManager(), report_cache)
@@ -1,24 +1,63 @@
+from functools import reduce
+from operator import or_
+
 from django.core.exceptions import ObjectDoesNotExist
+from django.db import connection, transaction
+from django.db.models import AutoField, Q
+
+from library_app.table_versions import table_versions
+
+BULK_BATCH_SIZE = 500
+
+_autoinc_steps = {}
+
+
+def _consecutive_autoinc_step():
+    # Крок id у межах одного багаторядкового INSERT, якщо MySQL гарантує послідовні значення
+    # (innodb_autoinc_lock_mode 0/1); None — гарантії немає (режим 2 за замовчуванням у MySQL 8)
+    if connection.vendor != 'mysql':
+        return None
+    if connection.alias not in _autoinc_steps:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT @@innodb_autoinc_lock_mode, @@auto_increment_increment')
+            lock_mode, increment = cursor.fetchone()
+        _autoinc_steps[connection.alias] = increment if int(lock_mode) in (0, 1) else None
+    return _autoinc_steps[connection.alias]
+
 
 class BaseRepository:
+    # Таблиці, з яких будуються ETag каталогу: кожен запис через репозиторій збільшує лічильник table_version
+    track_changes = False
+
     def __init__(self, model):
         self.model = model
 
-    def get_all(self):
-        return self.model.objects.all()
+    def touch(self):
+        if self.track_changes:
+            table_versions.bump(self.model._meta.db_table)
+
+    def apply_fetch_plan(self, queryset, fetch_plan=None):
+        if fetch_plan:
+            queryset = fetch_plan.apply(queryset)
+        return queryset
 
-    def get_by_id(self, pk):
+    def get_all(self, fetch_plan=None):
+        return self.apply_fetch_plan(self.model.objects.all(), fetch_plan)
+
+    def get_by_id(self, pk, fetch_plan=None):
         try:
-            return self.model.objects.get(pk=pk)
+            return self.apply_fetch_plan(self.model.objects.all(), fetch_plan).get(pk=pk)
         except ObjectDoesNotExist:
             return None
 
     def create(self, **kwargs):
         try:
-            return self.model.objects.create(**kwargs)
+            obj = self.model.objects.create(**kwargs)
         except Exception as e:
             print("Error creating object:", e)
             return None
+        self.touch()
+        return obj
 
     def update(self, pk, **kwargs):
         obj = self.get_by_id(pk)
@@ -26,13 +65,115 @@ class BaseRepository:
             for key, value in kwargs.items():
                 setattr(obj, key, value)
             obj.save()
+            self.touch()
         return obj
 
     def delete(self, pk):
         obj = self.get_by_id(pk)
         if obj:
             obj.delete()
+            self.touch()
             return True
         return False
 
+    def get_in_bulk(self, pks, fetch_plan=None):
+        return self.apply_fetch_plan(self.model.objects.all(), fetch_plan).in_bulk(list(pks))
+
+    def _pop_m2m(self, data):
+        return {
+            field.name: data.pop(field.name)
+            for field in self.model._meta.many_to_many
+            if field.name in data
+        }
+
+    def bulk_set_m2m(self, objs, m2m_values):
+        for obj, values in zip(objs, m2m_values):
+            for name, related in values.items():
+                getattr(obj, name).set(related)
+
+    def bulk_create(self, items):
+        items = [dict(item) for item in items]
+        m2m_values = [self._pop_m2m(item) for item in items]
+        objs = [self.model(**item) for item in items]
+
+        with transaction.atomic():
+            self._insert(objs)
+            self.bulk_set_m2m(objs, m2m_values)
+
+        if objs:
+            self.touch()
+        return objs
+
+    def _natural_key(self):
+        for fields in self.model._meta.unique_together:
+            return [self.model._meta.get_field(name).attname for name in fields]
+        for field in self.model._meta.concrete_fields:
+            if field.unique and not field.primary_key:
+                return [field.attname]
+        return None
+
+    def _insert(self, objs):
+        pk_field = self.model._meta.pk
+        if connection.features.can_return_rows_from_bulk_insert or all(obj.pk is not None for obj in objs):
+            self.model.objects.bulk_create(objs, batch_size=BULK_BATCH_SIZE)
+            return
+
+        # MySQL не повертає id з пакетного INSERT, а вони потрібні для M2M і відповіді
+        step = _consecutive_autoinc_step() if isinstance(pk_field, AutoField) else None
+        natural_key = self._natural_key()
+        if any(obj.pk is not None for obj in objs) or (step is None and natural_key is None):
+            for obj in objs:
+                obj.save(force_insert=True)
+            return
+
+        for start in range(0, len(objs), BULK_BATCH_SIZE):
+            batch = objs[start:start + BULK_BATCH_SIZE]
+            self.model.objects.bulk_create(batch, batch_size=len(batch))
+
+            if step is not None:
+                # LAST_INSERT_ID() — id першого рядка останнього INSERT цього з'єднання
+                with connection.cursor() as cursor:
+                    cursor.execute('SELECT LAST_INSERT_ID()')
+                    first_id = cursor.fetchone()[0]
+                for offset, obj in enumerate(batch):
+                    obj.pk = first_id + offset * step
+                continue
+
+            keys = {tuple(getattr(obj, name) for name in natural_key): obj for obj in batch}
+            condition = reduce(or_, (Q(**dict(zip(natural_key, key))) for key in keys))
+            for row in self.model.objects.filter(condition).values_list(pk_field.attname, *natural_key):
+                obj = keys.get(tuple(row[1:]))
+                if obj is not None:
+                    obj.pk = row[0]
+
+    def bulk_update(self, changes):
+        objs = []
+        m2m_values = []
+        fields = set()
+
+        for obj, data in changes:
+            data = dict(data)
+            m2m_values.append(self._pop_m2m(data))
+            for key, value in data.items():
+                setattr(obj, key, value)
+                fields.add(key)
+            objs.append(obj)
+
+        with transaction.atomic():
+            if fields:
+                self.model.objects.bulk_update(objs, sorted(fields), batch_size=BULK_BATCH_SIZE)
+            self.bulk_set_m2m(objs, m2m_values)
+
+        if objs:
+            self.touch()
+        return objs
+
+    def bulk_delete(self, pks):
+        with transaction.atomic():
+            queryset = self.model.objects.filter(pk__in=list(pks))
+            existing = set(queryset.values_list('pk', flat=True))
+            queryset.delete()
 
+        if existing:
+            self.touch()
+        return existing
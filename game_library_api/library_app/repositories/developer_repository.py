@@ -5,6 +5,8 @@ from library_app.repositories.base_repository import BaseRepository
 from library_app.models import Developer
 
 class DeveloperRepository(BaseRepository):
+    track_changes = True
+
     def __init__(self):
         super().__init__(Developer)
 
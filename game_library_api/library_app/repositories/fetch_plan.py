@@ -0,0 +1,161 @@
+from django.db.models import Prefetch
+from rest_framework.relations import ManyRelatedField, RelatedField
+from rest_framework.serializers import BaseSerializer, ListSerializer
+
+
+class FetchPlan:
+    _serializer_cache = {}
+
+    def __init__(self, select_related=(), prefetch_related=(), only=()):
+        self.select_related = set(select_related)
+        # шлях -> queryset для Prefetch (None, якщо достатньо звичайного prefetch_related)
+        self.prefetch_related = {}
+        for lookup in prefetch_related:
+            if isinstance(lookup, Prefetch):
+                self.prefetch_related[lookup.prefetch_through] = lookup.queryset
+            else:
+                self.prefetch_related.setdefault(lookup, None)
+        self.only = list(only)
+
+    def __bool__(self):
+        return bool(self.select_related or self.prefetch_related or self.only)
+
+    def merge(self, other, prefix=None):
+        def full(path):
+            return f'{prefix}__{path}' if prefix else path
+
+        self.select_related.update(full(path) for path in other.select_related)
+        for path, queryset in other.prefetch_related.items():
+            if queryset is not None or full(path) not in self.prefetch_related:
+                self.prefetch_related[full(path)] = queryset
+        self.only.extend(full(name) for name in other.only)
+        return self
+
+    def apply(self, queryset):
+        if self.select_related:
+            queryset = queryset.select_related(*sorted(self.select_related))
+        if self.prefetch_related:
+            lookups = [
+                Prefetch(path, queryset=inner) if inner is not None else path
+                for path, inner in sorted(self.prefetch_related.items())
+            ]
+            queryset = queryset.prefetch_related(*lookups)
+        if self.only:
+            queryset = queryset.only(*self.only)
+        return queryset
+
+    @classmethod
+    def for_serializer(cls, serializer_class):
+        if serializer_class not in cls._serializer_cache:
+            cls._serializer_cache[serializer_class] = cls.from_serializer(serializer_class())
+        return cls._serializer_cache[serializer_class]
+
+    @classmethod
+    def from_serializer(cls, serializer, model=None, columns=False):
+        # columns=True додатково обмежує SELECT колонками, які читають поля серіалізатора (для ?fields=)
+        model = model or serializer.Meta.model
+        plan = cls()
+        if columns:
+            plan.only.append(model._meta.pk.name)
+
+        for field in serializer.fields.values():
+            if field.write_only or not field.source_attrs:
+                continue
+
+            nested = None
+            if isinstance(field, ListSerializer):
+                nested = field.child
+            elif isinstance(field, BaseSerializer):
+                nested = field
+
+            if isinstance(field, RelatedField) and field.use_pk_only_optimization() and len(field.source_attrs) == 1:
+                if columns:
+                    plan.only.append(field.source_attrs[0])
+                continue
+
+            chain = _relation_chain(model, field.source_attrs)
+            if not chain:
+                if columns and _is_column(model, field.source_attrs[0]):
+                    plan.only.append(field.source_attrs[0])
+                continue
+
+            needs_target = nested is not None or isinstance(field, (RelatedField, ManyRelatedField))
+            if not needs_target and len(chain) == len(field.source_attrs):
+                # Останній атрибут сам є зв'язком, але серіалізується як скаляр (напр. *_id)
+                chain = chain[:-1]
+                if not chain:
+                    if columns:
+                        plan.only.append(field.source_attrs[0])
+                    continue
+
+            tail = field.source_attrs[len(chain)] if len(field.source_attrs) > len(chain) else None
+            plan.merge(_plan_for_chain(chain, nested, cls, columns, tail))
+
+        return plan
+
+
+def _relation(model, attr):
+    for field in model._meta.get_fields():
+        if not field.is_relation:
+            continue
+        name = field.get_accessor_name() if field.auto_created and not field.concrete else field.name
+        if name == attr:
+            return field
+    return None
+
+
+def _is_column(model, attr):
+    return any(field.name == attr or field.attname == attr for field in model._meta.concrete_fields)
+
+
+def _relation_chain(model, attrs):
+    chain = []
+    current = model
+    for attr in attrs:
+        field = _relation(current, attr)
+        if field is None:
+            break
+        chain.append((attr, field))
+        current = field.related_model
+    return chain
+
+
+def _plan_for_chain(chain, nested, plan_cls, columns=False, tail=None):
+    plan = plan_cls()
+    target_model = chain[-1][1].related_model
+
+    for index, (attr, field) in enumerate(chain):
+        if field.many_to_many or field.one_to_many:
+            path = '__'.join(name for name, _ in chain[:index + 1])
+            if index:
+                plan.select_related.add('__'.join(name for name, _ in chain[:index]))
+
+            inner = plan_cls()
+            if index + 1 < len(chain):
+                inner.merge(_plan_for_chain(chain[index + 1:], nested, plan_cls, columns, tail))
+            elif nested is not None:
+                inner.merge(plan_cls.from_serializer(nested, target_model, columns))
+
+            if inner.only:
+                # Prefetch зіставляє рядки з батьками за pk і зворотним FK — вони мають лишитися у SELECT
+                inner.only.append(field.related_model._meta.pk.name)
+                if field.one_to_many:
+                    inner.only.append(field.field.name)
+
+            queryset = inner.apply(field.related_model._default_manager.all()) if inner else None
+            plan.prefetch_related[path] = queryset
+            return plan
+
+        if columns:
+            plan.only.append('__'.join(name for name, _ in chain[:index + 1]))
+
+    path = '__'.join(name for name, _ in chain)
+    plan.select_related.add(path)
+    if nested is not None:
+        plan.merge(plan_cls.from_serializer(nested, target_model, columns), prefix=path)
+    elif columns and tail and _is_column(target_model, tail):
+        plan.only.append(f'{path}__{tail}')
+    elif columns:
+        # Поле серіалізує весь пов'язаний об'єкт (напр. через __str__) — не звужуємо його колонки
+        plan.only.extend(f'{path}__{related.name}' for related in target_model._meta.concrete_fields)
+    return plan
@@ -3,6 +3,8 @@ from library_app.repositories.base_repository import BaseRepository
 
 
 class GameGenreRepository(BaseRepository):
+    track_changes = True
+
     def __init__(self):
         super().__init__(GameGenre)
 
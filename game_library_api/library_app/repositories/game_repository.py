@@ -1,52 +1,218 @@
-from django.db.models import Avg, Count
+from django.db import transaction
+from django.db.models import Count, Sum, Q, F, Case, When, Value, FloatField
+from django.db.models.functions import Cast
 
-from library_app.models import Game, GameGenre, LibraryGame
+from library_app.models import Game, GameGenre, LibraryGame, Review
 from library_app.repositories.base_repository import BaseRepository
+from library_app.table_versions import table_versions
+
+RATING_HISTOGRAM_FIELDS = [f'rating_{rating}_count' for rating in range(1, 6)]
+RATING_AGGREGATE_FIELDS = ['rating_sum', 'rating_count'] + RATING_HISTOGRAM_FIELDS
+GENRE_SYNC_CHUNK = 1000
+CATALOG_ORDERING_FIELDS = ('game_id', 'title', 'price', 'release_date', 'rating_avg')
+
+
+def _chunks(values, size=GENRE_SYNC_CHUNK):
+    values = list(values)
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def _genre_id(genre_item):
+    return genre_item.pk if hasattr(genre_item, 'pk') else int(genre_item)
 
 
 class GameRepository(BaseRepository):
+    track_changes = True
+
     def __init__(self):
         super().__init__(Game)
 
     def create(self, **kwargs):
         genres = kwargs.pop('genre', [])
 
-        game_obj = super().create(**kwargs)
+        with transaction.atomic():
+            game_obj = super().create(**kwargs)
 
-        if genres:
-            for genre_item in genres:
-                GameGenre.objects.create(game=game_obj, genre=genre_item)
+            if game_obj and genres:
+                self.sync_genres({game_obj.pk: genres}, is_new=True)
 
         return game_obj
 
     def update(self, pk, **kwargs):
         genres = kwargs.pop('genre', None)
 
-        game_obj = super().update(pk, **kwargs)
+        with transaction.atomic():
+            game_obj = super().update(pk, **kwargs)
 
-        if genres is not None:
-            GameGenre.objects.filter(game=game_obj).delete()
-            for genre_item in genres:
-                GameGenre.objects.create(game=game_obj, genre=genre_item)
+            if game_obj and genres is not None:
+                self.sync_genres({game_obj.pk: genres})
 
         return game_obj
 
+    def bulk_set_m2m(self, objs, m2m_values):
+        genres_by_game = {
+            game_obj.pk: values['genre']
+            for game_obj, values in zip(objs, m2m_values)
+            if 'genre' in values
+        }
+        if genres_by_game:
+            self.sync_genres(genres_by_game)
+
+    def sync_genres(self, genres_by_game, is_new=False):
+        # Приводить game_genre до заданих наборів жанрів: один DELETE на зайві зв'язки і один INSERT на нові
+        wanted = {
+            game_id: {_genre_id(genre_item) for genre_item in genres}
+            for game_id, genres in genres_by_game.items()
+        }
+
+        current = {game_id: {} for game_id in wanted}
+        if not is_new:
+            for game_ids in _chunks(wanted):
+                rows = GameGenre.objects.filter(game_id__in=game_ids).values_list('id', 'game_id', 'genre_id')
+                for link_id, game_id, genre_id in rows:
+                    current[game_id][genre_id] = link_id
+
+        stale_ids = [
+            link_id
+            for game_id, links in current.items()
+            for genre_id, link_id in links.items()
+            if genre_id not in wanted[game_id]
+        ]
+        new_links = [
+            GameGenre(game_id=game_id, genre_id=genre_id)
+            for game_id, genre_ids in wanted.items()
+            for genre_id in genre_ids
+            if genre_id not in current[game_id]
+        ]
+
+        with transaction.atomic():
+            for link_ids in _chunks(stale_ids):
+                GameGenre.objects.filter(id__in=link_ids).delete()
+            GameGenre.objects.bulk_create(new_links, batch_size=500)
+
+        if stale_ids or new_links:
+            table_versions.bump(GameGenre._meta.db_table)
+        return {'added': len(new_links), 'removed': len(stale_ids)}
+
+    def retag_games(self, game_ids, add=(), remove=()):
+        game_ids = list(set(game_ids))
+        add = {_genre_id(genre_item) for genre_item in add}
+        remove = {_genre_id(genre_item) for genre_item in remove} - add
+
+        added = removed = 0
+        with transaction.atomic():
+            for chunk in _chunks(game_ids):
+                if remove:
+                    removed += GameGenre.objects.filter(game_id__in=chunk, genre_id__in=remove).delete()[0]
+
+                if add:
+                    existing = set(
+                        GameGenre.objects
+                        .filter(game_id__in=chunk, genre_id__in=add)
+                        .values_list('game_id', 'genre_id')
+                    )
+                    new_links = [
+                        GameGenre(game_id=game_id, genre_id=genre_id)
+                        for game_id in chunk
+                        for genre_id in add
+                        if (game_id, genre_id) not in existing
+                    ]
+                    GameGenre.objects.bulk_create(new_links, batch_size=500)
+                    added += len(new_links)
+
+        if added or removed:
+            table_versions.bump(GameGenre._meta.db_table)
+        return {'games': len(game_ids), 'added': added, 'removed': removed}
+
     def check_if_user_owns_game(self, user_id: int, game_id: int) -> bool:
-        try:
-            return LibraryGame.objects.filter(
-                library__user_id=user_id,
-                game_id=game_id
-            ).exists()
-        except Exception as e:
-            print(f"Помилка при перевірці володіння: {e}")
-            return False
+        # Один EXISTS по унікальному індексу (library_id, game_id) — без завантаження бібліотеки
+        return LibraryGame.objects.filter(
+            library__user_id=user_id,
+            game_id=game_id
+        ).exists()
+
+    def shift_rating(self, game_id, rating, delta):
+        histogram_field = f'rating_{rating}_count'
+        games = self.model.objects.filter(pk=game_id)
+
+        games.update(
+            rating_sum=F('rating_sum') + rating * delta,
+            rating_count=F('rating_count') + delta,
+            **{histogram_field: F(histogram_field) + delta}
+        )
+        # Окремим UPDATE, бо порядок обчислення SET відрізняється між MySQL і PostgreSQL
+        games.update(
+            rating_avg=Case(
+                When(rating_count=0, then=Value(None)),
+                default=Cast('rating_sum', FloatField()) / Cast('rating_count', FloatField()),
+                output_field=FloatField()
+            )
+        )
+
+    def reconcile_rating_aggregates(self, dry_run=False, game_ids=None):
+        reviews = Review.objects.all()
+        games = self.model.objects.only('game_id', 'rating_avg', *RATING_AGGREGATE_FIELDS)
+        if game_ids is not None:
+            reviews = reviews.filter(game_id__in=game_ids)
+            games = games.filter(game_id__in=game_ids)
+
+        stats = {
+            row['game_id']: row
+            for row in reviews.values('game_id').annotate(
+                rating_sum=Sum('rating'),
+                rating_count=Count('review_id'),
+                **{
+                    f'rating_{rating}_count': Count('review_id', filter=Q(rating=rating))
+                    for rating in range(1, 6)
+                }
+            )
+        }
+
+        drifted = []
+        for game in games.iterator(chunk_size=2000):
+            row = stats.get(game.game_id, {})
+            expected = {field: row.get(field) or 0 for field in RATING_AGGREGATE_FIELDS}
+
+            if any(getattr(game, field) != value for field, value in expected.items()):
+                for field, value in expected.items():
+                    setattr(game, field, value)
+                game.rating_avg = game.rating_sum / game.rating_count if game.rating_count else None
+                drifted.append(game)
+
+        if drifted and not dry_run:
+            self.model.objects.bulk_update(drifted, ['rating_avg'] + RATING_AGGREGATE_FIELDS, batch_size=500)
+
+        return drifted
+
+    def search_catalog(self, search=None, genre=None, min_price=None, max_price=None, ordering=None, fetch_plan=None):
+        queryset = self.model.objects.all()
+
+        if search:
+            queryset = queryset.filter(title__icontains=search)
+        if genre:
+            if str(genre).isdigit():
+                queryset = queryset.filter(genre__genre_id=int(genre))
+            else:
+                queryset = queryset.filter(genre__name__iexact=genre)
+        if min_price is not None:
+            queryset = queryset.filter(price__gte=min_price)
+        if max_price is not None:
+            queryset = queryset.filter(price__lte=max_price)
+
+        # pk другим ключем: сторінки не перетинаються, навіть якщо значення сортування однакові
+        order_fields = ['game_id']
+        if ordering and ordering.lstrip('-') in CATALOG_ORDERING_FIELDS:
+            order_fields = [ordering, '-game_id' if ordering.startswith('-') else 'game_id']
+
+        return self.apply_fetch_plan(queryset.order_by(*order_fields), fetch_plan)
 
     def get_top_rated_games_report(self, min_reviews=10, genre_name=None, min_price=None, max_price=None):
-        queryset = self.model.objects.annotate(
-            avg_rating=Avg('review__rating'),
-            reviews_count=Count('review__review_id')
-        ).filter(
-            reviews_count__gte=min_reviews
+        queryset = self.model.objects.filter(
+            rating_count__gte=min_reviews
+        ).annotate(
+            avg_rating=F('rating_avg'),
+            reviews_count=F('rating_count')
         )
 
         if genre_name:
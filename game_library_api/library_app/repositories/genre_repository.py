@@ -5,6 +5,8 @@ from library_app.repositories.base_repository import BaseRepository
 
 
 class GenreRepository(BaseRepository):
+    track_changes = True
+
     def __init__(self):
         super().__init__(Genre)
 
@@ -0,0 +1,49 @@
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from library_app.models import IdempotencyKey
+from library_app.repositories.base_repository import BaseRepository
+
+
+class IdempotencyRepository(BaseRepository):
+    def __init__(self):
+        super().__init__(IdempotencyKey)
+
+    def claim(self, scope, owner, key, request_hash, ttl, pending_timeout):
+        now = timezone.now()
+        try:
+            with transaction.atomic():
+                record = self.model.objects.create(
+                    scope=scope,
+                    owner=owner,
+                    key=key,
+                    request_hash=request_hash,
+                    created_at=now,
+                    expires_at=now + timedelta(seconds=ttl),
+                )
+            return record, True
+        except IntegrityError:
+            pass
+
+        record = self.model.objects.filter(scope=scope, owner=owner, key=key).first()
+        if record is None or record.expires_at <= now:
+            # Ключ прострочений (або щойно видалений) — звільняємо його і пробуємо зайняти знову
+            self.model.objects.filter(scope=scope, owner=owner, key=key, expires_at__lte=now).delete()
+            return self.claim(scope, owner, key, request_hash, ttl, pending_timeout)
+        if record.status_code is None and record.created_at <= now - timedelta(seconds=pending_timeout):
+            # Процес, що зайняв ключ, так і не завершив запит (падіння воркера) — ключ можна забрати.
+            # Умова на status_code у DELETE не дає видалити запис, який саме зараз завершився
+            self.model.objects.filter(pk=record.pk, status_code__isnull=True).delete()
+            return self.claim(scope, owner, key, request_hash, ttl, pending_timeout)
+        return record, False
+
+    def complete(self, record, status_code, response_body):
+        self.model.objects.filter(pk=record.pk).update(status_code=status_code, response_body=response_body)
+
+    def release(self, record):
+        self.model.objects.filter(pk=record.pk).delete()
+
+    def purge_expired(self):
+        return self.model.objects.filter(expires_at__lte=timezone.now()).delete()[0]
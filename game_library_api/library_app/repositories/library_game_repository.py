@@ -3,18 +3,20 @@ from library_app.repositories.base_repository import BaseRepository
 from django.db.models import Count
 
 class LibraryGameRepository(BaseRepository):
+    track_changes = True
+
     def __init__(self):
         super().__init__(LibraryGame)
 
     def get_owned_game_ids_by_user(self, user_id):
-        owned_ids = LibraryGame.objects.filter(
+        owned_ids = self.model.objects.filter(
             library__user_id=user_id
         ).values_list('game_id', flat=True)
 
         return set(owned_ids)
 
-    def get_all_by_library_id(self, library_id):
-        return self.model.objects.filter(library_id=library_id)
+    def get_all_by_library_id(self, library_id, fetch_plan=None):
+        return self.apply_fetch_plan(self.model.objects.filter(library_id=library_id), fetch_plan)
 
     def is_game_in_library(self, library_id, game_id):
         return self.model.objects.filter(
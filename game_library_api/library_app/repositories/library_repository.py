@@ -6,10 +6,12 @@ from django.contrib.auth import get_user_model
 UserModel = get_user_model()
 
 class LibraryRepository(BaseRepository):
+    track_changes = True
+
     def __init__(self):
         super().__init__(Library)
 
-    def get_by_user(self, user):
+    def get_by_user(self, user, fetch_plan=None):
         if isinstance(user, UserModel):
             user_pk = user.pk
         elif isinstance(user, int) or str(user).isdigit():
@@ -18,6 +20,6 @@ class LibraryRepository(BaseRepository):
             return None
 
         try:
-            return self.model.objects.get(user_id=user_pk)
+            return self.apply_fetch_plan(self.model.objects.all(), fetch_plan).get(user_id=user_pk)
         except ObjectDoesNotExist:
             return None
\ No newline at end of file
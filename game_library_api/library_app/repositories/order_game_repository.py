@@ -6,5 +6,5 @@ class OrderGameRepository(BaseRepository):
     def __init__(self):
         super().__init__(OrderGame)
 
-    def get_all_by_order_id(self, order_id):
-        return self.model.objects.filter(order_id=order_id)
+    def get_all_by_order_id(self, order_id, fetch_plan=None):
+        return self.apply_fetch_plan(self.model.objects.filter(order_id=order_id), fetch_plan)
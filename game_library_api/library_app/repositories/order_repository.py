@@ -1,49 +1,135 @@
-from datetime import datetime, timedelta
+from datetime import datetime, time, timedelta
+from decimal import Decimal
 
-from django.db.models.functions import ExtractYear, ExtractMonth, Coalesce
+from django.db import transaction
 from django.utils import timezone
 
 from library_app.models import Order
 from library_app.repositories.base_repository import BaseRepository
-from django.db.models import Sum, Count, DecimalField
+from library_app.repositories.revenue_repository import RevenueRepository
+from django.db.models import Sum
 
 
 class OrderRepository(BaseRepository):
     def __init__(self):
         super().__init__(Order)
+        self.revenue = RevenueRepository()
 
-    def get_all_by_user_id(self, user_id):
-        return self.model.objects.filter(user_id=user_id)
+    # Записи замовлень через API одразу переносять свій внесок у revenue_daily,
+    # інакше закриті дні звіту розійдуться з замовленнями до backfill_revenue_rollup
+    def _lock(self, pks):
+        return list(
+            self.model.objects.select_for_update()
+            .filter(pk__in=list(pks))
+            .only('order_id', 'status', 'created_at', 'total_amount')
+        )
 
-    def get_monthly_revenue_report(self, start_date_str=None, end_date_str=None):
-        queryset = self.model.objects.filter(status='complete')
+    def create(self, **kwargs):
+        with transaction.atomic():
+            order = super().create(**kwargs)
+            if order:
+                self.revenue.record_order(order)
+        return order
+
+    def update(self, pk, **kwargs):
+        with transaction.atomic():
+            previous = self._lock([pk])
+            order = super().update(pk, **kwargs)
+            if order:
+                self.revenue.apply_orders(previous, sign=-1)
+                self.revenue.record_order(order)
+        return order
+
+    def delete(self, pk):
+        with transaction.atomic():
+            previous = self._lock([pk])
+            deleted = super().delete(pk)
+            if deleted:
+                self.revenue.apply_orders(previous, sign=-1)
+        return deleted
+
+    def bulk_create(self, items):
+        with transaction.atomic():
+            orders = super().bulk_create(items)
+            self.revenue.apply_orders(orders)
+        return orders
+
+    def bulk_update(self, changes):
+        with transaction.atomic():
+            previous = self._lock(order.pk for order, _ in changes)
+            orders = super().bulk_update(changes)
+            self.revenue.apply_orders(previous, sign=-1)
+            self.revenue.apply_orders(orders)
+        return orders
+
+    def bulk_delete(self, pks):
+        with transaction.atomic():
+            previous = self._lock(pks)
+            deleted = super().bulk_delete(pks)
+            self.revenue.apply_orders([order for order in previous if order.pk in deleted], sign=-1)
+        return deleted
+
+    def get_all_by_user_id(self, user_id, fetch_plan=None):
+        return self.apply_fetch_plan(self.model.objects.filter(user_id=user_id), fetch_plan)
+
+    def get_open_bucket_queryset(self):
+        today_start = timezone.make_aware(datetime.combine(timezone.localdate(), time.min))
+        return self.model.objects.filter(
+            status='complete',
+            created_at__gte=today_start,
+            created_at__lt=today_start + timedelta(days=1),
+        )
+
+    def _monthly_revenue_window(self, start_date_str, end_date_str):
+        start_day = end_day = None
 
         if start_date_str and end_date_str:
             try:
-                naive_start = datetime.strptime(start_date_str, '%Y-%m-%d').date()
-                naive_end = datetime.strptime(end_date_str, '%Y-%m-%d').date()
-
-                queryset = queryset.filter(
-                    created_at__date__gte=naive_start,
-                    created_at__date__lte=naive_end,
-                )
+                start_day = datetime.strptime(start_date_str, '%Y-%m-%d').date()
+                end_day = datetime.strptime(end_date_str, '%Y-%m-%d').date()
             except ValueError:
-                pass
-
-        return(
-            queryset
-            .annotate(
-                order_year = ExtractYear('created_at'),
-                order_month = ExtractMonth('created_at')
-            )
-            .values('order_year', 'order_month')
-            .annotate(
-                total_revenue=Coalesce(
-                    Sum('total_amount'),
-                    0.0,
-                    output_field=DecimalField(max_digits=10, decimal_places=2)
-                )
-            )
-            .order_by('order_year', 'order_month')
-        )
+                start_day = end_day = None
+
+        today = timezone.localdate()
+
+        # Закриті дні читаються з revenue_daily, сирі замовлення скануються лише за сьогодні
+        closed_end = today - timedelta(days=1)
+        if end_day and end_day < closed_end:
+            closed_end = end_day
+
+        include_today = (not start_day or start_day <= today) and (not end_day or end_day >= today)
+        return start_day, closed_end, include_today, today
+
+    def _merge_monthly_revenue(self, closed_rows, open_revenue, today):
+        totals = {}
+        for row in closed_rows:
+            totals[(row['order_year'], row['order_month'])] = row['month_revenue']
+
+        if open_revenue:
+            key = (today.year, today.month)
+            totals[key] = totals.get(key, Decimal('0.00')) + open_revenue
+
+        return [
+            {'order_year': year, 'order_month': month, 'total_revenue': total}
+            for (year, month), total in sorted(totals.items())
+        ]
+
+    def get_monthly_revenue_report(self, start_date_str=None, end_date_str=None):
+        start_day, closed_end, include_today, today = self._monthly_revenue_window(start_date_str, end_date_str)
+
+        closed_rows = list(self.revenue.get_monthly_totals(start_day, closed_end))
+        open_revenue = None
+        if include_today:
+            open_revenue = self.get_open_bucket_queryset().aggregate(total=Sum('total_amount'))['total']
+
+        return self._merge_monthly_revenue(closed_rows, open_revenue, today)
+
+    async def aget_monthly_revenue_report(self, start_date_str=None, end_date_str=None):
+        start_day, closed_end, include_today, today = self._monthly_revenue_window(start_date_str, end_date_str)
+
+        closed_rows = [row async for row in self.revenue.get_monthly_totals(start_day, closed_end)]
+        open_revenue = None
+        if include_today:
+            open_revenue = (await self.get_open_bucket_queryset().aaggregate(total=Sum('total_amount')))['total']
 
+        return self._merge_monthly_revenue(closed_rows, open_revenue, today)
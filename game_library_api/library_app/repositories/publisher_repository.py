@@ -2,5 +2,7 @@ from library_app.repositories.base_repository import BaseRepository
 from library_app.models import Publisher
 
 class PublisherRepository(BaseRepository):
+    track_changes = True
+
     def __init__(self):
         super().__init__(Publisher)
\ No newline at end of file
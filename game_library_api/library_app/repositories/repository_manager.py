@@ -9,6 +9,7 @@ from .order_game_repository import OrderGameRepository
 from .developer_repository import DeveloperRepository
 from .publisher_repository import PublisherRepository
 from .genre_repository import GenreRepository
+from .revenue_repository import RevenueRepository
 
 
 class RepositoryManager:
@@ -23,4 +24,5 @@ class RepositoryManager:
         self.publishers = PublisherRepository()
         self.genres = GenreRepository()
         self.game_genres = GameGenreRepository()
-        self.reviews = ReviewRepository()
\ No newline at end of file
+        self.reviews = ReviewRepository()
+        self.revenue = RevenueRepository()
\ No newline at end of file
@@ -0,0 +1,95 @@
+from datetime import datetime, time
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Sum, Count, F
+from django.db.models.functions import ExtractYear, ExtractMonth, TruncDate
+from django.utils import timezone
+
+from library_app.models import DailyRevenue, Order
+from library_app.repositories.base_repository import BaseRepository
+
+
+class RevenueRepository(BaseRepository):
+    def __init__(self):
+        super().__init__(DailyRevenue)
+
+    def _apply_delta(self, day, revenue, count):
+        increment = {
+            'total_revenue': F('total_revenue') + revenue,
+            'orders_count': F('orders_count') + count,
+        }
+
+        if self.model.objects.filter(day=day).update(**increment):
+            return
+        if count < 0:
+            # Дня ще немає у rollup (не перебудовано) — нема з чого віднімати
+            return
+
+        try:
+            with transaction.atomic():
+                self.model.objects.create(day=day, total_revenue=revenue, orders_count=count)
+        except IntegrityError:
+            # Рядок за цей день щойно створила паралельна покупка
+            self.model.objects.filter(day=day).update(**increment)
+
+    def apply_orders(self, orders, sign=1):
+        # sign=1 додає завершені замовлення до їхніх днів, sign=-1 — прибирає (зміна статусу, видалення)
+        deltas = {}
+        for order in orders:
+            if order.status != 'complete':
+                continue
+            day = timezone.localdate(order.created_at)
+            revenue, count = deltas.get(day, (Decimal('0.00'), 0))
+            deltas[day] = (revenue + sign * Decimal(order.total_amount), count + sign)
+
+        # Дні по порядку: паралельні записи блокують рядки rollup в одній послідовності
+        for day, (revenue, count) in sorted(deltas.items()):
+            self._apply_delta(day, revenue, count)
+
+    def record_order(self, order):
+        self.apply_orders([order])
+
+    def reverse_order(self, order):
+        self.apply_orders([order], sign=-1)
+
+    def get_monthly_totals(self, start_day=None, end_day=None):
+        queryset = self.model.objects.all()
+        if start_day:
+            queryset = queryset.filter(day__gte=start_day)
+        if end_day:
+            queryset = queryset.filter(day__lte=end_day)
+
+        return (
+            queryset
+            .annotate(
+                order_year=ExtractYear('day'),
+                order_month=ExtractMonth('day')
+            )
+            .values('order_year', 'order_month')
+            .annotate(month_revenue=Sum('total_revenue'))
+            .order_by('order_year', 'order_month')
+        )
+
+    def rebuild(self, since=None):
+        orders = Order.objects.filter(status='complete')
+        rollup = self.model.objects.all()
+
+        if since:
+            orders = orders.filter(created_at__gte=timezone.make_aware(datetime.combine(since, time.min)))
+            rollup = rollup.filter(day__gte=since)
+
+        rows = (
+            orders
+            .annotate(day=TruncDate('created_at'))
+            .values('day')
+            .annotate(revenue=Sum('total_amount'), orders=Count('order_id'))
+        )
+
+        with transaction.atomic():
+            rollup.delete()
+            created = self.model.objects.bulk_create(
+                [self.model(day=row['day'], total_revenue=row['revenue'], orders_count=row['orders']) for row in rows],
+                batch_size=1000,
+            )
+        return len(created)
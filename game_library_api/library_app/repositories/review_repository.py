@@ -1,12 +1,69 @@
-from django.db.models import Avg, Count, F, ExpressionWrapper, FloatField
+from django.db import transaction
 
 from library_app.models import Review
 from library_app.repositories.base_repository import BaseRepository
+from library_app.repositories.game_repository import GameRepository
 
 
 class ReviewRepository(BaseRepository):
     def __init__(self):
         super().__init__(Review)
+        self.games = GameRepository()
 
-    def get_reviews_by_game(self,game_id):
-        return self.model.objects.filter(game_id=game_id)
+    def get_reviews_by_game(self,game_id, fetch_plan=None):
+        return self.apply_fetch_plan(self.model.objects.filter(game_id=game_id), fetch_plan)
+
+    def create(self, **kwargs):
+        with transaction.atomic():
+            review = super().create(**kwargs)
+            if review:
+                self.games.shift_rating(review.game_id, review.rating, 1)
+        return review
+
+    def update(self, pk, **kwargs):
+        with transaction.atomic():
+            review = self.model.objects.select_for_update().filter(pk=pk).first()
+            if not review:
+                return None
+
+            old_game_id, old_rating = review.game_id, review.rating
+            for key, value in kwargs.items():
+                setattr(review, key, value)
+            review.save()
+
+            if (old_game_id, old_rating) != (review.game_id, review.rating):
+                self.games.shift_rating(old_game_id, old_rating, -1)
+                self.games.shift_rating(review.game_id, review.rating, 1)
+        return review
+
+    def delete(self, pk):
+        with transaction.atomic():
+            review = self.model.objects.select_for_update().filter(pk=pk).first()
+            if not review:
+                return False
+
+            review.delete()
+            self.games.shift_rating(review.game_id, review.rating, -1)
+        return True
+
+    # Пакетні операції перераховують агрегати зачеплених ігор одним проходом замість shift_rating на кожен рядок
+    def bulk_create(self, items):
+        with transaction.atomic():
+            reviews = super().bulk_create(items)
+            self.games.reconcile_rating_aggregates(game_ids={review.game_id for review in reviews})
+        return reviews
+
+    def bulk_update(self, changes):
+        with transaction.atomic():
+            game_ids = {review.game_id for review, _ in changes}
+            reviews = super().bulk_update(changes)
+            game_ids.update(review.game_id for review in reviews)
+            self.games.reconcile_rating_aggregates(game_ids=game_ids)
+        return reviews
+
+    def bulk_delete(self, pks):
+        with transaction.atomic():
+            game_ids = set(self.model.objects.filter(pk__in=list(pks)).values_list('game_id', flat=True))
+            deleted = super().bulk_delete(pks)
+            self.games.reconcile_rating_aggregates(game_ids=game_ids)
+        return deleted
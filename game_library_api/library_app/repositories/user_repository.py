@@ -1,19 +1,172 @@
-from django.db.models import Count, Sum, F, FloatField, ExpressionWrapper, DecimalField, Q
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, Sum, F, FloatField, ExpressionWrapper, DecimalField, Q, Value
 from django.db.models.functions import Coalesce
 
-from library_app.repositories.base_repository import BaseRepository
+from library_app.models import BalanceLedger
+from library_app.repositories.base_repository import BaseRepository, BULK_BATCH_SIZE
 from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
 
 UserModel = get_user_model()
 
 
+def _hash_password(data):
+    # Репозиторій пише модель напряму, минаючи create_user/set_password, тож пароль хешується тут
+    data = dict(data)
+    if data.get('password'):
+        data['password'] = make_password(data['password'])
+    return data
+
+
 class UserRepository(BaseRepository):
     def __init__(self):
         super().__init__(UserModel)
 
+    def create(self, **kwargs):
+        kwargs = _hash_password(kwargs)
+        with transaction.atomic():
+            user = super().create(**kwargs)
+            if user and user.balance:
+                BalanceLedger.objects.create(user=user, amount=user.balance, balance_after=user.balance, kind='opening')
+        return user
+
+    def update(self, pk, **kwargs):
+        kwargs = _hash_password(kwargs)
+        balance = kwargs.pop('balance', None)
+
+        with transaction.atomic():
+            user = self.get_by_id(pk)
+            if not user:
+                return None
+
+            if kwargs:
+                for key, value in kwargs.items():
+                    setattr(user, key, value)
+                # Лише змінені колонки: повний save перезаписав би баланс, списаний паралельною покупкою
+                user.save(update_fields=list(kwargs))
+
+            if balance is not None:
+                user.balance = self.set_balance(user.pk, balance)
+
+        return user
+
+    def bulk_create(self, items):
+        with transaction.atomic():
+            users = super().bulk_create([_hash_password(item) for item in items])
+            # Як і create: стартовий баланс має запис 'opening', інакше журнал не зійдеться з balance
+            BalanceLedger.objects.bulk_create(
+                [
+                    BalanceLedger(user=user, amount=user.balance, balance_after=user.balance, kind='opening')
+                    for user in users if user.balance
+                ],
+                batch_size=BULK_BATCH_SIZE,
+            )
+        return users
+
+    def bulk_update(self, changes):
+        plain_changes = []
+        balances = {}
+        for user, data in changes:
+            data = _hash_password(data)
+            if 'balance' in data:
+                balances[user.pk] = (user, data.pop('balance'))
+            plain_changes.append((user, data))
+
+        with transaction.atomic():
+            users = super().bulk_update(plain_changes)
+            # Баланс — лише через set_balance (блокування рядка і запис у журнал), а не пакетним UPDATE,
+            # який перезаписав би паралельне списання; порядок за pk — щоб блокування не перехрещувалися
+            for pk in sorted(balances):
+                user, balance = balances[pk]
+                user.balance = self.set_balance(pk, balance)
+        return users
+
     def update_balance(self, user_id, new_balance):
         return self.update(user_id, balance=new_balance)
 
+    def change_balance(self, user_id, amount, kind, order=None, locked_balance=None):
+        # amount зі знаком; списання проходить лише якщо коштів достатньо (умова в тому ж UPDATE)
+        with transaction.atomic():
+            queryset = self.model.objects.filter(pk=user_id)
+            if amount < 0:
+                queryset = queryset.filter(balance__gte=-amount)
+
+            if not queryset.update(balance=F('balance') + amount):
+                return None
+
+            if locked_balance is not None:
+                balance_after = locked_balance + amount
+            else:
+                balance_after = self.model.objects.filter(pk=user_id).values_list('balance', flat=True).get()
+
+            BalanceLedger.objects.create(
+                user_id=user_id,
+                amount=amount,
+                balance_after=balance_after,
+                kind=kind,
+                order=order,
+            )
+        return balance_after
+
+    def set_balance(self, user_id, new_balance, kind='adjustment'):
+        with transaction.atomic():
+            current = (
+                self.model.objects
+                .select_for_update()
+                .filter(pk=user_id)
+                .values_list('balance', flat=True)
+                .first()
+            )
+            if current is None:
+                return None
+
+            delta = Decimal(new_balance) - current
+            if not delta:
+                return current
+            return self.change_balance(user_id, delta, kind, locked_balance=current)
+
+    def get_balance_history(self, user_id):
+        return BalanceLedger.objects.filter(user_id=user_id)
+
+    def find_balance_drift(self, user_ids=None):
+        queryset = self.model.objects.all()
+        if user_ids is not None:
+            queryset = queryset.filter(id__in=user_ids)
+
+        return (
+            queryset
+            .annotate(
+                ledger_total=Coalesce(
+                    Sum('balance_entries__amount'),
+                    Value(Decimal('0')),
+                    output_field=DecimalField(max_digits=12, decimal_places=2)
+                )
+            )
+            .exclude(balance=F('ledger_total'))
+            .values('id', 'username', 'balance', 'ledger_total')
+            .order_by('id')
+        )
+
+    def reconcile_balances(self, fix=False, kind='adjustment', user_ids=None):
+        drifted = list(self.find_balance_drift(user_ids))
+
+        if fix and drifted:
+            BalanceLedger.objects.bulk_create(
+                [
+                    BalanceLedger(
+                        user_id=row['id'],
+                        amount=row['balance'] - row['ledger_total'],
+                        balance_after=row['balance'],
+                        kind=kind,
+                    )
+                    for row in drifted
+                ],
+                batch_size=BULK_BATCH_SIZE,
+            )
+        return drifted
+
     def get_spending_rank(self, year=None):
         queryset = self.model.objects.all()
 
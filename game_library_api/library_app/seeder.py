@@ -15,6 +15,9 @@ from datetime import timedelta, datetime, time
 from django.utils import timezone
 import random
 from library_app.models import *
+from library_app.repositories.game_repository import GameRepository
+from library_app.repositories.revenue_repository import RevenueRepository
+from library_app.repositories.user_repository import UserRepository
 
 fake = Faker()
 
@@ -331,6 +334,18 @@ def run_seeder():
     # Крок 5: Створення Відгуків
     create_reviews(library_games, games, big_devs)
 
+    # Крок 6: Перерахунок денного агрегату доходу (bulk_create його оминає)
+    rollup_days = RevenueRepository().rebuild()
+    print(f"Перераховано днів у revenue_daily: {rollup_days}")
+
+    # Крок 7: Агрегати рейтингу ігор (відгуки теж створені через bulk_create)
+    rated_games = GameRepository().reconcile_rating_aggregates()
+    print(f"Оновлено агрегати рейтингу для ігор: {len(rated_games)}")
+
+    # Крок 8: Початкові записи журналу балансу для користувачів, створених через bulk_create
+    opened = UserRepository().reconcile_balances(fix=True, kind='opening')
+    print(f"Відкрито журналів балансу: {len(opened)}")
+
     print("\n--- Генерація даних завершена ---")
 
     return users, games, library_games
@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import User, Order, Library, LibraryGame, OrderGame, Game, Developer, Publisher, Genre, GameGenre, Review
+from .models import User, Order, Library, LibraryGame, OrderGame, Game, Developer, Publisher, Genre, GameGenre, Review, BalanceLedger
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -27,6 +27,12 @@ class UserSerializer(serializers.ModelSerializer):
         instance.save()
         return instance
 
+class BalanceLedgerSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = BalanceLedger
+        fields = ['id', 'amount', 'balance_after', 'kind', 'order', 'created_at']
+        read_only_fields = fields
+
 class OrderSerializer(serializers.ModelSerializer):
     username = serializers.CharField(source='user.username',read_only=True)
 
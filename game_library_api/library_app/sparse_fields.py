@@ -0,0 +1,52 @@
+from rest_framework.serializers import BaseSerializer, ListSerializer
+
+
+def parse_field_paths(value):
+    # "title,library_games.game_data.title" -> {'title': {}, 'library_games': {'game_data': {'title': {}}}}
+    if value is None:
+        return None
+
+    tree = {}
+    for path in value.split(','):
+        node = tree
+        for name in filter(None, (part.strip() for part in path.split('.'))):
+            node = node.setdefault(name, {})
+    return tree
+
+
+def _nested(field):
+    if isinstance(field, ListSerializer):
+        return field.child
+    if isinstance(field, BaseSerializer):
+        return field
+    return None
+
+
+def prune_serializer(serializer, fields=None, expand=None):
+    # fields — які поля лишити (вкладені через крапку, порожнє піддерево = весь об'єкт);
+    # expand — які вкладені серіалізатори розгортати, решта вкладених відкидається.
+    # None в обох означає «як у серіалізаторі»
+    serializer = _nested(serializer) or serializer
+
+    for name in list(serializer.fields):
+        field = serializer.fields[name]
+        if fields is not None and name not in fields:
+            serializer.fields.pop(name)
+            continue
+
+        nested = _nested(field)
+        if nested is None:
+            continue
+
+        requested = fields.get(name) if fields is not None else None
+        if expand is not None and name not in expand and requested is None:
+            serializer.fields.pop(name)
+            continue
+
+        prune_serializer(
+            nested,
+            requested or None,
+            expand.get(name, {}) if expand is not None else None
+        )
+
+    return serializer
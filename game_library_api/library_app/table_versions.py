@@ -0,0 +1,44 @@
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from library_app.models import TableVersion
+
+
+class TableVersions:
+    def _increment(self, table):
+        now = timezone.now()
+        if TableVersion.objects.filter(table=table).update(version=F('version') + 1, updated_at=now):
+            return
+
+        try:
+            with transaction.atomic():
+                TableVersion.objects.create(table=table, version=1, updated_at=now)
+        except IntegrityError:
+            # Рядок щойно створив паралельний запис
+            TableVersion.objects.filter(table=table).update(version=F('version') + 1, updated_at=now)
+
+    def bump(self, *tables):
+        # Після коміту і поза транзакцією запису: гарячий рядок лічильника не тримає блокування
+        # на весь час покупки чи пакетного оновлення
+        def apply():
+            for table in sorted(set(tables)):
+                self._increment(table)
+
+        transaction.on_commit(apply)
+
+    def _rows(self, tables):
+        return TableVersion.objects.filter(table__in=tables).values_list('table', 'version', 'updated_at')
+
+    def _versions(self, tables, rows):
+        versions = {table: (version, updated_at) for table, version, updated_at in rows}
+        return {table: versions.get(table, (0, None)) for table in tables}
+
+    def get(self, tables):
+        return self._versions(tables, self._rows(tables))
+
+    async def aget(self, tables):
+        return self._versions(tables, [row async for row in self._rows(tables)])
+
+
+table_versions = TableVersions()
@@ -1,3 +1,876 @@
-from django.test import TestCase
+import json
+import threading
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import caches
+from django.db import connection
+from django.db.models import Sum
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, skipUnlessDBFeature
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from library_app.models import Developer, Publisher, Genre, Game, GameGenre, Library, LibraryGame, Order, OrderGame, \
+    Review, User, DailyRevenue, TableVersion, IdempotencyKey
+from library_app.export import keyset_batches
+from library_app.purchase_service import purchase_service, PurchaseError
+from library_app.report_cache import report_cache
+from library_app.report_service import report_service
+from library_app.utils import ChartRenderCache, chart_cache, generate_monthly_revenue_bokeh_chart
+from library_app.repositories.game_repository import GameRepository
+from library_app.repositories.user_repository import UserRepository
+from library_app.query_plans import check_report_plans, find_full_scans
+
+
+def make_catalog(games=20, users=10, genres=('Action', 'RPG')):
+    developer = Developer.objects.create(name='Dev Studio')
+    publisher = Publisher.objects.create(name='Pub House')
+    genre_objs = [Genre.objects.create(name=name) for name in genres]
+
+    game_objs = [
+        Game.objects.create(
+            title=f'Game {index}',
+            price=Decimal(5 + index),
+            release_date=date(2020, 1, 1 + index % 28),
+            developer=developer,
+            publisher=publisher,
+        )
+        for index in range(games)
+    ]
+    GameGenre.objects.bulk_create([
+        GameGenre(game=game, genre=genre_objs[index % len(genre_objs)]) for index, game in enumerate(game_objs)
+    ])
+
+    user_objs = []
+    for index in range(users):
+        user = User.objects.create_user(username=f'player{index}', password='secret123', balance=Decimal('100.00'))
+        library = Library.objects.create(user=user)
+        owned = game_objs[:index + 1]
+        LibraryGame.objects.bulk_create([
+            LibraryGame(library=library, game=game, playtime_hours=index * 3) for game in owned
+        ])
+        order = Order.objects.create(
+            user=user,
+            total_amount=sum(game.price for game in owned),
+            status='complete',
+            created_at=timezone.now(),
+        )
+        OrderGame.objects.bulk_create([
+            OrderGame(order=order, game=game, price_at_purchase=game.price) for game in owned
+        ])
+        Review.objects.bulk_create([
+            Review(user=user, game=game, rating=1 + (index + game.pk) % 5) for game in owned[:3]
+        ])
+        user_objs.append(user)
+
+    return game_objs, user_objs
+
+
+class QueryPlanParserTests(SimpleTestCase):
+    def test_mysql_plan_reports_guarded_full_scans(self):
+        plan = json.dumps({'query_block': {'nested_loop': [
+            {'table': {'table_name': 'order', 'access_type': 'ALL'}},
+            {'table': {'table_name': 'order_game', 'access_type': 'ref'}},
+            {'table': {'table_name': 'genre', 'access_type': 'ALL'}},
+        ]}})
+        self.assertEqual(find_full_scans(plan, 'mysql'), ['order'])
+
+    def test_mysql_plan_without_full_scans(self):
+        plan = json.dumps({'query_block': {'table': {'table_name': 'review', 'access_type': 'range'}}})
+        self.assertEqual(find_full_scans(plan, 'mysql'), [])
+
+    def test_sqlite_plan_ignores_index_scans(self):
+        plan = '\n'.join([
+            'SCAN order_game',
+            'SCAN review USING COVERING INDEX review_game_rating_idx',
+            'SEARCH game USING INTEGER PRIMARY KEY (rowid=?)',
+            'SCAN TABLE "library_game"',
+        ])
+        self.assertEqual(find_full_scans(plan, 'sqlite'), ['library_game', 'order_game'])
+
+    def test_postgresql_plan_reports_seq_scans(self):
+        plan = '\n'.join([
+            'Hash Join  (cost=1.09..2.21 rows=4 width=12)',
+            '  ->  Seq Scan on "order"  (cost=0.00..1.04 rows=4 width=8)',
+            '  ->  Index Scan using library_game_playtime_idx on library_game  (cost=0.14..8.16 rows=1 width=4)',
+            '  ->  Seq Scan on genre  (cost=0.00..1.01 rows=1 width=4)',
+        ])
+        self.assertEqual(find_full_scans(plan, 'postgresql'), ['order'])
+
+
+class QueryPlanRegressionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        make_catalog()
+
+    def test_catalog_library_and_report_queries_avoid_full_scans(self):
+        regressions = {
+            result['report']: result['full_scans']
+            for result in check_report_plans()
+            if result['full_scans']
+        }
+        self.assertEqual(regressions, {})
+
+
+class ApiTestCase(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(username='api_admin', password='secret123')
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def count_queries(self, url, **params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return len(queries)
+
+
+class FetchPlanTests(ApiTestCase):
+    def test_list_endpoints_do_not_query_per_row(self):
+        games, users = make_catalog(games=5, users=3)
+        urls = ['/api/games/', '/api/libraries/', '/api/library-games/', '/api/order-games/', '/api/reviews/']
+        baseline = {url: self.count_queries(url) for url in urls}
+
+        # Удвічі більше рядків — та сама кількість запитів
+        for index in range(3, 6):
+            user = User.objects.create_user(username=f'extra{index}', password='secret123')
+            library = Library.objects.create(user=user)
+            LibraryGame.objects.bulk_create([LibraryGame(library=library, game=game) for game in games])
+            order = Order.objects.create(user=user, total_amount=Decimal('10.00'), status='complete')
+            OrderGame.objects.bulk_create([OrderGame(order=order, game=game, price_at_purchase=game.price) for game in games])
+            Review.objects.create(user=user, game=games[0], rating=4)
+
+        for url in urls:
+            self.assertEqual(self.count_queries(url), baseline[url], url)
+
+
+class SparseFieldsetTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.games, self.users = make_catalog(games=3, users=2)
+
+    def library(self, **params):
+        response = self.client.get('/api/libraries/', {'user': self.users[1].pk, **params})
+        self.assertEqual(response.status_code, 200)
+        return response.data[0]
+
+    def test_fields_keep_only_requested_columns(self):
+        response = self.client.get('/api/games/', {'fields': 'game_id,title,no_such_field'})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(all(set(row) == {'game_id', 'title'} for row in response.data['results']))
+
+        detail = self.client.get(f'/api/games/{self.games[0].pk}/', {'fields': 'price'})
+        self.assertEqual(set(detail.data), {'price'})
+
+    def test_nested_field_paths(self):
+        library = self.library(fields='library_games.playtime_hours,library_games.game_data.title')
+        self.assertEqual(set(library), {'library_games'})
+        self.assertEqual(len(library['library_games']), 2)
+        for item in library['library_games']:
+            self.assertEqual(set(item), {'playtime_hours', 'game_data'})
+            self.assertEqual(set(item['game_data']), {'title'})
+
+    def test_expand_limits_nested_serializers(self):
+        self.assertIn('game_data', self.library()['library_games'][0])
+
+        # Розгорнуто лише library_games: вкладений game_data відкидається
+        item = self.library(expand='library_games')['library_games'][0]
+        self.assertNotIn('game_data', item)
+        self.assertIn('playtime_hours', item)
+
+        self.assertNotIn('library_games', self.library(expand=''))
+        self.assertIn('game_data', self.library(expand='library_games.game_data')['library_games'][0])
+
+
+class RevenueRollupTests(ApiTestCase):
+    def rollup(self):
+        row = DailyRevenue.objects.filter(day=timezone.localdate()).first()
+        return (row.total_revenue, row.orders_count) if row else (Decimal('0.00'), 0)
+
+    def test_order_writes_keep_daily_rollup_in_sync(self):
+        user = User.objects.create_user(username='buyer', password='secret123')
+
+        response = self.client.post('/api/orders/', {'user': user.pk, 'total_amount': '30.00', 'status': 'complete'})
+        self.assertEqual(response.status_code, 201)
+        order_id = response.data['order_id']
+        self.assertEqual(self.rollup(), (Decimal('30.00'), 1))
+
+        # OrderViewSet не має PATCH (partial_update) — оновлення через PUT з повним тілом
+        order_url = f'/api/orders/{order_id}/'
+        response = self.client.put(order_url, {'user': user.pk, 'total_amount': '45.00', 'status': 'complete'})
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(self.rollup(), (Decimal('45.00'), 1))
+
+        response = self.client.put(order_url, {'user': user.pk, 'total_amount': '45.00', 'status': 'canceled'})
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(self.rollup(), (Decimal('0.00'), 0))
+
+        response = self.client.put(order_url, {'user': user.pk, 'total_amount': '45.00', 'status': 'complete'})
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(self.rollup(), (Decimal('45.00'), 1))
+
+        self.assertEqual(self.client.delete(order_url).status_code, 204)
+        self.assertEqual(self.rollup(), (Decimal('0.00'), 0))
+
+    def test_bulk_order_writes_keep_daily_rollup_in_sync(self):
+        user = User.objects.create_user(username='buyer', password='secret123')
+        payload = [
+            {'user': user.pk, 'total_amount': '10.00', 'status': 'complete'},
+            {'user': user.pk, 'total_amount': '20.00', 'status': 'complete'},
+            {'user': user.pk, 'total_amount': '99.00', 'status': 'pending'},
+        ]
+        response = self.client.post('/api/orders/bulk/', payload, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        order_ids = [item['data']['order_id'] for item in response.data]
+        self.assertEqual(self.rollup(), (Decimal('30.00'), 2))
+
+        response = self.client.patch('/api/orders/bulk/', [
+            {'pk': order_ids[0], 'status': 'canceled'},
+            {'pk': order_ids[2], 'status': 'complete'},
+        ], format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(self.rollup(), (Decimal('119.00'), 2))
+
+        response = self.client.delete('/api/orders/bulk/', order_ids, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(self.rollup(), (Decimal('0.00'), 0))
+
+
+class ReportCacheTests(TestCase):
+    def setUp(self):
+        caches['reports'].clear()
+
+    def test_invalidation_is_stored_in_table_versions(self):
+        computed = []
+
+        def compute():
+            computed.append(1)
+            return {'rows': len(computed)}
+
+        self.assertEqual(report_cache.get_or_compute('monthly-revenue', {}, compute), {'rows': 1})
+        self.assertEqual(report_cache.get_or_compute('monthly-revenue', {}, compute), {'rows': 1})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            report_cache.invalidate('purchases')
+        self.assertEqual(TableVersion.objects.get(table='report-tag:purchases').version, 1)
+        self.assertEqual(report_cache.get_or_compute('monthly-revenue', {}, compute), {'rows': 2})
+
+        # Витіснення з LocMem не повертає старі версії тегів
+        key = report_cache.make_key('monthly-revenue', {})
+        caches['reports'].clear()
+        self.assertEqual(report_cache.make_key('monthly-revenue', {}), key)
+
+    def test_unrelated_tag_keeps_cached_report(self):
+        key = report_cache.make_key('monthly-revenue', {'start_date': None})
+        with self.captureOnCommitCallbacks(execute=True):
+            report_cache.invalidate('reviews')
+        self.assertEqual(report_cache.make_key('monthly-revenue', {'start_date': None}), key)
+
+
+class OwnershipCheckTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.games, self.users = make_catalog(games=3, users=1)
+
+    def is_owned(self, user, game):
+        response = self.client.get(f'/api/games/{game.pk}/is_owned/', {'user_id': user.pk})
+        self.assertEqual(response.status_code, 200)
+        return response.data['is_owned']
+
+    def test_is_owned_is_a_single_targeted_query(self):
+        user = self.users[0]
+        self.assertTrue(self.is_owned(user, self.games[0]))
+        self.assertFalse(self.is_owned(user, self.games[2]))
+
+        with CaptureQueriesContext(connection) as queries:
+            GameRepository().check_if_user_owns_game(user.pk, self.games[0].pk)
+        self.assertEqual(len(queries), 1)
+        self.assertIn('LIMIT 1', queries[0]['sql'])
+
+    def test_writes_are_visible_immediately(self):
+        user = UserRepository().create(username='collector', balance=Decimal('100.00'))
+        self.assertFalse(self.is_owned(user, self.games[1]))
+
+        purchase_service.buy_game(user.pk, self.games[1].pk)
+        self.assertTrue(self.is_owned(user, self.games[1]))
+
+        response = self.client.delete(f'/api/libraries/{user.library.pk}/')
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(self.is_owned(user, self.games[1]))
+
+
+class CatalogReportInvalidationTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        caches['reports'].clear()
+        make_catalog(games=3, users=2)
+
+    def test_catalog_viewsets_invalidate_catalog_reports(self):
+        publisher = Publisher.objects.get()
+        developer = Developer.objects.get()
+        writes = [
+            ('put', f'/api/publishers/{publisher.pk}/', {'name': 'Renamed Pub'}),
+            ('put', f'/api/developers/{developer.pk}/', {'name': 'Renamed Dev'}),
+            ('post', '/api/genres/', {'name': 'Puzzle'}),
+            ('delete', f'/api/publishers/{publisher.pk}/', None),
+        ]
+        for method, url, payload in writes:
+            key = report_cache.make_key('dev-revenue', {})
+            with self.captureOnCommitCallbacks(execute=True):
+                response = getattr(self.client, method)(url, payload, format='json')
+            self.assertLess(response.status_code, 300, (url, response.status_code))
+            self.assertNotEqual(report_cache.make_key('dev-revenue', {}), key, url)
+
+
+class ReportMoneyFormatTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        caches['reports'].clear()
+
+    def test_money_columns_are_decimal_strings(self):
+        games, users = make_catalog(games=3, users=2)
+
+        monthly = self.client.get('/api/reports/monthly-revenue/').data['time_series_data']
+        self.assertEqual(monthly[-1]['total_revenue'], '16.00')
+
+        top_rated = self.client.get('/api/reports/top-rated-games/', {'min_reviews': 0}).data['time_series_data']
+        self.assertIn('5.00', {row['price'] for row in top_rated})
+        # Гра без відгуків: середній рейтинг null, а не NaN (який JSONRenderer не серіалізує)
+        unrated = next(row for row in top_rated if row['game_id'] == games[2].pk)
+        self.assertIsNone(unrated['avg_rating'])
+
+        whales = self.client.get('/api/reports/whales-analysis/').data
+        self.assertTrue(all(isinstance(row['total_spent'], str) for row in whales['spending_rank']))
+        self.assertTrue(all(isinstance(row['spent_on_genre'], str) for row in whales['genre_breakdown']))
+
+
+class BulkEndpointTests(ApiTestCase):
+    def test_single_invalid_item_is_reported_at_index_zero(self):
+        response = self.client.post('/api/users/bulk/', [
+            {'username': 'broken', 'email': 'not-an-email', 'password': 'secret123'},
+        ], format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([row['index'] for row in response.data], [0])
+        self.assertIn('email', response.data[0]['errors'])
+
+    def test_invalid_items_keep_their_positions(self):
+        response = self.client.post('/api/users/bulk/', [
+            {'username': 'first', 'email': 'bad', 'password': 'secret123'},
+            {'username': 'second', 'email': 'second@example.com', 'password': 'secret123'},
+            {'username': 'third', 'email': 'bad', 'password': 'secret123'},
+        ], format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([row['index'] for row in response.data], [0, 2])
+        self.assertFalse(User.objects.filter(username='second').exists())
+
+    def test_bulk_created_users_get_hashed_passwords(self):
+        response = self.client.post('/api/users/bulk/', [
+            {'username': f'bulk{i}', 'email': f'bulk{i}@example.com', 'password': 'secret123'}
+            for i in range(3)
+        ], format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len({row['data']['id'] for row in response.data}), 3)
+
+        for user in User.objects.filter(username__startswith='bulk'):
+            self.assertNotEqual(user.password, 'secret123')
+            self.assertTrue(user.check_password('secret123'))
+
+    def test_bulk_user_balances_go_through_the_ledger(self):
+        response = self.client.post('/api/users/bulk/', [
+            {'username': 'rich', 'email': 'rich@example.com', 'password': 'secret123', 'balance': '50.00'},
+            {'username': 'poor', 'email': 'poor@example.com', 'password': 'secret123'},
+        ], format='json')
+        self.assertEqual(response.status_code, 201)
+        rich = User.objects.get(username='rich')
+        self.assertEqual(list(rich.balance_entries.values_list('kind', flat=True)), ['opening'])
+
+        response = self.client.patch('/api/users/bulk/', [
+            {'id': rich.pk, 'balance': '20.00'},
+            {'id': User.objects.get(username='poor').pk, 'balance': '5.00'},
+        ], format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['data']['balance'] for row in response.data], ['20.00', '5.00'])
+
+        rich.refresh_from_db()
+        self.assertEqual(rich.balance, Decimal('20.00'))
+        self.assertFalse(UserRepository().find_balance_drift().exists())
+
+    def test_bulk_update_hashes_password(self):
+        user = User.objects.create_user(username='changer', email='changer@example.com', password='old-secret')
+        response = self.client.patch('/api/users/bulk/', [{'id': user.pk, 'password': 'new-secret'}], format='json')
+        self.assertEqual(response.status_code, 200)
+
+        user.refresh_from_db()
+        self.assertTrue(user.check_password('new-secret'))
+
+
+@skipUnlessDBFeature('has_select_for_update')
+class ConcurrentPurchaseTests(TransactionTestCase):
+    def setUp(self):
+        self.games, _ = make_catalog(games=4, users=0)
+
+    def buy_in_parallel(self, jobs):
+        outcomes = []
+        lock = threading.Lock()
+        barrier = threading.Barrier(len(jobs))
+
+        def worker(user_id, game_id):
+            barrier.wait()
+            try:
+                purchase_service.buy_game(user_id, game_id)
+                outcome = 'ok'
+            except PurchaseError as e:
+                outcome = e.message
+            finally:
+                connection.close()
+            with lock:
+                outcomes.append(outcome)
+
+        threads = [threading.Thread(target=worker, args=job) for job in jobs]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return outcomes
+
+    def assert_invariants(self, user, initial_balance):
+        user.refresh_from_db(fields=['balance'])
+        spent = Order.objects.filter(user=user).aggregate(spent=Sum('total_amount'))['spent'] or Decimal('0')
+        self.assertGreaterEqual(user.balance, 0)
+        self.assertEqual(user.balance, initial_balance - spent)
+        self.assertFalse(UserRepository().find_balance_drift([user.pk]).exists())
+
+    def test_same_game_is_bought_once(self):
+        game = self.games[0]
+        user = UserRepository().create(username='racer', balance=game.price * 8)
+
+        outcomes = self.buy_in_parallel([(user.pk, game.pk)] * 8)
+
+        self.assertEqual(outcomes.count('ok'), 1)
+        self.assertEqual(LibraryGame.objects.filter(library__user=user, game=game).count(), 1)
+        self.assertEqual(Order.objects.filter(user=user).count(), 1)
+        self.assert_invariants(user, game.price * 8)
+
+    def test_parallel_purchases_never_overdraw(self):
+        # Грошей вистачає лише на дві гри з чотирьох
+        balance = self.games[0].price + self.games[1].price
+        user = UserRepository().create(username='spender', balance=balance)
+
+        outcomes = self.buy_in_parallel([(user.pk, game.pk) for game in self.games])
+
+        self.assertIn(outcomes.count('ok'), (1, 2))
+        self.assertEqual(LibraryGame.objects.filter(library__user=user).count(), outcomes.count('ok'))
+        self.assert_invariants(user, balance)
+
+
+class IdempotencyTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.games, _ = make_catalog(games=2, users=0)
+        self.buyer = UserRepository().create(username='buyer', balance=Decimal('100.00'))
+
+    def buy(self, client=None, key='buy-1', game=None):
+        return (client or self.client).post('/api/games/buy/', {
+            'user_id': self.buyer.pk, 'game_id': (game or self.games[0]).pk,
+        }, format='json', HTTP_IDEMPOTENCY_KEY=key)
+
+    def test_retry_replays_the_first_response(self):
+        first = self.buy()
+        second = self.buy()
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second['Idempotent-Replayed'], 'true')
+        self.assertEqual(second.data['message'], first.data['message'])
+        self.assertEqual(Order.objects.filter(user=self.buyer).count(), 1)
+
+    def test_same_key_with_other_payload_is_rejected(self):
+        self.buy()
+        self.assertEqual(self.buy(game=self.games[1]).status_code, 422)
+
+    def test_keys_are_scoped_per_user(self):
+        self.buy()
+
+        other = APIClient()
+        other.force_authenticate(User.objects.create_user(username='other', password='secret123'))
+        response = self.buy(client=other, game=self.games[1])
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('Idempotent-Replayed', response)
+        self.assertEqual(IdempotencyKey.objects.filter(scope='buy', key='buy-1').count(), 2)
+
+    def test_stale_pending_key_is_reclaimed(self):
+        now = timezone.now()
+        IdempotencyKey.objects.create(
+            scope='buy', owner=str(self.admin.pk), key='buy-1', request_hash='stale',
+            created_at=now - timedelta(hours=1), expires_at=now + timedelta(hours=1),
+        )
+
+        response = self.buy()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(IdempotencyKey.objects.get(scope='buy', key='buy-1').status_code, 200)
+
+    def test_fresh_pending_key_is_reported_as_in_progress(self):
+        self.buy()
+        IdempotencyKey.objects.filter(scope='buy', key='buy-1').update(status_code=None, created_at=timezone.now())
+        self.assertEqual(self.buy().status_code, 409)
+
+
+class CursorPaginationTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.games, _ = make_catalog(games=8, users=0)
+
+    def walk(self, **params):
+        response = self.client.get('/api/games/', {'pagination': 'cursor', 'page_size': 3, **params})
+        rows = []
+        while True:
+            self.assertEqual(response.status_code, 200)
+            rows.extend(response.data['results'])
+            if not response.data['next']:
+                return rows
+            response = self.client.get(response.data['next'])
+
+    def test_catalog_ordering_is_kept_across_pages(self):
+        rows = self.walk(ordering='-price')
+        self.assertEqual([row['game_id'] for row in rows],
+                         [game.pk for game in sorted(self.games, key=lambda game: game.price, reverse=True)])
+
+    def test_default_order_visits_every_game_once(self):
+        rows = self.walk()
+        self.assertEqual(sorted(row['game_id'] for row in rows), sorted(game.pk for game in self.games))
+
+    def test_unsupported_ordering_is_rejected(self):
+        response = self.client.get('/api/games/', {'pagination': 'cursor', 'ordering': 'rating_avg'})
+        self.assertEqual(response.status_code, 400)
+
+        # Звичайна пагінація сортування за рейтингом підтримує
+        self.assertEqual(self.client.get('/api/games/', {'ordering': 'rating_avg'}).status_code, 200)
+
+    def test_bad_page_or_cursor_is_404(self):
+        self.assertEqual(self.client.get('/api/games/', {'page': 99}).status_code, 404)
+        self.assertEqual(self.client.get('/api/games/', {'pagination': 'cursor', 'cursor': 'garbage'}).status_code, 404)
+
+
+class ExportTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.games, _ = make_catalog(games=7, users=0)
+        # Однакові ціни: порядок між ними задає pk
+        Game.objects.filter(pk__in=[game.pk for game in self.games[:3]]).update(price=Decimal('9.00'))
+
+    def export(self, **params):
+        response = self.client.get('/api/games/', {'export': 'ndjson', **params})
+        self.assertEqual(response.status_code, 200)
+        lines = b''.join(response.streaming_content).decode('utf-8').splitlines()
+        return [json.loads(line) for line in lines]
+
+    def expected(self, *ordering):
+        return list(Game.objects.order_by(*ordering).values_list('game_id', flat=True))
+
+    def test_batches_follow_queryset_ordering(self):
+        for ordering in (('-price', '-game_id'), ('price', 'game_id'), ('title',)):
+            batches = list(keyset_batches(Game.objects.order_by(*ordering), chunk_size=2))
+            self.assertTrue(all(len(batch) <= 2 for batch in batches))
+            self.assertEqual([game.pk for batch in batches for game in batch],
+                             self.expected(*ordering, 'game_id'), ordering)
+
+    def test_export_keeps_requested_ordering(self):
+        rows = self.export(ordering='-price')
+        self.assertEqual([row['game_id'] for row in rows], self.expected('-price', '-game_id'))
+        self.assertEqual(rows[0]['price'], '11.00')
+
+    def test_csv_export(self):
+        response = self.client.get('/api/games/', {'export': 'csv', 'ordering': 'price'})
+        lines = b''.join(response.streaming_content).decode('utf-8').splitlines()
+        self.assertEqual(len(lines), len(self.games) + 1)
+        self.assertIn('title', lines[0])
+
+    def test_export_rejects_ordering_it_cannot_keyset(self):
+        response = self.client.get('/api/games/', {'export': 'ndjson', 'ordering': 'rating_avg'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.client.get('/api/games/', {'export': 'xml'}).status_code, 400)
+
+
+class ConditionalGetTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.games, self.users = make_catalog(games=3, users=1)
+
+    def test_unchanged_catalog_returns_304(self):
+        first = self.client.get('/api/games/')
+        self.assertEqual(first.status_code, 200)
+        self.assertIn('ETag', first)
+
+        repeat = self.client.get('/api/games/', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(repeat.status_code, 304)
+        self.assertEqual(repeat['ETag'], first['ETag'])
+
+        # Інший запит (параметри) — інший ETag
+        other = self.client.get('/api/games/', {'ordering': 'price'}, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(other.status_code, 200)
+
+    def test_catalog_write_changes_etag(self):
+        etag = self.client.get('/api/games/')['ETag']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.put(f'/api/games/{self.games[0].pk}/', {'title': 'Renamed'}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+        fresh = self.client.get('/api/games/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(fresh.status_code, 200)
+        self.assertNotEqual(fresh['ETag'], etag)
+
+    def test_purchase_changes_the_buyer_etag(self):
+        buyer = self.users[0]
+        self.client.force_authenticate(buyer)
+        etag = self.client.get('/api/games/')['ETag']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            purchase_service.buy_game(buyer.pk, self.games[2].pk)
+
+        fresh = self.client.get('/api/games/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(fresh.status_code, 200)
+        self.assertTrue(next(row for row in fresh.data['results'] if row['game_id'] == self.games[2].pk)['is_owned'])
+
+
+class KeysetPaginationTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        _, self.users = make_catalog(games=6, users=6)
+        # Однакові created_at у парах: порядок між ними задає pk
+        now = timezone.now()
+        for index, order in enumerate(Order.objects.order_by('pk')):
+            Order.objects.filter(pk=order.pk).update(created_at=now - timedelta(days=index // 2))
+
+    def walk(self, url, **params):
+        response = self.client.get(url, {'pagination': 'cursor', 'page_size': 2, **params})
+        pages = []
+        while True:
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn('count', response.data)
+            pages.append([row['order_id'] for row in response.data['results']])
+            if not response.data['next']:
+                return pages
+            response = self.client.get(response.data['next'])
+
+    def test_cursor_pages_follow_created_at_then_pk(self):
+        pages = self.walk('/api/orders/', ordering='created_at')
+        self.assertTrue(all(len(page) <= 2 for page in pages))
+        self.assertEqual([pk for page in pages for pk in page],
+                         list(Order.objects.order_by('created_at', 'pk').values_list('pk', flat=True)))
+
+    def test_default_cursor_order_is_newest_pk_first(self):
+        pages = self.walk('/api/orders/', ordering='username')
+        self.assertEqual([pk for page in pages for pk in page],
+                         list(Order.objects.order_by('-pk').values_list('pk', flat=True)))
+
+    def test_page_number_pagination_stays_the_default(self):
+        response = self.client.get('/api/orders/', {'page_size': 2})
+        self.assertEqual(response.data['count'], Order.objects.count())
+        self.assertEqual(len(response.data['results']), 2)
+
+    def test_balance_history_is_keyset_paginated(self):
+        user = UserRepository().create(username='saver', balance=Decimal('10.00'))
+        for amount in (1, 2, 3):
+            UserRepository().change_balance(user.pk, Decimal(amount), 'top_up')
+
+        response = self.client.get(f'/api/users/{user.pk}/balance-history/', {'page_size': 3})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['kind'] for row in response.data['results']], ['top_up'] * 3)
+        self.assertIsNotNone(response.data['next'])
+
+
+class SharedReportServiceTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        caches['reports'].clear()
+        make_catalog(games=4, users=3)
+
+    def test_json_and_bokeh_endpoints_share_one_computation(self):
+        build = report_service._top_rated_games_build
+        with mock.patch.object(report_service, '_top_rated_games_build', wraps=build) as spy:
+            data = self.client.get('/api/reports/top-rated-games/', {'min_reviews': 1})
+            chart = self.client.get('/api/reports/top-rated-games-bokeh/', {'min_reviews': 1})
+
+        self.assertEqual(data.status_code, 200)
+        self.assertEqual(chart.status_code, 200)
+        self.assertIn('script', chart.data)
+        self.assertEqual(spy.call_count, 1)
+
+    def test_service_rows_match_the_json_report(self):
+        report = report_service.top_rated_games(min_reviews=1)
+        rows = self.client.get('/api/reports/top-rated-games/', {'min_reviews': 1}).data['time_series_data']
+
+        self.assertEqual([row['game_id'] for row in rows], [row['game_id'] for row in report['rows']])
+        self.assertEqual(report['analytics_stats']['total_games_in_report'], len(rows))
+
+
+class ChartRenderCacheTests(SimpleTestCase):
+    def test_same_content_is_a_hit_and_new_content_a_miss(self):
+        cache = ChartRenderCache(maxsize=2)
+        renders = []
+
+        @cache.memoize
+        def render(rows, title=None):
+            renders.append(rows)
+            return f'chart:{len(rows)}:{title}'
+
+        rows = [{'month': '2026-01', 'total_revenue': 10.0}]
+        self.assertEqual(render(rows, title='a'), 'chart:1:a')
+        # Інший об'єкт з тим самим вмістом — той самий ключ
+        self.assertEqual(render([dict(rows[0])], title='a'), 'chart:1:a')
+        self.assertEqual((cache.hits, cache.misses, len(renders)), (1, 1, 1))
+
+        # Нові дані (запис змінив звіт) — новий хеш, графік рендериться знову
+        render(rows + [{'month': '2026-02', 'total_revenue': 5.0}], title='a')
+        render(rows, title='b')
+        self.assertEqual((cache.hits, cache.misses), (1, 3))
+
+        # LRU: найстаріший запис витіснено
+        render(rows, title='a')
+        self.assertEqual(cache.misses, 4)
+        self.assertEqual(cache.stats()['entries'], 2)
+
+    def test_report_chart_is_memoized(self):
+        rows = [
+            {'order_year': 2026, 'order_month': 1, 'total_revenue': 12.5},
+            {'order_year': 2026, 'order_month': 2, 'total_revenue': 7.0},
+        ]
+        hits = chart_cache.hits
+        first = generate_monthly_revenue_bokeh_chart(rows)
+        second = generate_monthly_revenue_bokeh_chart([dict(row) for row in rows])
+
+        self.assertIs(second, first)
+        self.assertEqual(chart_cache.hits, hits + 1)
+
+
+class GenreSyncTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.games, _ = make_catalog(games=4, users=0, genres=('Action', 'RPG', 'Puzzle'))
+        self.action, self.rpg, self.puzzle = Genre.objects.order_by('genre_id')
+
+    def genre_ids(self, game):
+        return set(GameGenre.objects.filter(game=game).values_list('genre_id', flat=True))
+
+    def test_update_keeps_unchanged_links(self):
+        game = self.games[0]
+        kept_link = GameGenre.objects.get(game=game, genre=self.action)
+
+        response = self.client.put(f'/api/games/{game.pk}/', {'genre_id': [self.action.pk, self.puzzle.pk]},
+                                   format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(self.genre_ids(game), {self.action.pk, self.puzzle.pk})
+        # Наявний зв'язок не перестворюється — лише різниця
+        self.assertTrue(GameGenre.objects.filter(pk=kept_link.pk).exists())
+
+    def test_sync_query_count_does_not_grow_with_games(self):
+        repo = GameRepository()
+        with CaptureQueriesContext(connection) as small:
+            repo.sync_genres({self.games[0].pk: [self.rpg.pk]})
+        with CaptureQueriesContext(connection) as large:
+            repo.sync_genres({game.pk: [self.puzzle.pk] for game in self.games})
+        self.assertEqual(len(large), len(small))
+
+    def test_retag_adds_and_removes_in_bulk(self):
+        game_ids = [game.pk for game in self.games]
+        response = self.client.post('/api/games/retag/', {
+            'game_ids': game_ids, 'add': [self.puzzle.pk], 'remove': [self.action.pk],
+        }, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(response.data['games'], len(game_ids))
+
+        for game in self.games:
+            self.assertIn(self.puzzle.pk, self.genre_ids(game))
+            self.assertNotIn(self.action.pk, self.genre_ids(game))
+
+    def test_retag_replaces_genre_sets(self):
+        game = self.games[1]
+        response = self.client.post('/api/games/retag/', {
+            'genres_by_game': {str(game.pk): [self.action.pk, self.rpg.pk]},
+        }, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(self.genre_ids(game), {self.action.pk, self.rpg.pk})
+
+    def test_retag_rejects_unknown_ids(self):
+        response = self.client.post('/api/games/retag/', {
+            'game_ids': [self.games[0].pk], 'add': [999999],
+        }, format='json')
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.data['missing_genres'], [999999])
+
+
+class CheckoutTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.games, _ = make_catalog(games=4, users=0)
+        self.buyer = UserRepository().create(username='shopper', balance=Decimal('20.00'))
+        purchase_service.buy_game(self.buyer.pk, self.games[0].pk)
+
+    def checkout(self, game_ids):
+        return self.client.post('/api/games/checkout/', {'user_id': self.buyer.pk, 'game_ids': game_ids},
+                                format='json')
+
+    def test_cart_is_one_order_with_per_item_results(self):
+        g0, g1, g2, _ = self.games
+        response = self.checkout([g1.pk, g2.pk, g0.pk, g1.pk, 999999])
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual([row['status'] for row in response.data['results']],
+                         ['purchased', 'purchased', 'already_owned', 'duplicate', 'not_found'])
+
+        order = Order.objects.get(pk=response.data['order_id'])
+        self.assertEqual(order.total_amount, g1.price + g2.price)
+        self.assertEqual(set(OrderGame.objects.filter(order=order).values_list('game_id', flat=True)), {g1.pk, g2.pk})
+        self.assertEqual(LibraryGame.objects.filter(library__user=self.buyer).count(), 3)
+
+        self.buyer.refresh_from_db()
+        self.assertEqual(self.buyer.balance, Decimal('20.00') - g0.price - g1.price - g2.price)
+        self.assertFalse(UserRepository().find_balance_drift([self.buyer.pk]).exists())
+
+    def test_insufficient_funds_buys_nothing(self):
+        orders = Order.objects.filter(user=self.buyer).count()
+        response = self.checkout([game.pk for game in self.games[1:]])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(len(response.data['results']), 3)
+        self.assertEqual(Order.objects.filter(user=self.buyer).count(), orders)
+        self.assertEqual(LibraryGame.objects.filter(library__user=self.buyer).count(), 1)
+
+    def test_invalid_carts_are_rejected(self):
+        self.assertEqual(self.checkout([]).status_code, 400)
+        self.assertEqual(self.checkout('1,2').status_code, 400)
+        self.assertEqual(self.checkout([self.games[0].pk]).status_code, 400)
+
+
+class AsyncReportViewTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        make_catalog(games=5, users=4)
+
+    def assert_same_payload(self, name, params):
+        caches['reports'].clear()
+        sync = self.client.get(f'/api/reports/{name}/', params)
+        # Окремий прогін без кешу: async-шлях сам рахує звіт через async ORM і report_executor
+        caches['reports'].clear()
+        native = self.client.get(f'/api/async/reports/{name}/', params)
+
+        self.assertEqual(sync.status_code, 200)
+        self.assertEqual(native.status_code, 200)
+        self.assertEqual(native.json(), sync.json(), name)
+
+    def test_async_reports_match_sync_reports(self):
+        self.assert_same_payload('monthly-revenue', {})
+        self.assert_same_payload('genre-playtime', {'min_unique_games': 1})
+        self.assert_same_payload('dev-revenue', {'top_n': 3})
+        self.assert_same_payload('top-rated-games', {'min_reviews': 0})
+        self.assert_same_payload('whales-analysis', {'top_n': 2})
+        self.assert_same_payload('user-activity', {'min_playtime': 1})
+
+    def test_async_chart_endpoint_renders(self):
+        response = self.client.get('/api/async/reports/monthly-revenue-bokeh/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('script', response.json())
@@ -1,3 +1,10 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
 import numpy as np
 import pandas as pd
 from bokeh.layouts import row
@@ -10,6 +17,62 @@ from datetime import datetime
 from bokeh.transform import factor_cmap, cumsum
 
 
+class ChartRenderCache:
+    def __init__(self, maxsize=64):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.seconds_saved = 0.0
+
+    def make_key(self, name, args, kwargs):
+        payload = json.dumps([name, args, kwargs], sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def memoize(self, func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            key = self.make_key(func.__name__, args, kwargs)
+
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    self.seconds_saved += entry[1]
+                    return entry[0]
+
+            started = time.perf_counter()
+            result = func(*args, **kwargs)
+            render_seconds = time.perf_counter() - started
+
+            with self._lock:
+                self.misses += 1
+                self._entries[key] = (result, render_seconds)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+
+            return result
+        return wrapper
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'entries': len(self._entries),
+                'max_entries': self.maxsize,
+                'render_seconds_saved': round(self.seconds_saved, 4),
+            }
+
+
+chart_cache = ChartRenderCache()
+
+
+
+@chart_cache.memoize
 def generate_monthly_revenue_bokeh_chart(data_dicts):
     if not data_dicts:
         p = figure(height=350, width=800, title="Немає даних для відображення",
@@ -17,10 +80,11 @@ def generate_monthly_revenue_bokeh_chart(data_dicts):
         return components(p)
 
     df = pd.DataFrame(data_dicts)
-    df['order_date'] = df.apply(
-        lambda row: datetime(row['order_year'], row['order_month'], 1),
-        axis=1
-    )
+    df['order_date'] = pd.to_datetime(pd.DataFrame({
+        'year': df['order_year'],
+        'month': df['order_month'],
+        'day': 1
+    }))
     df['total_revenue'] = pd.to_numeric(df['total_revenue'])
 
     source = ColumnDataSource(df)
@@ -64,6 +128,7 @@ def generate_monthly_revenue_bokeh_chart(data_dicts):
     return script, div
 
 
+@chart_cache.memoize
 def generate_genre_playtime_bokeh_chart(data_dicts):
     if not data_dicts:
         p = figure(height=350, width=800, title="Немає даних для відображення",
@@ -113,6 +178,7 @@ def generate_genre_playtime_bokeh_chart(data_dicts):
     return script, div
 
 
+@chart_cache.memoize
 def generate_developer_revenue_bokeh_chart(data_dicts):
     from bokeh.layouts import column
     from bokeh.models import DataTable, TableColumn, StringFormatter, NumberFormatter
@@ -194,6 +260,7 @@ def generate_developer_revenue_bokeh_chart(data_dicts):
     script, div = components(layout)
     return script, div
 
+@chart_cache.memoize
 def generate_top_rated_games_bokeh_charts(data_dicts, top_n=None):
     from bokeh.layouts import row
 
@@ -316,6 +383,7 @@ def generate_top_rated_games_bokeh_charts(data_dicts, top_n=None):
     script, div = components(layout)
     return script, div
 
+@chart_cache.memoize
 def generate_whales_analysis_bokeh_charts(rank_data_dicts, initial_genre_breakdown_data_dicts):
     if not rank_data_dicts:
         p_rank = figure(title="Немає даних користувачів для відображення", height=500, width=500)
@@ -457,6 +525,7 @@ def generate_whales_analysis_bokeh_charts(rank_data_dicts, initial_genre_breakdo
     return script, div
 
 
+@chart_cache.memoize
 def generate_user_activity_bokeh_charts(activity_data_dicts, correlation_value):
     if not activity_data_dicts:
         p_scatter = figure(title="Немає даних користувачів для відображення", height=600, width=800)
@@ -1,25 +1,31 @@
-from decimal import Decimal
-import pandas as pd
-from .pagination import StandardPagination
-from django.db import transaction
+from decimal import Decimal, InvalidOperation
+from .pagination import StandardPagination, KeysetPagination
 from django.shortcuts import render
-from django.utils import timezone
 from django.views import View
 from django.views.generic import TemplateView
 from rest_framework import viewsets, status
 from rest_framework.response import Response
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.authentication import BasicAuthentication
 from rest_framework.permissions import IsAuthenticated
 
+from library_app.conditional import conditional_get
+from library_app.export import EXPORT_FORMATS, export_response, keyset_batches, keyset_fields
+from library_app.idempotency import idempotent
+from library_app.purchase_service import purchase_service, PurchaseError
+from library_app.repositories.fetch_plan import FetchPlan
+from library_app.report_cache import report_cache
+from library_app.report_service import report_service, money_strings
+from library_app.sparse_fields import parse_field_paths, prune_serializer
+from library_app.utils import chart_cache
 from library_app.repositories.repository_manager import RepositoryManager
 from .serializers import (
     GameSerializer, DeveloperSerializer,
     PublisherSerializer, GenreSerializer, GameGenreSerializer,
     UserSerializer, LibrarySerializer, OrderSerializer,
     LibraryGameSerializer, OrderGameSerializer, ReviewSerializer,
-    GenrePlaytimeReportSerializer, MonthlyRevenueReportSerializer, DeveloperRevenueReportSerializer,
-    UserActivityReportSerializer, UserSpendingRankSerializer, WhalesGenreBreakdownSerializer, TopRatedGameSerializer
+    BalanceLedgerSerializer,
 )
 
 repo_manager = RepositoryManager()
@@ -30,11 +36,80 @@ class BaseViewSet(viewsets.ViewSet):
     authentication_classes = [BasicAuthentication]
     permission_classes = [IsAuthenticated]
     pagination_class = StandardPagination
+    keyset_pagination_class = KeysetPagination
+    # Групи звітів у report_cache, які застарівають після запису через цей viewset
+    report_cache_tags = ()
+    # None -> план вибірки виводиться з source-шляхів serializer_class
+    fetch_plan = None
+    # Таблиці, з яких складається відповідь list/retrieve; непорожній кортеж вмикає ETag, Last-Modified і 304
+    etag_tables = ()
+    max_bulk_items = 5000
+
+    def get_sparse_fieldset(self, request):
+        # ?fields=title,library_games.playtime_hours і ?expand=library_games діють лише на читання
+        if request.method != 'GET':
+            return None, None
+        params = request.query_params
+        return parse_field_paths(params.get('fields')), parse_field_paths(params.get('expand'))
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = self.serializer_class(*args, **kwargs)
+        fields, expand = self.get_sparse_fieldset(self.request)
+        if fields is not None or expand is not None:
+            prune_serializer(serializer, fields, expand)
+        return serializer
+
+    def get_fetch_plan(self):
+        if self.fetch_plan is not None:
+            return self.fetch_plan
+
+        fields, expand = self.get_sparse_fieldset(self.request)
+        if fields is None and expand is None:
+            return FetchPlan.for_serializer(self.serializer_class)
+        # План під урізаний серіалізатор: без зайвих JOIN/prefetch, а з ?fields= — і без зайвих колонок
+        return FetchPlan.from_serializer(self.get_serializer(), columns=fields is not None)
+
+    def get_etag_tables(self, request):
+        return self.etag_tables
+
+    def invalidate_caches(self):
+        if self.report_cache_tags:
+            report_cache.invalidate(*self.report_cache_tags)
+
+    def get_export_format(self, request):
+        # ?export=ndjson|csv: повна вибірка потоком замість сторінки; '' означає звичайну відповідь
+        export_format = request.query_params.get('export', '')
+        if export_format and export_format not in EXPORT_FORMATS:
+            raise ValidationError({'error': f'Непідтримуваний формат експорту. Доступні: {", ".join(EXPORT_FORMATS)}.'})
+        return export_format
+
+    def export(self, items, export_format, context=None):
+        serializer = self.get_serializer(context=context or {})
+        columns = [name for name, field in serializer.fields.items() if not field.write_only]
+
+        def rows():
+            for batch in keyset_batches(items):
+                for obj in batch:
+                    yield serializer.to_representation(obj)
+
+        return export_response(rows(), columns, export_format, self.basename or 'export')
+
+    def get_paginator(self, request):
+        if self.keyset_pagination_class and request.query_params.get('pagination') == 'cursor':
+            return self.keyset_pagination_class()
+        if self.pagination_class:
+            return self.pagination_class()
+        return None
+
+    @conditional_get
     def list(self, request):
-        items = self.repo.get_all()
+        export_format = self.get_export_format(request)
+        items = self.repo.get_all(fetch_plan=self.get_fetch_plan())
+        if export_format:
+            return self.export(items, export_format)
 
-        if self.pagination_class:
-            paginator = self.pagination_class()
+        paginator = self.get_paginator(request)
+        if paginator:
 
             page_size = request.query_params.get(paginator.page_size_query_param)
             if page_size:
@@ -46,23 +121,25 @@ class BaseViewSet(viewsets.ViewSet):
             page = paginator.paginate_queryset(items, request)
 
             if page is not None:
-                serializer = self.serializer_class(page, many=True)
+                serializer = self.get_serializer(page, many=True)
                 return paginator.get_paginated_response(serializer.data)
 
-        serializer = self.serializer_class(items, many=True)
+        serializer = self.get_serializer(items, many=True)
         return Response(serializer.data)
 
+    @conditional_get
     def retrieve(self, request, pk=None):
-        item = self.repo.get_by_id(pk)
+        item = self.repo.get_by_id(pk, fetch_plan=self.get_fetch_plan())
         if not item:
             return Response(status=status.HTTP_404_NOT_FOUND)
-        serializer = self.serializer_class(item)
+        serializer = self.get_serializer(item)
         return Response(serializer.data)
 
     def create(self, request):
         serializer = self.serializer_class(data=request.data)
         if serializer.is_valid():
             obj = self.repo.create(**serializer.validated_data)
+            self.invalidate_caches()
             return Response(self.serializer_class(obj).data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -73,15 +150,128 @@ class BaseViewSet(viewsets.ViewSet):
         serializer = self.serializer_class(item, data=request.data, partial=True)
         if serializer.is_valid():
             obj = self.repo.update(pk, **serializer.validated_data)
+            self.invalidate_caches()
             return Response(self.serializer_class(obj).data)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
     def destroy(self, request, pk=None):
         deleted = self.repo.delete(pk)
         if deleted:
+            self.invalidate_caches()
             return Response(status=status.HTTP_204_NO_CONTENT)
         return Response(status=status.HTTP_404_NOT_FOUND)
 
+    def _bulk_payload(self, request):
+        if not isinstance(request.data, list) or not request.data:
+            return None, Response({'error': 'Очікується непорожній список об’єктів.'},
+                                  status=status.HTTP_400_BAD_REQUEST)
+        if len(request.data) > self.max_bulk_items:
+            return None, Response({'error': f'Не більше {self.max_bulk_items} об’єктів за запит.'},
+                                  status=status.HTTP_400_BAD_REQUEST)
+        return request.data, None
+
+    def _item_pk(self, item):
+        if isinstance(item, dict):
+            return item.get('pk', item.get(self.repo.model._meta.pk.name))
+        return item
+
+    def _indexed_errors(self, errors):
+        # ListSerializer.errors — список за позиціями, але залежно від версії DRF і типу помилки
+        # буває словником {індекс: помилки} або {'non_field_errors': [...]}
+        if isinstance(errors, dict):
+            return [
+                (int(key) if str(key).isdigit() else None, value)
+                for key, value in errors.items()
+            ]
+        return list(enumerate(errors))
+
+    def _serialize_bulk(self, objs):
+        fresh = self.repo.get_in_bulk([obj.pk for obj in objs], fetch_plan=self.get_fetch_plan())
+        return [self.serializer_class(fresh.get(obj.pk, obj)).data for obj in objs]
+
+    @action(detail=False, methods=['post'], url_path='bulk')
+    def bulk_create(self, request):
+        items, error = self._bulk_payload(request)
+        if error:
+            return error
+
+        serializer = self.serializer_class(data=items, many=True)
+        if not serializer.is_valid():
+            results = [
+                {'index': index, 'status': 'invalid', 'errors': errors}
+                for index, errors in self._indexed_errors(serializer.errors) if errors
+            ]
+            return Response(results, status=status.HTTP_400_BAD_REQUEST)
+
+        objs = self.repo.bulk_create(serializer.validated_data)
+        self.invalidate_caches()
+
+        results = [
+            {'index': index, 'status': 'created', 'data': data}
+            for index, data in enumerate(self._serialize_bulk(objs))
+        ]
+        return Response(results, status=status.HTTP_201_CREATED)
+
+    @bulk_create.mapping.patch
+    def bulk_update(self, request):
+        items, error = self._bulk_payload(request)
+        if error:
+            return error
+
+        pks = [self._item_pk(item) for item in items]
+        try:
+            found = self.repo.get_in_bulk([pk for pk in pks if pk is not None])
+        except (TypeError, ValueError):
+            return Response({'error': 'Некоректний формат ID.'}, status=status.HTTP_400_BAD_REQUEST)
+        instances = {str(key): obj for key, obj in found.items()}
+
+        changes = []
+        results = []
+        for index, (pk, item) in enumerate(zip(pks, items)):
+            instance = instances.get(str(pk))
+            if instance is None:
+                results.append({'index': index, 'pk': pk, 'status': 'not_found'})
+                continue
+
+            serializer = self.serializer_class(instance, data=item, partial=True)
+            if not serializer.is_valid():
+                results.append({'index': index, 'pk': pk, 'status': 'invalid', 'errors': serializer.errors})
+                continue
+
+            changes.append((instance, serializer.validated_data))
+
+        if results:
+            return Response(results, status=status.HTTP_400_BAD_REQUEST)
+
+        objs = self.repo.bulk_update(changes)
+        self.invalidate_caches()
+
+        results = [
+            {'index': index, 'pk': obj.pk, 'status': 'updated', 'data': data}
+            for index, (obj, data) in enumerate(zip(objs, self._serialize_bulk(objs)))
+        ]
+        return Response(results)
+
+    @bulk_create.mapping.delete
+    def bulk_delete(self, request):
+        items, error = self._bulk_payload(request)
+        if error:
+            return error
+
+        pks = [self._item_pk(item) for item in items]
+        try:
+            deleted = {str(pk) for pk in self.repo.bulk_delete([pk for pk in pks if pk is not None])}
+        except (TypeError, ValueError):
+            return Response({'error': 'Некоректний формат ID.'}, status=status.HTTP_400_BAD_REQUEST)
+        if deleted:
+            self.invalidate_caches()
+
+        results = [
+            {'index': index, 'pk': pk, 'status': 'deleted' if str(pk) in deleted else 'not_found'}
+            for index, pk in enumerate(pks)
+        ]
+        return Response(results)
+
 class UserViewSet(BaseViewSet):
     repo = repo_manager.users
     serializer_class = UserSerializer
@@ -106,6 +296,7 @@ class UserViewSet(BaseViewSet):
 
 
     @action(detail=True, methods=['post'])
+    @idempotent('top_up')
     def top_up(self, request, pk=None):
         amount = request.data.get('amount')
 
@@ -114,57 +305,109 @@ class UserViewSet(BaseViewSet):
             if amount <= 0:
                 return Response({'error': 'Сума поповнення повинна бути позитивною.'},
                                 status=status.HTTP_400_BAD_REQUEST)
-        except (TypeError, ValueError):
+        except (TypeError, ValueError, InvalidOperation):
             return Response({'error': 'Некоректна сума.'},
                             status=status.HTTP_400_BAD_REQUEST)
 
-        user = self.repo.get_by_id(pk)
-        if not user:
+        try:
+            new_balance = self.repo.change_balance(pk, amount, 'top_up')
+        except (TypeError, ValueError):
             return Response(status=status.HTTP_404_NOT_FOUND)
+        except Exception as e:
+            return Response({'error': f'Помилка поповнення: {str(e)}'},
+                            status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-        try:
-            with transaction.atomic():
-                new_balance = user.balance + amount
+        if new_balance is None:
+            return Response(status=status.HTTP_404_NOT_FOUND)
 
-                updated_user = self.repo.update(user.pk, balance=new_balance)
+        return Response({
+            'message': f'Баланс успішно поповнено на {amount} $',
+            'new_balance': new_balance
+        }, status=status.HTTP_200_OK)
 
-                return Response({
-                    'message': f'Баланс успішно поповнено на {amount} $',
-                    'new_balance': updated_user.balance
-                }, status=status.HTTP_200_OK)
+    @action(detail=True, methods=['get'], url_path='balance-history')
+    def balance_history(self, request, pk=None):
+        try:
+            user_exists = self.repo.model.objects.filter(pk=pk).exists()
+        except (TypeError, ValueError):
+            user_exists = False
+        if not user_exists:
+            return Response({'error': 'Користувача не знайдено.'}, status=status.HTTP_404_NOT_FOUND)
 
-        except Exception as e:
-            return Response({'error': f'Помилка поповнення: {str(e)}'},
-                            status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        entries = self.repo.get_balance_history(pk)
+        paginator = self.keyset_pagination_class()
+        page = paginator.paginate_queryset(entries, request, view=self)
+        return paginator.get_paginated_response(BalanceLedgerSerializer(page, many=True).data)
 
 class GameViewSet(BaseViewSet):
     repo = repo_manager.games
     serializer_class = GameSerializer
     pagination_class = StandardPagination
-
+    report_cache_tags = ('catalog',)
+    etag_tables = ('game', 'genre', 'game_genre', 'developer', 'publisher')
+    # Поля ?ordering=, за якими курсорна пагінація каталогу може будувати keyset (rating_avg — nullable)
+    keyset_ordering_fields = ('game_id', 'title', 'price', 'release_date')
+
+    def get_etag_tables(self, request):
+        # is_owned у списку залежить від бібліотеки поточного користувача
+        if self.action == 'list' and request.user.is_authenticated:
+            return self.etag_tables + ('library_game',)
+        return self.etag_tables
+
+    @conditional_get
     def list(self, request):
-        items = self.repo.get_all()
+        params = request.query_params
+        export_format = self.get_export_format(request)
+        try:
+            min_price = Decimal(params['min_price']) if params.get('min_price') else None
+            max_price = Decimal(params['max_price']) if params.get('max_price') else None
+        except InvalidOperation:
+            return Response({'error': 'Некоректний діапазон цін.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        paginator = self.get_paginator(request)
+        ordering = params.get('ordering')
+        if ordering and isinstance(paginator, KeysetPagination) and not export_format \
+                and not paginator.supports_ordering(ordering, self.repo.model, view=self):
+            # Інакше курсор мовчки повернув би сторінки в порядку -pk замість запитаного
+            return Response(
+                {'error': f'Курсорна пагінація підтримує сортування лише за: {", ".join(self.keyset_ordering_fields)}.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        items = self.repo.search_catalog(
+            search=params.get('search'),
+            genre=params.get('genre'),
+            min_price=min_price,
+            max_price=max_price,
+            ordering=params.get('ordering'),
+            fetch_plan=self.get_fetch_plan()
+        )
+        if export_format and params.get('ordering') and keyset_fields(items) is None:
+            # Експорт іде пачками за ключем порядку; nullable колонку (rating_avg) так не продовжити
+            return Response({'error': 'Це сортування не підтримується для експорту.'},
+                            status=status.HTTP_400_BAD_REQUEST)
 
+        fields, _ = self.get_sparse_fieldset(request)
         user_owned_game_ids = set()
-        if request.user.is_authenticated:
+        if request.user.is_authenticated and (fields is None or 'is_owned' in fields):
             user_owned_game_ids = repo_manager.library_games.get_owned_game_ids_by_user(request.user.id)
 
-        if self.pagination_class:
-            try:
-                paginator = self.pagination_class()
-                page = paginator.paginate_queryset(items, request, view=self)
-
-                if page is not None:
-                    serializer = self.serializer_class(
-                        page,
-                        many=True,
-                        context={'user_owned_game_ids': user_owned_game_ids}
-                    )
-                    return paginator.get_paginated_response(serializer.data)
-            except Exception:
-                pass
+        if export_format:
+            return self.export(items, export_format, context={'user_owned_game_ids': user_owned_game_ids})
+
+        if paginator:
+            # Сторінка поза діапазоном чи зіпсований курсор — NotFound (404) з пагінатора, а не весь каталог
+            page = paginator.paginate_queryset(items, request, view=self)
+
+            if page is not None:
+                serializer = self.get_serializer(
+                    page,
+                    many=True,
+                    context={'user_owned_game_ids': user_owned_game_ids}
+                )
+                return paginator.get_paginated_response(serializer.data)
 
-        serializer = self.serializer_class(
+        serializer = self.get_serializer(
             items,
             many=True,
             context={'user_owned_game_ids': user_owned_game_ids}
@@ -192,61 +435,103 @@ class GameViewSet(BaseViewSet):
 
         return Response({'is_owned': is_owned})
 
-    @action(detail=False, methods=['post'], url_path='buy')
-    def buy_game(self, request):
-        user_id = request.data.get('user_id')
-        game_id = request.data.get('game_id')
+    @action(detail=False, methods=['post'], url_path='retag')
+    def retag(self, request):
+        genres_by_game = request.data.get('genres_by_game')
 
         try:
-            user = repo_manager.users.get_by_id(user_id)
-            game = repo_manager.games.get_by_id(game_id)
-        except Exception:
-            return Response({'error': 'Некоректний формат ID.'}, status=status.HTTP_400_BAD_REQUEST)
-
-        if not user or not game:
-            return Response({'error': 'Користувача або гру не знайдено.'}, status=status.HTTP_404_NOT_FOUND)
+            if genres_by_game is not None:
+                genres_by_game = {
+                    int(game_id): {int(genre_id) for genre_id in genre_ids}
+                    for game_id, genre_ids in genres_by_game.items()
+                }
+                game_ids = set(genres_by_game)
+                genre_ids = set().union(*genres_by_game.values())
+            else:
+                game_ids = {int(game_id) for game_id in request.data.get('game_ids', [])}
+                add = {int(genre_id) for genre_id in request.data.get('add', [])}
+                remove = {int(genre_id) for genre_id in request.data.get('remove', [])}
+                genre_ids = add | remove
+        except (AttributeError, TypeError, ValueError):
+            return Response({'error': 'ID ігор та жанрів мають бути цілими числами.'},
+                            status=status.HTTP_400_BAD_REQUEST)
 
-        library = repo_manager.libraries.get_by_user(user)
-        if library:
-            if repo_manager.library_games.is_game_in_library(library.pk, game.pk):
-                return Response({'error': f'Гра "{game.title}" вже є у вашій бібліотеці.'},
-                                status=status.HTTP_400_BAD_REQUEST)
+        if not game_ids:
+            return Response({'error': 'Потрібен непорожній список ігор.'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(game_ids) > self.max_bulk_items:
+            return Response({'error': f'Не більше {self.max_bulk_items} ігор за запит.'},
+                            status=status.HTTP_400_BAD_REQUEST)
 
-        if user.balance < game.price:
-            return Response({'error': 'Недостатньо коштів на балансі.'}, status=status.HTTP_400_BAD_REQUEST)
+        missing_games = game_ids - set(self.repo.get_in_bulk(game_ids))
+        missing_genres = genre_ids - set(repo_manager.genres.get_in_bulk(genre_ids))
+        if missing_games or missing_genres:
+            return Response({
+                'error': 'Деякі ігри або жанри не знайдено.',
+                'missing_games': sorted(missing_games),
+                'missing_genres': sorted(missing_genres)
+            }, status=status.HTTP_404_NOT_FOUND)
+
+        if genres_by_game is not None:
+            result = self.repo.sync_genres(genres_by_game)
+            result['games'] = len(game_ids)
+        else:
+            result = self.repo.retag_games(game_ids, add=add, remove=remove)
 
-        try:
-            with transaction.atomic():
-                user.balance -= game.price
-                repo_manager.users.update(user.pk, balance=user.balance)
+        if result['added'] or result['removed']:
+            self.invalidate_caches()
 
-                order_obj = repo_manager.orders.create(user=user, total_amount=game.price, status='complete')
-                repo_manager.order_games.create(order=order_obj, game=game, price_at_purchase=game.price)
+        return Response(result)
 
-                if not library:
-                    library = repo_manager.libraries.create(user=user)
+    @action(detail=False, methods=['post'], url_path='buy')
+    @idempotent('buy')
+    def buy_game(self, request):
+        try:
+            user, game, _ = purchase_service.buy_game(request.data.get('user_id'), request.data.get('game_id'))
+        except PurchaseError as e:
+            return Response({'error': e.message}, status=e.status_code)
+        except Exception as e:
+            return Response({'error': f'Помилка транзакції: {type(e).__name__}: {str(e)}'},
+                            status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-                repo_manager.library_games.create(
-                    library=library,
-                    game=game,
-                    purchase_date=timezone.now()
-                )
+        return Response({
+            'message': f'Гра "{game.title}" успішно куплена!',
+            'new_balance': user.balance
+        }, status=status.HTTP_200_OK)
 
-            return Response({
-                'message': f'Гра "{game.title}" успішно куплена!',
-                'new_balance': user.balance
-            }, status=status.HTTP_200_OK)
+    @action(detail=False, methods=['post'], url_path='checkout')
+    @idempotent('checkout')
+    def checkout(self, request):
+        game_ids = request.data.get('game_ids')
+        if not isinstance(game_ids, list):
+            return Response({'error': 'Потрібен список game_ids.'}, status=status.HTTP_400_BAD_REQUEST)
 
+        try:
+            user, order_obj, results = purchase_service.checkout(request.data.get('user_id'), game_ids)
+        except PurchaseError as e:
+            payload = {'error': e.message}
+            if e.results is not None:
+                payload['results'] = e.results
+            return Response(payload, status=e.status_code)
         except Exception as e:
             return Response({'error': f'Помилка транзакції: {type(e).__name__}: {str(e)}'},
                             status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+        purchased = sum(1 for result in results if result['status'] == 'purchased')
+        return Response({
+            'message': f'Куплено ігор: {purchased} з {len(results)}.',
+            'order_id': order_obj.pk,
+            'total_amount': order_obj.total_amount,
+            'new_balance': user.balance,
+            'results': results
+        }, status=status.HTTP_200_OK)
+
 
 
 class OrderViewSet(BaseViewSet):
     repo = repo_manager.orders
     serializer_class = OrderSerializer
     pagination_class = StandardPagination
+    report_cache_tags = ('purchases',)
 
 
 
@@ -254,15 +539,16 @@ class LibraryViewSet(BaseViewSet):
     repo = repo_manager.libraries
     serializer_class = LibrarySerializer
     pagination_class = StandardPagination
+    report_cache_tags = ('purchases', 'playtime')
 
     def list(self, request):
         user_id = request.query_params.get('user')
 
         if user_id:
             try:
-                library = self.repo.get_by_user(user_id)
+                library = self.repo.get_by_user(user_id, fetch_plan=self.get_fetch_plan())
                 if library:
-                    serializer = self.serializer_class(library)
+                    serializer = self.get_serializer(library)
                     return Response([serializer.data])
                 else:
                     return Response([])
@@ -276,12 +562,14 @@ class LibraryGameViewSet(BaseViewSet):
     repo = repo_manager.library_games
     serializer_class = LibraryGameSerializer
     pagination_class = StandardPagination
+    report_cache_tags = ('playtime',)
 
 
 class OrderGameViewSet(BaseViewSet):
     repo = repo_manager.order_games
     serializer_class = OrderGameSerializer
     pagination_class = StandardPagination
+    report_cache_tags = ('purchases',)
 
 
 
@@ -289,27 +577,35 @@ class DeveloperViewSet(BaseViewSet):
     repo = repo_manager.developers
     serializer_class = DeveloperSerializer
     pagination_class = StandardPagination
+    report_cache_tags = ('catalog',)
+    etag_tables = ('developer',)
 
 
 class PublisherViewSet(BaseViewSet):
     repo = repo_manager.publishers
     serializer_class = PublisherSerializer
     pagination_class = StandardPagination
+    report_cache_tags = ('catalog',)
+    etag_tables = ('publisher',)
 
 class GenreViewSet(BaseViewSet):
     repo = repo_manager.genres
     serializer_class = GenreSerializer
     pagination_class = StandardPagination
+    report_cache_tags = ('catalog',)
+    etag_tables = ('genre',)
 
 class GameGenreViewSet(BaseViewSet):
     repo = repo_manager.game_genres
     serializer_class = GameGenreSerializer
     pagination_class = StandardPagination
+    report_cache_tags = ('catalog',)
 
 class ReviewViewSet(BaseViewSet):
     repo = repo_manager.reviews
     serializer_class = ReviewSerializer
     pagination_class = StandardPagination
+    report_cache_tags = ('reviews',)
 
     @action(detail=False, methods=['get'])
     def by_game(self,request):
@@ -317,8 +613,8 @@ class ReviewViewSet(BaseViewSet):
         if not game_id:
             return Response({'error'},status=status.HTTP_400_BAD_REQUEST)
         try:
-            reviews = self.repo.get_reviews_by_game(game_id)
-            serializer = self.serializer_class(reviews,many=True)
+            reviews = self.repo.get_reviews_by_game(game_id, fetch_plan=self.get_fetch_plan())
+            serializer = self.get_serializer(reviews,many=True)
             return Response(serializer.data)
         except Exception as e:
             return Response({'error': f'Помилка: {e}'}, status=status.HTTP_400_BAD_REQUEST)
@@ -326,6 +622,13 @@ class ReviewViewSet(BaseViewSet):
 
 class ReportViewSet(viewsets.ViewSet):
 
+    @action(detail=False, methods=['get'], url_path='cache-stats')
+    def cache_stats(self, request):
+        return Response({
+            'reports': report_cache.stats(),
+            'charts': chart_cache.stats(),
+        })
+
     @action(detail=False, methods=['get'], url_path='genre-playtime')
     def playtime_ranking(self, request):
         min_unique_games_str = request.query_params.get('min_unique_games', '5')
@@ -335,69 +638,32 @@ class ReportViewSet(viewsets.ViewSet):
         except ValueError:
             min_games = 5
 
-        report_data_qs = repo_manager.genres.get_top_genres_by_playtime(min_games_count=min_games)
-
-        serializer = GenrePlaytimeReportSerializer(report_data_qs, many=True)
-        list_of_dicts = serializer.data
-
-        df = pd.DataFrame(list_of_dicts)
-        analytics_stats = {}
-
-        if not df.empty:
-            df['avg_playtime_per_copy'] = pd.to_numeric(df['avg_playtime_per_copy'], errors='coerce')
-            df['unique_game_count'] = pd.to_numeric(df['unique_game_count'], errors='coerce')
-
-            analytics_stats = {
-                "mean_avg_playtime": round(df['avg_playtime_per_copy'].mean(), 2),
-                "max_avg_playtime": round(df['avg_playtime_per_copy'].max(), 2),
-                "min_avg_playtime": round(df['avg_playtime_per_copy'].min(), 2),
-                "median_avg_playtime": round(df['avg_playtime_per_copy'].median(), 2),
-                "total_genres_in_report": df.shape[0],
-                "total_unique_games": df['unique_game_count'].sum(),
-            }
+        report = report_service.genre_playtime(min_games=min_games)
 
         return Response({
             "report_name": f"Top Genres by Playtime (Min Unique Games: {min_games})",
-            "time_series_data": list_of_dicts,
-            "analytics_stats": analytics_stats
+            "time_series_data": report['rows'],
+            "analytics_stats": report['analytics_stats']
         })
 
     @action(detail=False, methods=['get'], url_path='dev-revenue')
     def developer_revenue_report(self, request):
         year = request.query_params.get('year')
         top_n_str = request.query_params.get('top_n', 10)
-        report_data_all_qs = repo_manager.developers.get_revenue_report(year=year)
 
-        serializer = DeveloperRevenueReportSerializer(report_data_all_qs, many=True)
-        list_of_dicts = serializer.data
+        report = report_service.developer_revenue(year=year)
 
-        df = pd.DataFrame(list_of_dicts)
-        analytics_stats = {}
-
-        if not df.empty:
-            df['total_revenue'] = pd.to_numeric(df['total_revenue'], errors='coerce')
-            df['avg_price'] = pd.to_numeric(df['avg_price'], errors='coerce')
-
-            analytics_stats = {
-                "mean_revenue": round(df['total_revenue'].mean(), 2),
-                "median_revenue": round(df['total_revenue'].median(), 2),
-                "max_revenue": round(df['total_revenue'].max(), 2),
-                "min_revenue": round(df['total_revenue'].min(), 2),
-                "avg_price_mean": round(df['avg_price'].mean(), 2),
-                "total_developers_count": df.shape[0],
-            }
-
-        top_n_data = []
         try:
             top_n = int(top_n_str)
-            top_n_data = df.head(top_n).to_dict('records')
+            top_n_data = report['rows'][:top_n]
         except ValueError:
-            top_n_data = df.to_dict('records')
+            top_n = top_n_str
+            top_n_data = report['rows']
 
         return Response({
             "report_name": f"Developer Revenue Report (Top {top_n})",
             "developer_data": top_n_data,
-            "analytics_stats": analytics_stats
+            "analytics_stats": report['analytics_stats']
         })
 
     @action(detail=False, methods=['get'], url_path='monthly-revenue')
@@ -405,31 +671,12 @@ class ReportViewSet(viewsets.ViewSet):
         start_date = request.query_params.get('start_date')
         end_date = request.query_params.get('end_date')
 
-        report_data_qs = repo_manager.orders.get_monthly_revenue_report(
-            start_date_str=start_date,
-            end_date_str=end_date
-        )
-
-        serializer = MonthlyRevenueReportSerializer(report_data_qs, many=True)
-        list_of_dicts = serializer.data
-
-        df = pd.DataFrame(list_of_dicts)
-        analytics_stats = {}
-
-        if not df.empty:
-            df['total_revenue'] = pd.to_numeric(df['total_revenue'], errors='coerce')
-
-            analytics_stats = {
-                "total_period_revenue": round(df['total_revenue'].sum(), 2),
-                "mean_monthly_revenue": round(df['total_revenue'].mean(), 2),
-                "max_monthly_revenue": round(df['total_revenue'].max(), 2),
-                "months_in_report": df.shape[0],
-            }
+        report = report_service.monthly_revenue(start_date=start_date, end_date=end_date)
 
         return Response({
             "report_name": f"Monthly Revenue ({start_date or 'Start'} to {end_date or 'End'})",
-            "time_series_data": list_of_dicts,
-            "analytics_stats": analytics_stats
+            "time_series_data": money_strings(report['rows'], 'total_revenue'),
+            "analytics_stats": report['analytics_stats']
         })
 
     @action(detail=False, methods=['get'], url_path='top-rated-games')
@@ -448,42 +695,21 @@ class ReportViewSet(viewsets.ViewSet):
             min_price = None
             max_price = None
 
-        report_data_qs = repo_manager.games.get_top_rated_games_report(
+        report = report_service.top_rated_games(
             min_reviews=min_reviews,
             genre_name=genre_name,
             min_price=min_price,
             max_price=max_price
         )
 
-        serializer = TopRatedGameSerializer(report_data_qs, many=True)
-        list_of_dicts = serializer.data
-
-        df = pd.DataFrame(list_of_dicts)
-        analytics_stats = {}
-
-        if not df.empty:
-            df['avg_rating'] = pd.to_numeric(df['avg_rating'], errors='coerce')
-            df['reviews_count'] = pd.to_numeric(df['reviews_count'], errors='coerce')
-            df['price'] = pd.to_numeric(df['price'], errors='coerce')
-
-            analytics_stats = {
-                "total_games_in_report": df.shape[0],
-                "mean_avg_rating": round(df['avg_rating'].mean(), 2),
-                "max_avg_rating": round(df['avg_rating'].max(), 2),
-                "min_avg_rating": round(df['avg_rating'].min(), 2),
-                "median_avg_rating": round(df['avg_rating'].median(), 2),
-                "total_reviews": int(df['reviews_count'].sum()),
-                "mean_price": round(df['price'].mean(), 2)
-            }
-
         report_title = f"Top Rated Games (Min Reviews: {min_reviews})"
         if genre_name:
             report_title += f" in Genre: {genre_name.title()}"
 
         return Response({
             "report_name": report_title,
-            "time_series_data": list_of_dicts,
-            "analytics_stats": analytics_stats
+            "time_series_data": money_strings(report['rows'], 'price'),
+            "analytics_stats": report['analytics_stats']
         })
 
     @action(detail=False, methods=['get'], url_path='whales-analysis')
@@ -497,37 +723,17 @@ class ReportViewSet(viewsets.ViewSet):
         except ValueError:
             top_n = 10
 
-        spending_rank_qs = repo_manager.users.get_spending_rank(year=year)
-
-        spending_rank_data = spending_rank_qs[:top_n]
-        rank_serializer = UserSpendingRankSerializer(spending_rank_data, many=True)
-        rank_list = rank_serializer.data
-
+        selected_user_ids = None
         if user_ids_str:
             selected_user_ids = [int(uid) for uid in user_ids_str.split(',') if uid.isdigit()]
-        else:
-            selected_user_ids = [user['id'] for user in rank_list]
-
-        genre_breakdown_qs = repo_manager.users.get_whales_genre_breakdown(selected_user_ids)
-        breakdown_serializer = WhalesGenreBreakdownSerializer(genre_breakdown_qs, many=True)
-        genre_list = breakdown_serializer.data
 
-        analytics_stats = {}
-        if rank_list:
-            df_rank = pd.DataFrame(rank_list)
-            df_rank['total_spent'] = pd.to_numeric(df_rank['total_spent'], errors='coerce')
-
-            analytics_stats = {
-                "total_spending_top_n": round(df_rank['total_spent'].sum(), 2),
-                "avg_spending_per_user": round(df_rank['total_spent'].mean(), 2),
-                "total_orders_top_n": df_rank['orders_count'].sum(),
-            }
+        report = report_service.whales_analysis(year=year, top_n=top_n, user_ids=selected_user_ids)
 
         return Response({
             'report_name': f'Whales Analysis (Top {top_n} users, Year: {year or "All"})',
-            'spending_rank': rank_list,
-            'genre_breakdown': genre_list,
-            'analytics_stats': analytics_stats
+            'spending_rank': money_strings(report['spending_rank'], 'total_spent'),
+            'genre_breakdown': money_strings(report['genre_breakdown'], 'spent_on_genre'),
+            'analytics_stats': report['analytics_stats']
         })
 
     @action(detail=False, methods=['get'], url_path='user-activity')
@@ -535,48 +741,40 @@ class ReportViewSet(viewsets.ViewSet):
         min_playtime_str = request.query_params.get('min_playtime', 0)
         top_n_str = request.query_params.get('top_n')
 
-        report_data_qs = repo_manager.users.get_user_activity_report()
-
-        serializer = UserActivityReportSerializer(report_data_qs, many=True)
-        list_of_dicts = serializer.data
-
-        df = pd.DataFrame(list_of_dicts)
-        analytics_stats = {}
-        correlation = None
-
-        if not df.empty:
-            df['total_playtime'] = pd.to_numeric(df['total_playtime'], errors='coerce')
-            df['games_owned'] = pd.to_numeric(df['games_owned'], errors='coerce')
+        try:
+            min_playtime = int(min_playtime_str)
+        except ValueError:
+            min_playtime = None
 
+        top_n = None
+        if top_n_str:
             try:
-                min_playtime = int(min_playtime_str)
-                df = df[df['total_playtime'] >= min_playtime]
+                top_n = int(top_n_str)
             except ValueError:
                 pass
 
-            if not df.empty:
-                correlation_matrix = df[['total_playtime', 'games_owned']].corr()
-                correlation = round(correlation_matrix.loc['total_playtime', 'games_owned'], 4)
+        export_format = request.query_params.get('export', '')
+        if export_format:
+            if export_format not in EXPORT_FORMATS:
+                return Response({'error': f'Непідтримуваний формат експорту. Доступні: {", ".join(EXPORT_FORMATS)}.'},
+                                status=status.HTTP_400_BAD_REQUEST)
 
-                analytics_stats = {
-                    "total_active_users": df.shape[0],
-                    "mean_playtime": round(df['total_playtime'].mean(), 2),
-                    "median_games_owned": round(df['games_owned'].median(), 0),
-                    "p75_playtime": round(df['total_playtime'].quantile(0.75), 2),
-                    "playtime_games_correlation": correlation
-                }
+            rows = report_service.user_activity_export_rows(min_playtime=min_playtime)
+            if top_n is not None:
+                batches = [rows[:top_n]]
+            else:
+                batches = keyset_batches(rows)
+            return export_response(
+                (row for batch in batches for row in batch),
+                ['id', 'username', 'games_owned', 'total_playtime', 'avg_playtime_per_game'],
+                export_format,
+                'user-activity'
+            )
 
-        if top_n_str:
-            try:
-                top_n = int(top_n_str)
-                df_filtered = df.sort_values(by='total_playtime', ascending=False).head(top_n)
-            except ValueError:
-                df_filtered = df
-        else:
-            df_filtered = df
+        report = report_service.user_activity(min_playtime=min_playtime, top_n=top_n)
 
         return Response({
             "report_name": f"User Activity Report (Min Playtime: {min_playtime_str}h)",
-            "activity_data": df_filtered.to_dict('records'),
-            "analytics_stats": analytics_stats
-        })
\ No newline at end of file
+            "activity_data": report['rows'],
+            "analytics_stats": report['analytics_stats']
+        })
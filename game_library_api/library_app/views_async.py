@@ -0,0 +1,227 @@
+from django.http import JsonResponse
+from django.views.decorators.http import require_GET
+from rest_framework.utils.encoders import JSONEncoder
+
+from library_app.report_service import report_service, offload, money_strings
+from .utils import generate_monthly_revenue_bokeh_chart, generate_genre_playtime_bokeh_chart, \
+    generate_developer_revenue_bokeh_chart, generate_whales_analysis_bokeh_charts, \
+    generate_user_activity_bokeh_charts, generate_top_rated_games_bokeh_charts
+
+# Нативні async-версії ReportViewSet і views_bokeh: запити через async ORM, pandas/Bokeh — у report_executor,
+# тож під ASGI довгий звіт не займає робочий потік і каталог продовжує обслуговуватися
+
+
+def report_response(data):
+    return JsonResponse(data, encoder=JSONEncoder, safe=False)
+
+
+def _int_param(query, name, default):
+    try:
+        return int(query.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def _price_params(query):
+    try:
+        min_reviews = int(query.get('min_reviews', '10'))
+        min_price = float(query['min_price']) if query.get('min_price') else None
+        max_price = float(query['max_price']) if query.get('max_price') else None
+    except ValueError:
+        return 10, None, None
+    return min_reviews, min_price, max_price
+
+
+def _user_ids_param(query):
+    user_ids_str = query.get('user_ids')
+    if not user_ids_str:
+        return None
+    return [int(uid) for uid in user_ids_str.split(',') if uid.isdigit()]
+
+
+def _activity_params(query):
+    try:
+        min_playtime = int(query.get('min_playtime', 0))
+    except ValueError:
+        min_playtime = None
+
+    top_n = None
+    if query.get('top_n'):
+        try:
+            top_n = int(query['top_n'])
+        except ValueError:
+            pass
+    return min_playtime, top_n
+
+
+@require_GET
+async def genre_playtime_report(request):
+    min_games = _int_param(request.GET, 'min_unique_games', 5)
+    report = await report_service.agenre_playtime(min_games=min_games)
+
+    return report_response({
+        "report_name": f"Top Genres by Playtime (Min Unique Games: {min_games})",
+        "time_series_data": report['rows'],
+        "analytics_stats": report['analytics_stats']
+    })
+
+
+@require_GET
+async def developer_revenue_report(request):
+    year = request.GET.get('year')
+    top_n_str = request.GET.get('top_n', 10)
+
+    report = await report_service.adeveloper_revenue(year=year)
+
+    try:
+        top_n = int(top_n_str)
+        top_n_data = report['rows'][:top_n]
+    except ValueError:
+        top_n = top_n_str
+        top_n_data = report['rows']
+
+    return report_response({
+        "report_name": f"Developer Revenue Report (Top {top_n})",
+        "developer_data": top_n_data,
+        "analytics_stats": report['analytics_stats']
+    })
+
+
+@require_GET
+async def monthly_revenue_report(request):
+    start_date = request.GET.get('start_date')
+    end_date = request.GET.get('end_date')
+
+    report = await report_service.amonthly_revenue(start_date=start_date, end_date=end_date)
+
+    return report_response({
+        "report_name": f"Monthly Revenue ({start_date or 'Start'} to {end_date or 'End'})",
+        "time_series_data": money_strings(report['rows'], 'total_revenue'),
+        "analytics_stats": report['analytics_stats']
+    })
+
+
+@require_GET
+async def top_rated_games_report(request):
+    genre_name = request.GET.get('genre')
+    min_reviews, min_price, max_price = _price_params(request.GET)
+
+    report = await report_service.atop_rated_games(
+        min_reviews=min_reviews,
+        genre_name=genre_name,
+        min_price=min_price,
+        max_price=max_price
+    )
+
+    report_title = f"Top Rated Games (Min Reviews: {min_reviews})"
+    if genre_name:
+        report_title += f" in Genre: {genre_name.title()}"
+
+    return report_response({
+        "report_name": report_title,
+        "time_series_data": money_strings(report['rows'], 'price'),
+        "analytics_stats": report['analytics_stats']
+    })
+
+
+@require_GET
+async def whales_analysis_report(request):
+    year = request.GET.get('year')
+    top_n = _int_param(request.GET, 'top_n', 10)
+
+    report = await report_service.awhales_analysis(year=year, top_n=top_n, user_ids=_user_ids_param(request.GET))
+
+    return report_response({
+        'report_name': f'Whales Analysis (Top {top_n} users, Year: {year or "All"})',
+        'spending_rank': money_strings(report['spending_rank'], 'total_spent'),
+        'genre_breakdown': money_strings(report['genre_breakdown'], 'spent_on_genre'),
+        'analytics_stats': report['analytics_stats']
+    })
+
+
+@require_GET
+async def user_activity_report(request):
+    min_playtime, top_n = _activity_params(request.GET)
+
+    report = await report_service.auser_activity(min_playtime=min_playtime, top_n=top_n)
+
+    return report_response({
+        "report_name": f"User Activity Report (Min Playtime: {request.GET.get('min_playtime', 0)}h)",
+        "activity_data": report['rows'],
+        "analytics_stats": report['analytics_stats']
+    })
+
+
+@require_GET
+async def user_genre_breakdown(request):
+    user_ids = _user_ids_param(request.GET)
+    if not user_ids:
+        return report_response([])
+
+    return report_response(money_strings(await report_service.awhales_genre_breakdown(user_ids), 'spent_on_genre'))
+
+
+async def chart_response(render, *args, **kwargs):
+    script, div = await offload(lambda: render(*args, **kwargs))
+    return report_response({
+        "script": script,
+        "div": div
+    })
+
+
+@require_GET
+async def monthly_revenue_bokeh(request):
+    report = await report_service.amonthly_revenue(
+        start_date=request.GET.get('start_date'),
+        end_date=request.GET.get('end_date')
+    )
+    return await chart_response(generate_monthly_revenue_bokeh_chart, report['rows'])
+
+
+@require_GET
+async def genre_playtime_bokeh(request):
+    report = await report_service.agenre_playtime(min_games=_int_param(request.GET, 'min_unique_games', 5))
+    return await chart_response(generate_genre_playtime_bokeh_chart, report['rows'])
+
+
+@require_GET
+async def developer_revenue_bokeh(request):
+    report = await report_service.adeveloper_revenue(year=request.GET.get('year'))
+
+    list_of_dicts = report['rows']
+    try:
+        list_of_dicts = list_of_dicts[:int(request.GET.get('top_n', '10'))]
+    except ValueError:
+        pass
+    return await chart_response(generate_developer_revenue_bokeh_chart, list_of_dicts)
+
+
+@require_GET
+async def top_rated_games_bokeh(request):
+    min_reviews, min_price, max_price = _price_params(request.GET)
+    try:
+        top_n = int(request.GET.get('top_n', '10'))
+    except ValueError:
+        min_reviews, min_price, max_price, top_n = 10, None, None, 30
+
+    report = await report_service.atop_rated_games(
+        min_reviews=min_reviews,
+        genre_name=request.GET.get('genre'),
+        min_price=min_price,
+        max_price=max_price
+    )
+    return await chart_response(generate_top_rated_games_bokeh_charts, report['rows'], top_n=top_n)
+
+
+@require_GET
+async def whales_analysis_bokeh(request):
+    report = await report_service.awhales_analysis(year=request.GET.get('year'), top_n=_int_param(request.GET, 'top_n', 10))
+    return await chart_response(generate_whales_analysis_bokeh_charts, report['spending_rank'], report['genre_breakdown'])
+
+
+@require_GET
+async def user_activity_bokeh(request):
+    min_playtime, top_n = _activity_params(request.GET)
+
+    report = await report_service.auser_activity(min_playtime=min_playtime, top_n=top_n)
+    return await chart_response(generate_user_activity_bokeh_charts, report['rows'], report['correlation'])
@@ -1,30 +1,19 @@
 from rest_framework.response import Response
 from rest_framework.views import APIView
-import pandas as pd
 
-from library_app.repositories.repository_manager import RepositoryManager
-from library_app.serializers import MonthlyRevenueReportSerializer, GenrePlaytimeReportSerializer, \
-    DeveloperRevenueReportSerializer, TopRatedGameSerializer, WhalesGenreBreakdownSerializer, \
-    UserSpendingRankSerializer, UserActivityReportSerializer
+from library_app.report_service import report_service, money_strings
 from .utils import generate_monthly_revenue_bokeh_chart, generate_genre_playtime_bokeh_chart, \
     generate_developer_revenue_bokeh_chart, generate_whales_analysis_bokeh_charts, \
     generate_user_activity_bokeh_charts, generate_top_rated_games_bokeh_charts
 
-repo_manager = RepositoryManager()
 
 class MonthlyRevenueBokehAPIView(APIView):
     def get(self, request, *args, **kwargs):
         start_date = request.query_params.get('start_date')
         end_date = request.query_params.get('end_date')
 
-        report_data_qs = repo_manager.orders.get_monthly_revenue_report(
-            start_date_str=start_date,
-            end_date_str=end_date
-        )
-
-        serializer = MonthlyRevenueReportSerializer(report_data_qs, many=True)
-        list_of_dicts = serializer.data
-        script, div = generate_monthly_revenue_bokeh_chart(list_of_dicts)
+        report = report_service.monthly_revenue(start_date=start_date, end_date=end_date)
+        script, div = generate_monthly_revenue_bokeh_chart(report['rows'])
 
         return Response({
             "script": script,
@@ -38,11 +27,9 @@ class GenrePlaytimeBokehAPIView(APIView):
             min_games = int(min_unique_games_str)
         except ValueError:
             min_games = 5
-        report_data_qs = repo_manager.genres.get_top_genres_by_playtime(min_games_count=min_games)
 
-        serializer = GenrePlaytimeReportSerializer(report_data_qs, many=True)
-        list_of_dicts = serializer.data
-        script, div = generate_genre_playtime_bokeh_chart(list_of_dicts)
+        report = report_service.genre_playtime(min_games=min_games)
+        script, div = generate_genre_playtime_bokeh_chart(report['rows'])
 
         return Response({
             "script": script,
@@ -56,17 +43,13 @@ class DeveloperRevenueBokehAPIView(APIView):
         year = request.query_params.get('year')
         top_n_str = request.query_params.get('top_n', '10')
 
-        report_data_all_qs = repo_manager.developers.get_revenue_report(year=year)
-
-        serializer = DeveloperRevenueReportSerializer(report_data_all_qs, many=True)
-        list_of_dicts = serializer.data
-        if list_of_dicts:
-            df = pd.DataFrame(list_of_dicts)
-            try:
-                top_n = int(top_n_str)
-                list_of_dicts = df.head(top_n).to_dict('records')
-            except ValueError:
-                pass
+        report = report_service.developer_revenue(year=year)
+        list_of_dicts = report['rows']
+        try:
+            top_n = int(top_n_str)
+            list_of_dicts = list_of_dicts[:top_n]
+        except ValueError:
+            pass
         script, div = generate_developer_revenue_bokeh_chart(list_of_dicts)
 
         return Response({
@@ -94,17 +77,14 @@ class TopRatedGamesBokehAPIView(APIView):
             max_price = None
             top_n = 30
 
-        report_data_qs = repo_manager.games.get_top_rated_games_report(
+        report = report_service.top_rated_games(
             min_reviews=min_reviews,
             genre_name=genre_name,
             min_price=min_price,
             max_price=max_price
         )
 
-        serializer = TopRatedGameSerializer(report_data_qs, many=True)
-        list_of_dicts = serializer.data
-
-        script, div = generate_top_rated_games_bokeh_charts(list_of_dicts, top_n=top_n)
+        script, div = generate_top_rated_games_bokeh_charts(report['rows'], top_n=top_n)
 
         return Response({
             "script": script,
@@ -122,11 +102,7 @@ class UserGenreBreakdownAPIView(APIView):
 
         selected_user_ids = [int(uid) for uid in user_ids_str.split(',') if uid.isdigit()]
 
-        genre_breakdown_qs = repo_manager.users.get_whales_genre_breakdown(selected_user_ids)
-
-        breakdown_serializer = WhalesGenreBreakdownSerializer(genre_breakdown_qs, many=True)
-
-        return Response(breakdown_serializer.data)
+        return Response(money_strings(report_service.whales_genre_breakdown(selected_user_ids), 'spent_on_genre'))
 
 class WhalesAnalysisBokehAPIView(APIView):
     def get(self, request, *args, **kwargs):
@@ -138,18 +114,9 @@ class WhalesAnalysisBokehAPIView(APIView):
         except ValueError:
             top_n = 10
 
-        spending_rank_qs = repo_manager.users.get_spending_rank(year=year)
-        spending_rank_data = spending_rank_qs[:top_n]
-        rank_serializer = UserSpendingRankSerializer(spending_rank_data, many=True)
-        rank_list = rank_serializer.data
-
-        selected_user_ids = [user['id'] for user in rank_list]
-
-        genre_breakdown_qs = repo_manager.users.get_whales_genre_breakdown(selected_user_ids)
-        breakdown_serializer = WhalesGenreBreakdownSerializer(genre_breakdown_qs, many=True)
-        genre_list = breakdown_serializer.data
+        report = report_service.whales_analysis(year=year, top_n=top_n)
 
-        script, div = generate_whales_analysis_bokeh_charts(rank_list, genre_list)
+        script, div = generate_whales_analysis_bokeh_charts(report['spending_rank'], report['genre_breakdown'])
 
         return Response({
             "script": script,
@@ -163,45 +130,23 @@ class UserActivityBokehAPIView(APIView):
         min_playtime_str = request.query_params.get('min_playtime', 0)
         top_n_str = request.query_params.get('top_n')
 
-        report_data_qs = repo_manager.users.get_user_activity_report()
-        serializer = UserActivityReportSerializer(report_data_qs, many=True)
-        list_of_dicts = serializer.data
-
-        df = pd.DataFrame(list_of_dicts)
-        correlation = None
-
-        if not df.empty:
-            df['total_playtime'] = pd.to_numeric(df['total_playtime'], errors='coerce')
-            df['games_owned'] = pd.to_numeric(df['games_owned'], errors='coerce')
-            df.dropna(subset=['total_playtime', 'games_owned'], inplace=True)
+        try:
+            min_playtime = int(min_playtime_str)
+        except ValueError:
+            min_playtime = None
 
+        top_n = None
+        if top_n_str:
             try:
-                min_playtime = int(min_playtime_str)
-                df = df[df['total_playtime'] >= min_playtime]
+                top_n = int(top_n_str)
             except ValueError:
                 pass
 
-            if not df.empty:
-                if df[['total_playtime', 'games_owned']].notna().all().all():
-                    correlation_matrix = df[['total_playtime', 'games_owned']].corr()
-                    correlation = round(correlation_matrix.loc['total_playtime', 'games_owned'], 4)
-
-            if top_n_str:
-                try:
-                    top_n = int(top_n_str)
-                    df_filtered = df.sort_values(by='total_playtime', ascending=False).head(top_n)
-                except ValueError:
-                    df_filtered = df
-            else:
-                df_filtered = df
-        else:
-            df_filtered = pd.DataFrame()
+        report = report_service.user_activity(min_playtime=min_playtime, top_n=top_n)
 
-        activity_data_dicts_filtered = df_filtered.to_dict('records')
-
-        script, div = generate_user_activity_bokeh_charts(activity_data_dicts_filtered, correlation)
+        script, div = generate_user_activity_bokeh_charts(report['rows'], report['correlation'])
 
         return Response({
             "script": script,
             "div": div
-        })
\ No newline at end of file
+        })
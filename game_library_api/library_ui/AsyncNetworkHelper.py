@@ -0,0 +1,94 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import connection
+
+PREFETCH_TTL = 30
+PREFETCH_MAX_PAGES = 32
+
+
+class AsyncNetworkHelper:
+    # Асинхронний фасад над синхронним NetworkHelper (не async HTTP-клієнт): кожен виклик виконується
+    # в окремому потоці через asyncio.to_thread і бере keep-alive з'єднання з пулу сесії, тож незалежні
+    # запити сторінки йдуть одночасно, але кожен займає потік
+    def __init__(self, helper):
+        self.helper = helper
+
+        # Фонове завантаження наступної сторінки каталогу; окремий пул, бо event loop запиту під WSGI
+        # закривається разом із відповіддю і не дочекався б asyncio-задачі
+        self._prefetch_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='catalog-prefetch')
+        self._prefetched = OrderedDict()
+        self._prefetch_lock = threading.Lock()
+        # Покупки й поповнення йдуть і через синхронний NetworkHelper (buy_game_view, top_up_balance_view):
+        # його інвалідація скидає й сторінки, завантажені до запису
+        helper.add_invalidation_listener(self._on_invalidate)
+
+    def _invoke(self, method, *args, **kwargs):
+        try:
+            return method(*args, **kwargs)
+        finally:
+            # In-process транспорт ходить у БД з робочого потоку — не лишаємо там відкритих з'єднань
+            if self.helper.transport.in_process:
+                connection.close()
+
+    async def _call(self, method, *args, **kwargs):
+        return await asyncio.to_thread(self._invoke, method, *args, **kwargs)
+
+    def _page_key(self, page, page_size, filters):
+        return page, page_size, tuple(sorted((filters or {}).items()))
+
+    def prefetch_games_page(self, page, page_size=None, filters=None):
+        key = self._page_key(page, page_size, filters)
+        with self._prefetch_lock:
+            if key in self._prefetched:
+                return
+            future = self._prefetch_executor.submit(
+                self._invoke, self.helper.get_all_games, page=page, page_size=page_size, filters=filters
+            )
+            self._prefetched[key] = (time.monotonic() + PREFETCH_TTL, future)
+            while len(self._prefetched) > PREFETCH_MAX_PAGES:
+                self._prefetched.popitem(last=False)
+
+    async def get_all_games(self, page=None, page_size=None, filters=None):
+        with self._prefetch_lock:
+            prefetched = self._prefetched.pop(self._page_key(page, page_size, filters), None)
+
+        if prefetched and prefetched[0] > time.monotonic():
+            result = await asyncio.wrap_future(prefetched[1])
+            if result:
+                return result
+
+        return await self._call(self.helper.get_all_games, page=page, page_size=page_size, filters=filters)
+
+    async def get_game_details(self, game_id):
+        return await self._call(self.helper.get_game_details, game_id)
+
+    async def get_user_data(self, user_id):
+        return await self._call(self.helper.get_user_data, user_id)
+
+    def clear_prefetched(self):
+        with self._prefetch_lock:
+            self._prefetched.clear()
+
+    def _on_invalidate(self, name, url=None):
+        # Сторінки, завантажені до покупки чи поповнення, показували б старий стан каталогу
+        if name in ('get_all_games', 'get_user_data'):
+            self.clear_prefetched()
+
+    async def buy_game(self, user_id, game_id, idempotency_key=None):
+        return await self._call(self.helper.buy_game, user_id, game_id, idempotency_key)
+
+    async def top_up_balance(self, user_id, amount, idempotency_key=None):
+        return await self._call(self.helper.top_up_balance, user_id, amount, idempotency_key)
+
+    async def get_user_library(self, user_id):
+        return await self._call(self.helper.get_user_library, user_id)
+
+    async def check_if_owned_by_api(self, user_id, game_id):
+        return await self._call(self.helper.check_if_owned_by_api, user_id, game_id)
+
+    def latency_stats(self):
+        return self.helper.latency_stats()
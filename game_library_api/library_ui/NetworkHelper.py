@@ -1,62 +1,219 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict, defaultdict
+
 import requests
+from requests.adapters import HTTPAdapter
 from requests.auth import HTTPBasicAuth
+from urllib3.util.retry import Retry
+
+from .transports import HttpTransport
+
+IDEMPOTENT_RETRIES = 3
+IDEMPOTENT_BACKOFF = 0.2
+
+DEFAULT_POOL_SIZE = 20
+DEFAULT_CONNECT_TIMEOUT = 3.05
+DEFAULT_READ_TIMEOUT = 10
+DEFAULT_GET_RETRIES = 2
+GET_RETRY_BACKOFF = 0.2
+DEFAULT_CACHE_SIZE = 256
+# Сторінці бібліотеки потрібні лише назва, розробник і час гри, а не повний GameSerializer кожної гри
+LIBRARY_FIELDS = ','.join([
+    'library_games.playtime_hours',
+    'library_games.game_data.game_id',
+    'library_games.game_data.title',
+    'library_games.game_data.developer_name',
+])
 
 
 class NetworkHelper:
-    def __init__(self, base_url, auth):
+    def __init__(self, base_url, auth, pool_size=DEFAULT_POOL_SIZE, connect_timeout=DEFAULT_CONNECT_TIMEOUT,
+                 read_timeout=DEFAULT_READ_TIMEOUT, get_retries=DEFAULT_GET_RETRIES, transport=None,
+                 cache_ttls=None, cache_size=DEFAULT_CACHE_SIZE):
         self.API_BASE_URL = base_url
         self.AUTH = auth
+        self.timeout = (connect_timeout, read_timeout)
+        self.session = self._build_session(pool_size, get_retries)
+        # HTTP за замовчуванням; InProcessTransport, коли UI та API працюють в одному процесі
+        self.transport = transport or HttpTransport(self.session)
+
+        self._stats_lock = threading.Lock()
+        self._latency = defaultdict(
+            lambda: {'calls': 0, 'errors': 0, 'cache_hits': 0, 'total_ms': 0.0, 'max_ms': 0.0}
+        )
+
+        # LRU (url, params) -> (виклик, ETag, тіло, термін свіжості). Поки запис свіжий за TTL виклику,
+        # запит не надсилається; застарілий перевіряється через If-None-Match. Без TTL — лише ревалідація
+        self.cache_ttls = dict(cache_ttls or {})
+        self.cache_size = cache_size
+        self._cache_lock = threading.Lock()
+        self._cache = OrderedDict()
+        # Інші сховища відповідей поверх цього хелпера (попередньо завантажені сторінки AsyncNetworkHelper)
+        self._invalidation_listeners = []
+
+    def _build_session(self, pool_size, get_retries):
+        session = requests.Session()
+        # Basic auth задається на сесії, keep-alive з'єднання беруться з пулу адаптера
+        session.auth = self.AUTH
+
+        # Повтори лише для ідемпотентних методів: POST повторює _post_idempotent з Idempotency-Key
+        retry = Retry(
+            total=get_retries,
+            backoff_factor=GET_RETRY_BACKOFF,
+            status_forcelist=(502, 503, 504),
+            allowed_methods=frozenset(['GET', 'HEAD']),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+    def _record_latency(self, name, elapsed_ms, failed):
+        with self._stats_lock:
+            stats = self._latency[name]
+            stats['calls'] += 1
+            stats['errors'] += int(failed)
+            stats['total_ms'] += elapsed_ms
+            stats['max_ms'] = max(stats['max_ms'], elapsed_ms)
+
+    def _record_cache_hit(self, name):
+        with self._stats_lock:
+            self._latency[name]['cache_hits'] += 1
+
+    def _request(self, name, method, url, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        started = time.perf_counter()
+        failed = True
+        try:
+            response = self.transport.request(method, url, **kwargs)
+            failed = response.status_code >= 500
+            return response
+        finally:
+            self._record_latency(name, (time.perf_counter() - started) * 1000, failed)
+
+    def latency_stats(self):
+        with self._stats_lock:
+            snapshot = {name: dict(stats) for name, stats in self._latency.items()}
+
+        for stats in snapshot.values():
+            stats['avg_ms'] = round(stats['total_ms'] / stats['calls'], 2) if stats['calls'] else None
+            stats['total_ms'] = round(stats['total_ms'], 2)
+            stats['max_ms'] = round(stats['max_ms'], 2)
+        return snapshot
+
+    def close(self):
+        self.session.close()
+
+    def _store(self, key, entry):
+        with self._cache_lock:
+            self._cache[key] = entry
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def _get_cached(self, name, url, params=None):
+        key = (url, tuple(sorted((params or {}).items())))
+        ttl = self.cache_ttls.get(name, 0)
+        now = time.monotonic()
+
+        with self._cache_lock:
+            cached = self._cache.get(key)
+            if cached:
+                self._cache.move_to_end(key)
 
-    def get_all_games(self, page=None, page_size=None):
+        if cached and cached[3] > now:
+            self._record_cache_hit(name)
+            return cached[2]
+
+        # Надсилає If-None-Match із попереднім ETag; на 304 повертає збережене тіло без повторного JSON-розбору
+        headers = {'If-None-Match': cached[1]} if cached and cached[1] else None
+        response = self._request(name, 'GET', url, params=params, headers=headers)
+
+        if response.status_code == 304 and cached:
+            self._store(key, (name, cached[1], cached[2], now + ttl))
+            return cached[2]
+
+        response.raise_for_status()
+        data = response.json()
+
+        etag = response.headers.get('ETag')
+        if (etag or ttl) and self.cache_size:
+            self._store(key, (name, etag, data, now + ttl))
+        return data
+
+    def add_invalidation_listener(self, callback):
+        self._invalidation_listeners.append(callback)
+
+    def invalidate_cache(self, name, url=None):
+        with self._cache_lock:
+            stale = [key for key, entry in self._cache.items() if entry[0] == name and url in (None, key[0])]
+            for key in stale:
+                del self._cache[key]
+        for callback in self._invalidation_listeners:
+            callback(name, url)
+
+    def _post_idempotent(self, name, url, payload, idempotency_key=None):
+        # Один ключ на всі спроби: сервер виконає операцію лише раз і поверне збережену відповідь на повтор
+        headers = {'Idempotency-Key': idempotency_key or uuid.uuid4().hex}
+
+        for attempt in range(IDEMPOTENT_RETRIES):
+            last_attempt = attempt == IDEMPOTENT_RETRIES - 1
+            try:
+                response = self._request(name, 'POST', url, json=payload, headers=headers)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                if last_attempt:
+                    raise
+            else:
+                # 409 — перша спроба з цим ключем ще виконується на сервері
+                if response.status_code != 409 or last_attempt:
+                    return response
+
+            time.sleep(IDEMPOTENT_BACKOFF * 2 ** attempt)
+
+    def get_all_games(self, page=None, page_size=None, filters=None):
         try:
-            params = {}
+            params = dict(filters or {})
             if page is not None:
                 params['page'] = page
             if page_size is not None:
                 params['page_size'] = page_size
 
-            response = requests.get(
-                self.API_BASE_URL + 'games/',
-                auth=self.AUTH,
-                params=params
-            )
-            response.raise_for_status()
-            return response.json()
+            return self._get_cached('get_all_games', self.API_BASE_URL + 'games/', params=params)
         except requests.exceptions.RequestException as e:
             print(f"Помилка отримання ігор: {e}")
             return []
 
     def get_game_details(self, game_id):
         try:
-            response = requests.get(
-                f"{self.API_BASE_URL}games/{game_id}/",
-                auth=self.AUTH
-            )
-            response.raise_for_status()
-            return response.json()
+            return self._get_cached('get_game_details', f"{self.API_BASE_URL}games/{game_id}/")
         except requests.exceptions.RequestException:
             return None
 
     def get_user_data(self, user_id):
         try:
-            response = requests.get(f"{self.API_BASE_URL}users/{user_id}/data/", auth=self.AUTH)
-            response.raise_for_status()
-            return response.json()
+            return self._get_cached('get_user_data', f"{self.API_BASE_URL}users/{user_id}/data/")
         except requests.exceptions.RequestException:
             return {"error": "Не вдалося отримати дані користувача"}
 
-    def buy_game(self, user_id, game_id):
+    def buy_game(self, user_id, game_id, idempotency_key=None):
         payload = {
             "user_id": user_id,
             "game_id": game_id
         }
         try:
-            response = requests.post(
+            response = self._post_idempotent(
+                'buy_game',
                 self.API_BASE_URL + 'games/buy/',
-                json=payload,
-                auth=self.AUTH
+                payload,
+                idempotency_key
             )
             response.raise_for_status()
+            # Покупка змінює баланс і прапорці is_owned у каталозі
+            self.invalidate_cache('get_user_data', f"{self.API_BASE_URL}users/{user_id}/data/")
+            self.invalidate_cache('get_all_games')
             return response.json()
         except requests.exceptions.HTTPError as e:
             if e.response.content:
@@ -65,13 +222,14 @@ class NetworkHelper:
         except requests.exceptions.RequestException:
             return {"error": "Збій зв'язку з API-сервером."}
 
-    def top_up_balance(self, user_id, amount):
+    def top_up_balance(self, user_id, amount, idempotency_key=None):
         payload = {"amount": amount}
         url = f"{self.API_BASE_URL}users/{user_id}/top_up/"
 
         try:
-            response = requests.post(url, json=payload, auth=self.AUTH)
+            response = self._post_idempotent('top_up_balance', url, payload, idempotency_key)
             response.raise_for_status()
+            self.invalidate_cache('get_user_data', f"{self.API_BASE_URL}users/{user_id}/data/")
             return response.json()
         except requests.exceptions.HTTPError as e:
             if e.response.content:
@@ -84,7 +242,7 @@ class NetworkHelper:
         url = f"{self.API_BASE_URL}libraries/?user={user_id}"
 
         try:
-            response = requests.get(url, auth=self.AUTH)
+            response = self._request('get_user_library', 'GET', url, params={'fields': LIBRARY_FIELDS})
             response.raise_for_status()
             library_data = response.json()
 
@@ -102,7 +260,7 @@ class NetworkHelper:
         params = {'user_id': user_id}
 
         try:
-            response = requests.get(url, params=params, auth=self.AUTH)
+            response = self._request('check_if_owned_by_api', 'GET', url, params=params)
             response.raise_for_status()
 
             return response.json().get('is_owned', False)
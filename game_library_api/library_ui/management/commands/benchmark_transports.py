@@ -0,0 +1,67 @@
+import statistics
+import time
+
+import requests
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from library_app.models import Game
+from library_ui.NetworkHelper import NetworkHelper
+from library_ui.transports import InProcessTransport
+from library_ui.views_api import API_BASE_URL, AUTH, AUTH_USER
+
+
+class Command(BaseCommand):
+    help = 'Порівнює HTTP і in-process транспорт NetworkHelper на типовому наборі викликів сторінок library_ui.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=200, help='Скільки разів повторити набір викликів.')
+        parser.add_argument('--base-url', default=API_BASE_URL, help='Адреса API для HTTP-транспорту.')
+
+    def handle(self, *args, **options):
+        user = get_user_model().objects.order_by('id').first()
+        game = Game.objects.order_by('game_id').first()
+        if not user or not game:
+            raise CommandError('Потрібні хоча б один користувач і одна гра в базі.')
+
+        calls = [
+            ('get_all_games', lambda helper: helper.get_all_games(page_size=50)),
+            ('get_game_details', lambda helper: helper.get_game_details(game.pk)),
+            ('get_user_data', lambda helper: helper.get_user_data(user.pk)),
+            ('get_user_library', lambda helper: helper.get_user_library(user.pk)),
+            ('check_if_owned_by_api', lambda helper: helper.check_if_owned_by_api(user.pk, game.pk)),
+        ]
+
+        helpers = {
+            'http': NetworkHelper(options['base_url'], AUTH, get_retries=0),
+            'inprocess': NetworkHelper(options['base_url'], AUTH, transport=InProcessTransport(AUTH_USER)),
+        }
+
+        try:
+            helpers['http'].session.get(options['base_url'], timeout=helpers['http'].timeout)
+        except requests.exceptions.RequestException as e:
+            self.stdout.write(self.style.WARNING(f'HTTP-транспорт пропущено, API недоступне: {e}'))
+            del helpers['http']
+
+        totals = {}
+        for name, helper in helpers.items():
+            for _, call in calls:
+                call(helper)
+
+            timings = []
+            for _ in range(options['iterations']):
+                started = time.perf_counter()
+                for _, call in calls:
+                    call(helper)
+                timings.append((time.perf_counter() - started) * 1000)
+
+            totals[name] = statistics.mean(timings)
+            p95 = statistics.quantiles(timings, n=20)[-1] if len(timings) > 1 else timings[0]
+            self.stdout.write(f'{name:<10} набір із {len(calls)} викликів: середнє {totals[name]:.2f} мс, p95 {p95:.2f} мс')
+
+            for call_name, stats in sorted(helper.latency_stats().items()):
+                self.stdout.write(f'    {call_name:<24} {stats["avg_ms"]:>8} мс  (помилок: {stats["errors"]})')
+            helper.close()
+
+        if len(totals) == 2 and totals['inprocess']:
+            self.stdout.write(self.style.SUCCESS(f"In-process швидший у {totals['http'] / totals['inprocess']:.1f} раз(и)"))
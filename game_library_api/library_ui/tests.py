@@ -1,3 +1,196 @@
-from django.test import TestCase
+import asyncio
+import json
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+import requests
+from django.test import SimpleTestCase, TestCase
+from rest_framework.test import APIClient
+
+from library_app.tests import make_catalog
+from library_app.models import User
+from library_ui.AsyncNetworkHelper import AsyncNetworkHelper
+from library_ui.NetworkHelper import NetworkHelper
+from library_ui.transports import InProcessResponse, InProcessTransport
+
+
+class FakeApiTransport:
+    # Каталог, що змінюється після кожного POST: видно, чи віддано сторінку, завантажену до запису
+    in_process = False
+
+    def __init__(self):
+        self.version = 0
+        self.requests = []
+
+    def request(self, method, url, **kwargs):
+        self.requests.append((method, url))
+        if method == 'POST':
+            self.version += 1
+            body = {'message': 'ok', 'new_balance': '1.00'}
+        else:
+            body = {'results': [], 'version': self.version}
+        return InProcessResponse(200, json.dumps(body).encode('utf-8'))
+
+
+class AsyncNetworkHelperTests(SimpleTestCase):
+    def setUp(self):
+        self.transport = FakeApiTransport()
+        self.helper = NetworkHelper('http://api/', None, transport=self.transport)
+        self.async_helper = AsyncNetworkHelper(self.helper)
+
+    def prefetch(self, page):
+        self.async_helper.prefetch_games_page(page)
+        self.async_helper._prefetched[self.async_helper._page_key(page, None, None)][1].result()
+
+    def test_sync_writes_drop_prefetched_pages(self):
+        # Так пишуть buy_game_view і top_up_balance_view — через синхронний network_helper
+        for write in (lambda: self.helper.buy_game(1, 2), lambda: self.helper.top_up_balance(1, 10)):
+            self.prefetch(2)
+            write()
+            page = asyncio.run(self.async_helper.get_all_games(page=2))
+            self.assertEqual(page['version'], self.transport.version)
+
+    def test_prefetched_page_is_served_without_a_request(self):
+        self.prefetch(3)
+        sent = len(self.transport.requests)
+        page = asyncio.run(self.async_helper.get_all_games(page=3))
+        self.assertEqual(page['version'], 0)
+        self.assertEqual(len(self.transport.requests), sent)
+
+
+class TransportParityTests(TestCase):
+    # Той самий ендпоінт через HTTP-стек (тестовий клієнт) і через InProcessTransport має давати однакове тіло
+    def setUp(self):
+        self.games, self.users = make_catalog(games=3, users=2)
+        admin = User.objects.create_user(username='ui_api', password='secret123')
+        self.client = APIClient()
+        self.client.force_authenticate(admin)
+        self.transport = InProcessTransport('ui_api')
+
+    def assert_same(self, path, params=None):
+        over_http = self.client.get(path, params or {})
+        in_process = self.transport.request('GET', 'http://testserver' + path, params=params)
+
+        self.assertEqual(in_process.status_code, over_http.status_code)
+        self.assertEqual(self.parsed(in_process.content), self.parsed(over_http.content))
+        return in_process
+
+    def parsed(self, content):
+        # Тіла помилок бувають порожні або HTML — порівнюємо те, що отримав би requests
+        try:
+            return json.loads(content)
+        except ValueError:
+            return content
+
+    def test_drf_responses_match(self):
+        game = self.games[0]
+        response = self.assert_same(f'/api/games/{game.pk}/')
+        self.assertEqual(response.json()['price'], '5.00')
+
+        self.assert_same('/api/games/', {'page': 1})
+        self.assert_same('/api/reports/monthly-revenue/')
+        self.assert_same(f'/api/users/{self.users[1].pk}/data/')
+        self.assert_same('/api/libraries/', {'user': self.users[1].pk})
+
+    def test_errors_match(self):
+        self.assert_same('/api/games/999999/')
+        response = self.assert_same('/no-such-path/')
+        self.assertEqual(response.status_code, 404)
+
+    def test_json_body_is_sent(self):
+        user = self.users[0]
+        response = self.transport.request('POST', f'http://testserver/api/users/{user.pk}/top_up/',
+                                          json={'amount': '5.00'})
+        self.assertEqual(response.status_code, 200)
+        user.refresh_from_db()
+        self.assertEqual(user.balance, Decimal('105.00'))
+
+
+class ScriptedTransport:
+    # Відповіді по черзі зі списку (status, body, headers); запам'ятовує кожен виклик
+    in_process = False
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.calls = []
+
+    def request(self, method, url, **kwargs):
+        self.calls.append((method, url, kwargs))
+        item = self.responses.pop(0)
+        if isinstance(item, Exception):
+            raise item
+        status_code, body, headers = item
+        content = json.dumps(body).encode('utf-8') if body is not None else b''
+        return InProcessResponse(status_code, content, headers)
+
+
+class NetworkHelperSessionTests(SimpleTestCase):
+    def test_session_pools_connections_and_retries_only_safe_methods(self):
+        helper = NetworkHelper('http://api/', None, pool_size=7, get_retries=4)
+        adapter = helper.session.get_adapter('http://api/')
+
+        self.assertEqual(adapter._pool_maxsize, 7)
+        self.assertEqual(adapter.max_retries.total, 4)
+        self.assertIn('GET', adapter.max_retries.allowed_methods)
+        self.assertNotIn('POST', adapter.max_retries.allowed_methods)
+
+    def test_every_request_has_a_timeout_and_is_timed(self):
+        transport = ScriptedTransport((200, {'title': 'A'}, {}), (500, None, {}))
+        helper = NetworkHelper('http://api/', None, connect_timeout=1.5, read_timeout=4, transport=transport)
+
+        helper.get_game_details(1)
+        helper.get_game_details(2)
+
+        self.assertTrue(all(kwargs['timeout'] == (1.5, 4) for _, _, kwargs in transport.calls))
+        stats = helper.latency_stats()['get_game_details']
+        self.assertEqual((stats['calls'], stats['errors']), (2, 1))
+        self.assertIsNotNone(stats['avg_ms'])
+
+    @mock.patch('library_ui.NetworkHelper.time.sleep')
+    def test_post_is_retried_with_the_same_idempotency_key(self, sleep):
+        transport = ScriptedTransport(
+            requests.exceptions.ConnectionError(),
+            (409, {'error': 'in progress'}, {}),
+            (200, {'message': 'ok', 'new_balance': '5.00'}, {}),
+        )
+        helper = NetworkHelper('http://api/', None, transport=transport)
+
+        self.assertEqual(helper.buy_game(1, 2)['message'], 'ok')
+        keys = {kwargs['headers']['Idempotency-Key'] for _, _, kwargs in transport.calls}
+        self.assertEqual(len(transport.calls), 3)
+        self.assertEqual(len(keys), 1)
+
+
+class NetworkHelperCacheTests(SimpleTestCase):
+    def test_fresh_entry_is_served_without_a_request(self):
+        transport = ScriptedTransport((200, {'title': 'A'}, {}))
+        helper = NetworkHelper('http://api/', None, transport=transport, cache_ttls={'get_game_details': 60})
+
+        self.assertEqual(helper.get_game_details(1), {'title': 'A'})
+        self.assertEqual(helper.get_game_details(1), {'title': 'A'})
+        self.assertEqual(len(transport.calls), 1)
+        self.assertEqual(helper.latency_stats()['get_game_details']['cache_hits'], 1)
+
+    def test_stale_entry_is_revalidated_with_etag(self):
+        transport = ScriptedTransport((200, {'title': 'A'}, {'ETag': '"v1"'}), (304, None, {'ETag': '"v1"'}))
+        helper = NetworkHelper('http://api/', None, transport=transport)
+
+        helper.get_game_details(1)
+        self.assertEqual(helper.get_game_details(1), {'title': 'A'})
+        self.assertEqual(transport.calls[1][2]['headers'], {'If-None-Match': '"v1"'})
+
+    def test_invalidation_and_lru_limit(self):
+        transport = ScriptedTransport(*[(200, {'n': n}, {}) for n in range(5)])
+        helper = NetworkHelper('http://api/', None, transport=transport,
+                               cache_ttls={'get_game_details': 60}, cache_size=2)
+
+        helper.get_game_details(1)
+        helper.invalidate_cache('get_game_details', 'http://api/games/1/')
+        self.assertEqual(helper.get_game_details(1), {'n': 1})
+
+        helper.get_game_details(2)
+        helper.get_game_details(3)
+        self.assertEqual(helper.get_game_details(3), {'n': 3})
+        # Запис гри 1 витіснено — новий запит
+        self.assertEqual(helper.get_game_details(1), {'n': 4})
+        self.assertEqual(len(transport.calls), 5)
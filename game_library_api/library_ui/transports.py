@@ -0,0 +1,111 @@
+import json
+import threading
+from urllib.parse import urlsplit
+
+import requests
+from django.contrib.auth import get_user_model
+from django.core.handlers.exception import response_for_exception
+from django.http import Http404, HttpRequest, QueryDict
+from django.urls import Resolver404, resolve
+
+
+class HttpTransport:
+    in_process = False
+
+    def __init__(self, session):
+        self.session = session
+
+    def request(self, method, url, **kwargs):
+        return self.session.request(method, url, **kwargs)
+
+
+class InProcessResponse:
+    # Мінімальний інтерфейс requests.Response, яким користується NetworkHelper
+    def __init__(self, status_code, content, headers=None):
+        self.status_code = status_code
+        self.content = content
+        self.headers = dict(headers or {})
+
+    @classmethod
+    def from_django(cls, response):
+        # Тіло рендериться так само, як для HTTP-клієнта (Decimal -> рядок, JsonResponse, стрімінг),
+        # тож json() повертає те саме, що й requests.Response.json() для цього ж ендпоінта
+        if getattr(response, 'streaming', False):
+            content = b''.join(response.streaming_content)
+        else:
+            if hasattr(response, 'render') and not response.is_rendered:
+                response.render()
+            content = response.content
+        return cls(response.status_code, content, response.headers)
+
+    @property
+    def ok(self):
+        return self.status_code < 400
+
+    def json(self):
+        return json.loads(self.content)
+
+    def raise_for_status(self):
+        if not self.ok:
+            raise requests.exceptions.HTTPError(f'{self.status_code} для виклику в межах процесу', response=self)
+
+
+class InProcessTransport:
+    # Викликає в'юшки library_app напряму через URL-резолвер: без сокета і Basic auth
+    in_process = True
+
+    def __init__(self, username):
+        self.username = username
+        self._user = None
+        self._lock = threading.Lock()
+
+    def _api_user(self):
+        if self._user is None:
+            with self._lock:
+                if self._user is None:
+                    self._user = get_user_model().objects.filter(username=self.username).first()
+        return self._user
+
+    def _build_request(self, method, url, params=None, json_body=None, headers=None):
+        parts = urlsplit(url)
+
+        http_request = HttpRequest()
+        http_request.method = method.upper()
+        http_request.path = http_request.path_info = parts.path
+        http_request.META.update({
+            'REQUEST_METHOD': http_request.method,
+            'HTTP_HOST': parts.netloc or '127.0.0.1',
+            'SERVER_NAME': parts.hostname or '127.0.0.1',
+            'SERVER_PORT': str(parts.port or 80),
+            'QUERY_STRING': parts.query,
+        })
+        for name, value in (headers or {}).items():
+            http_request.META['HTTP_' + name.upper().replace('-', '_')] = value
+
+        query = QueryDict(parts.query, mutable=True)
+        for key, value in (params or {}).items():
+            query[key] = value
+        http_request.GET = query
+
+        if json_body is not None:
+            http_request._body = json.dumps(json_body).encode('utf-8')
+            http_request.META['CONTENT_TYPE'] = 'application/json'
+            http_request.META['CONTENT_LENGTH'] = str(len(http_request._body))
+
+        # DRF бере цього користувача замість authentication_classes (той самий механізм, що й force_authenticate)
+        http_request._force_auth_user = self._api_user()
+        return http_request
+
+    def request(self, method, url, params=None, headers=None, **kwargs):
+        # Ключове слово json= як у requests; локально під іншим ім'ям, щоб не затінити модуль json
+        json_body = kwargs.pop('json', None)
+        http_request = self._build_request(method, url, params=params, json_body=json_body, headers=headers)
+
+        try:
+            match = resolve(http_request.path_info)
+        except Resolver404:
+            # Та сама 404, яку віддав би обробник Django для HTTP-запиту (handler404, DEBUG)
+            return InProcessResponse.from_django(response_for_exception(http_request, Http404()))
+
+        response = match.func(http_request, *match.args, **match.kwargs)
+        return InProcessResponse.from_django(response)
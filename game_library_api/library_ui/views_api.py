@@ -1,3 +1,7 @@
+import asyncio
+from urllib.parse import urlencode
+
+from asgiref.sync import sync_to_async
 from django.shortcuts import render, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth import logout
@@ -10,68 +14,115 @@ import plotly.express as px
 from concurrent.futures import ThreadPoolExecutor
 from django.db import connection
 
+from .AsyncNetworkHelper import AsyncNetworkHelper
 from .NetworkHelper import NetworkHelper
+from .transports import InProcessTransport
+from django.conf import settings
 API_BASE_URL = 'http://127.0.0.1:8000/api/'
 AUTH_USER = 'arisu'
 AUTH_PASS = 'paowithbeijo'
 AUTH = HTTPBasicAuth(AUTH_USER, AUTH_PASS)
-network_helper = NetworkHelper(API_BASE_URL,AUTH)
+GAMES_PAGE_SIZE = 9
+CATALOG_FILTERS = ('search', 'genre', 'min_price', 'max_price', 'ordering')
+
+network_transport = InProcessTransport(AUTH_USER) if settings.LIBRARY_API_TRANSPORT == 'inprocess' else None
+network_helper = NetworkHelper(API_BASE_URL,AUTH, transport=network_transport,
+                               cache_ttls=settings.LIBRARY_API_CACHE_TTLS)
+# Без TTL-кешу: тест паралельних запитів має щоразу доходити до API
+benchmark_network_helper = NetworkHelper(API_BASE_URL, AUTH, transport=network_transport)
+async_network_helper = AsyncNetworkHelper(network_helper)
+
+class RemotePage:
+    # Сторінка, яку вже нарізав API: той самий інтерфейс, що й django Page, для шаблону пагінації
+    def __init__(self, object_list, number, count, page_size):
+        self.object_list = object_list
+        self.number = number
+        self.paginator = Paginator(range(count), page_size)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.number < self.paginator.num_pages
+
+    def has_previous(self):
+        return self.number > 1
+
+    def has_other_pages(self):
+        return self.has_previous() or self.has_next()
+
+    def next_page_number(self):
+        return self.number + 1
+
+    def previous_page_number(self):
+        return self.number - 1
+
 
 @login_required
-def game_list_view(request):
-    user_id = request.user.pk
+async def game_list_view(request):
+    user = await request.auser()
 
-    api_response = network_helper.get_all_games(page_size=300)
-    user_data = network_helper.get_user_data(user_id)
+    try:
+        page_number = max(1, int(request.GET.get('page', 1)))
+    except ValueError:
+        page_number = 1
+    filters = {name: request.GET[name] for name in CATALOG_FILTERS if request.GET.get(name)}
+
+    # API віддає рівно ту сторінку, яку показуємо, з тими ж фільтрами та сортуванням
+    api_response, user_data = await asyncio.gather(
+        async_network_helper.get_all_games(page=page_number, page_size=GAMES_PAGE_SIZE, filters=filters),
+        async_network_helper.get_user_data(user.pk),
+    )
 
     if isinstance(api_response, dict) and 'results' in api_response:
         games_list = api_response['results']
+        games_count = api_response.get('count', len(games_list))
     elif isinstance(api_response, list):
         games_list = api_response
+        games_count = len(games_list)
     else:
         games_list = []
+        games_count = 0
 
-    paginator = Paginator(games_list, 9)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    page_obj = RemotePage(games_list, page_number, games_count, GAMES_PAGE_SIZE)
+    if page_obj.has_next():
+        async_network_helper.prefetch_games_page(page_number + 1, GAMES_PAGE_SIZE, filters)
 
     context = {
         'games': page_obj,
+        'filters': filters,
+        'filter_query': urlencode(filters) + '&' if filters else '',
         'balance': user_data.get('balance', 'N/A'),
-        'username': request.user.username
+        'username': user.username
     }
-    return render(request, 'game_list.html', context)
+    # Шаблон і контекст-процесори можуть звертатися до сесії/БД, тому рендер — у sync-потоці
+    return await sync_to_async(render)(request, 'game_list.html', context)
 
 
 @login_required
-def game_detail_view(request, pk):
-    user_id = request.user.pk
-
-    game_data = network_helper.get_game_details(pk)
-    user_data = network_helper.get_user_data(user_id)
+async def game_detail_view(request, pk):
+    user = await request.auser()
+
+    # Точкова перевірка володіння замість завантаження всієї бібліотеки з вкладеними іграми
+    game_data, user_data, is_owned = await asyncio.gather(
+        async_network_helper.get_game_details(pk),
+        async_network_helper.get_user_data(user.pk),
+        async_network_helper.check_if_owned_by_api(user.pk, pk),
+    )
 
     if not game_data:
         messages.error(request, 'Гру не знайдено.')
         return redirect('game_list')
 
-    library_response = network_helper.get_user_library(user_id)
-
-    is_owned = False
-
-    if isinstance(library_response, list):
-        for item in library_response:
-            game_id_in_library = item.get('game')
-
-            if str(game_id_in_library) == str(pk):
-                is_owned = True
-                break
-
     context = {
         'game': game_data,
         'balance': user_data.get('balance', 'N/A'),
         'is_owned': is_owned,
     }
-    return render(request, 'game_detail.html', context)
+    return await sync_to_async(render)(request, 'game_detail.html', context)
 
 
 @login_required
@@ -149,7 +200,7 @@ def library_view(request):
 
 def fetch_game_worker(game_id):
     try:
-        network_helper.get_game_details(game_id)
+        benchmark_network_helper.get_game_details(game_id)
     except Exception:
         pass
     finally:
@@ -216,7 +267,8 @@ def parallel_db_test_view(request):
     context = {
         'chart': chart_html,
         'results_table': results,
-        'total_requests': len(task_ids)
+        'total_requests': len(task_ids),
+        'latency_stats': benchmark_network_helper.latency_stats()
     }
 
     return render(request, 'parallel_db_test.html', context)
\ No newline at end of file